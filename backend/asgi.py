@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Build the putaway slotting index while the server starts taking requests
+from inbound import slotting  # noqa: E402
+
+slotting.warm_in_background()
@@ -43,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack
+    'inbound.metrics.RequestMetricsMiddleware',
+    'inbound.profiling.RequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -66,8 +69,97 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Same JSON as DRF's JSONRenderer, encoded with orjson when it is installed
+    'DEFAULT_RENDERER_CLASSES': [
+        'inbound.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Lean read path: the bin, shipment and audit log lists fetch values() rows and
+# build the response dicts directly instead of going through the serializers,
+# and responses are encoded with orjson (when installed). Both produce the
+# same JSON as the plain DRF path; switch them off to compare.
+INBOUND_FAST_READS = True
+INBOUND_ORJSON = True
+
+# Inbound/outbound bulk processing
+# Rows per IN lookup / bulk statement (kept well below SQLite's variable limit)
+INBOUND_BULK_CHUNK_SIZE = 500
+# Bytes read per step when streaming uploaded manifest/picklist files
+INBOUND_UPLOAD_READ_SIZE = 64 * 1024
+# Max created/updated/failed IDs echoed back for a streamed upload
+INBOUND_UPLOAD_ID_SAMPLE_SIZE = 1000
+# Packages per pick wave in a picklist's route (0 = the whole picklist in one wave)
+INBOUND_PICK_WAVE_SIZE = 200
+
+# Background jobs (run workers with `python manage.py run_jobs --workers N`)
+# Where uploaded job inputs and export outputs are spooled
+INBOUND_JOB_FILE_DIR = BASE_DIR / 'job_files'
+# Minimum seconds between progress writes while a job runs
+INBOUND_JOB_PROGRESS_INTERVAL = 1.0
+# Seconds between heartbeat writes of a running job, whatever its handler does
+INBOUND_JOB_HEARTBEAT_INTERVAL = 30.0
+# A running job without a heartbeat for this many seconds belongs to a dead
+# worker and is requeued (workers check every half of it)
+INBOUND_JOB_STALE_AFTER = 300
+# Times a job is retried after its worker dies before it is marked failed
+INBOUND_JOB_MAX_ATTEMPTS = 3
+
+# Audit rows from the scan endpoints: 'buffered' queues them for a background
+# bulk writer, 'sync' writes each one inline
+INBOUND_AUDIT_MODE = 'buffered'
+# Flush the audit buffer at this many rows or after this many seconds
+INBOUND_AUDIT_BATCH_SIZE = 200
+INBOUND_AUDIT_FLUSH_INTERVAL = 0.5
+# Where `manage.py archive_audit_logs` writes its monthly gzip NDJSON files
+INBOUND_AUDIT_ARCHIVE_DIR = BASE_DIR / 'audit_archive'
+
+# Per-process cache for search_package / search_bin / get_bin_packages
+INBOUND_CACHE_ENABLED = True
+# Max cached shipments + bins, and seconds an entry may live
+INBOUND_CACHE_SIZE = 10000
+INBOUND_CACHE_TTL = 30.0
+# Seconds between checks of the ChangeVersion table for other processes'
+# writes (0 = before every lookup, so no process ever serves a stale entry)
+INBOUND_CACHE_SYNC_INTERVAL = 0.0
+# Seconds a shipment's change stamp is kept; must exceed INBOUND_CACHE_TTL plus
+# the longest write transaction. Older stamps are pruned as new ones are written
+INBOUND_CHANGE_VERSION_RETENTION = 300.0
+
+# Putaway slotting (/api/inbound/suggest_bin/): each process keeps a sorted
+# free-capacity index of the bins, built in the background at startup (when
+# off, suggestions query the bins table)
+INBOUND_SLOTTING_INDEX = True
+INBOUND_SLOTTING_WARM_ON_STARTUP = True
+
+# Live event stream (/api/events/, needs an ASGI server): how often each
+# process polls the event log for other processes' writes, the keep-alive
+# period, how long events stay replayable for reconnecting clients, and how
+# many undelivered events a slow client may queue before it must reload
+INBOUND_EVENTS_POLL_INTERVAL = 1.0
+INBOUND_EVENTS_HEARTBEAT = 15.0
+INBOUND_EVENTS_RETENTION = 3600
+INBOUND_EVENTS_QUEUE_SIZE = 1000
+
+# Request metrics (/api/metrics, Prometheus text format). With several worker
+# processes set a directory shared by them: each process saves its totals
+# there every FLUSH_INTERVAL seconds and the export sums them all. None keeps
+# the metrics per process.
+INBOUND_METRICS_DIR = None
+INBOUND_METRICS_FLUSH_INTERVAL = 1.0
+# Add a Server-Timing header (DB / rendering / total time) to every response
+INBOUND_METRICS_SERVER_TIMING = True
+
+# Opt-in request profiler (inbound/profiling.py, `manage.py profiles`). A
+# request is profiled when it sends "X-Profile: <TOKEN>" (any value while
+# DEBUG is on and TOKEN is None) or is drawn at SAMPLE_RATE (0.0-1.0). The
+# newest KEEP profiles are kept in DIR.
+INBOUND_PROFILE_DIR = BASE_DIR / 'profiles'
+INBOUND_PROFILE_TOKEN = None
+INBOUND_PROFILE_SAMPLE_RATE = 0.0
+INBOUND_PROFILE_KEEP = 200
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -91,10 +183,36 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite tuning for several concurrent workers, applied to every new connection:
+# - WAL lets readers run alongside the single writer;
+# - synchronous=NORMAL is durable at checkpoints and safe with WAL;
+# - busy_timeout (ms) makes a blocked writer wait for the lock instead of
+#   failing with "database is locked";
+# - mmap_size (bytes) and cache_size (negative = KiB) keep hot pages in memory.
+SQLITE_PRAGMAS = {
+    # First, so switching the journal mode below also waits for the lock
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+}
+# Start transactions with BEGIN IMMEDIATE: a transaction that reads and then
+# writes takes the write lock up front, so two of them can't both hold a read
+# lock, both try to upgrade, and have one fail at once without waiting
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': SQLITE_TRANSACTION_MODE,
+        },
+        # On-disk test DB so concurrency tests get real parallel connections
+        # (SQLite's in-memory test DB is a single shared-cache database)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
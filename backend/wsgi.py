@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Build the putaway slotting index while the server starts taking requests
+from inbound import slotting  # noqa: E402
+
+slotting.warm_in_background()
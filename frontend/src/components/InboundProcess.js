@@ -57,6 +57,22 @@ const InboundProcess = () => {
         }
     }, [binId, binLocked, handleAutoValidateBin]);
 
+    const handleSuggestBin = async () => {
+        if (isProcessing) return;
+        setMessage('');
+        
+        try {
+            const response = await inboundAPI.suggestBin();
+            const suggested = response.data.bin;
+            setBinId(suggested.bin_id);
+            setMessage(`Suggested bin ${suggested.bin_id}${suggested.location ? ` (${suggested.location})` : ''}: ${suggested.free_slots} free slot(s)`);
+            setMessageType('info');
+        } catch (error) {
+            setMessage(error.response?.data?.errors?.bin_id?.[0] || 'Failed to suggest a bin');
+            setMessageType('error');
+        }
+    };
+
     const handleAssignPackage = async () => {
         if (!binValidated || !trackingId) {
             setMessage('Please enter a tracking ID');
@@ -214,6 +230,16 @@ const InboundProcess = () => {
                                 <span className="camera-icon">📷</span>
                                 Scan
                             </button>
+                            {!binLocked && (
+                                <button 
+                                    type="button"
+                                    className="camera-btn" 
+                                    onClick={handleSuggestBin}
+                                    disabled={isProcessing}
+                                >
+                                    💡 Suggest
+                                </button>
+                            )}
                             {binLocked && (
                                 <button 
                                     type="button"
@@ -1,14 +1,16 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './InventoryDashboard.css';
-import { inboundAPI } from '../services/api';
+import { eventsAPI, inboundAPI, inventoryAPI } from '../services/api';
 
 const InventoryDashboard = () => {
     const navigate = useNavigate();
     
     // State for data
+    const [summary, setSummary] = useState(null);
     const [bins, setBins] = useState([]);
     const [shipments, setShipments] = useState([]);
+    const [shipmentsNext, setShipmentsNext] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [activeView, setActiveView] = useState('overview'); // overview, bins, packages
@@ -23,126 +25,142 @@ const InventoryDashboard = () => {
         loadDashboardData();
     }, []);
 
-    const loadDashboardData = async () => {
-        setLoading(true);
-        setError(null);
-        
+    // Live changes: patch the loaded packages in place and refresh the totals,
+    // instead of re-fetching the listings (the stream is scoped to the zone filter)
+    const refreshTimer = useRef(null);
+    useEffect(() => {
+        const source = eventsAPI.subscribe(
+            { zone: binFilter },
+            (event) => {
+                const changed = new Set(event.tracking_ids);
+                setShipments(previous => previous.map(shipment => (
+                    changed.has(shipment.tracking_id)
+                        ? { ...shipment, status: event.status || shipment.status, bin_id: event.bin_id }
+                        : shipment
+                )));
+                // Bursts of events (bulk uploads) collapse into one summary refresh
+                clearTimeout(refreshTimer.current);
+                refreshTimer.current = setTimeout(refreshTotals, 500);
+            },
+            () => loadDashboardData()
+        );
+        return () => {
+            source.close();
+            clearTimeout(refreshTimer.current);
+        };
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [binFilter, activeView]);
+
+    const refreshTotals = async () => {
         try {
-            const [binsResponse, shipmentsResponse] = await Promise.all([
-                inboundAPI.getBins(),
-                inboundAPI.getShipments()
-            ]);
-            
-            // Extract data from paginated response
-            const binsData = Array.isArray(binsResponse.data.results) ? binsResponse.data.results : [];
-            const shipmentsData = Array.isArray(shipmentsResponse.data.results) ? shipmentsResponse.data.results : [];
-            
-            setBins(binsData);
-            setShipments(shipmentsData);
+            const summaryResponse = await inventoryAPI.getSummary();
+            setSummary(summaryResponse.data);
+            if (activeView === 'bins') {
+                await loadBins();
+            }
         } catch (err) {
-            console.error('Error loading dashboard data:', err);
-            setError('Failed to load dashboard data');
+            console.error('Error refreshing totals:', err);
+        }
+    };
+
+    // Bins and packages are filtered server-side, so re-query when the filters change
+    useEffect(() => {
+        if (activeView === 'bins') {
+            loadBins();
+        } else if (activeView === 'packages') {
+            loadShipments();
+        }
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [activeView, searchQuery, statusFilter, binFilter]);
+
+    const loadBins = async () => {
+        try {
+            const params = {};
+            if (searchQuery) params.search = searchQuery;
+            if (statusFilter !== 'all') params.status = statusFilter;
+
+            const binsResponse = await inventoryAPI.getBins(params);
+            setBins(Array.isArray(binsResponse.data.results) ? binsResponse.data.results : []);
+        } catch (err) {
+            console.error('Error loading bins:', err);
+            setError('Failed to load bins');
             setBins([]);
-            setShipments([]);
-        } finally {
-            setLoading(false);
         }
     };
 
-    // Calculate warehouse statistics
-    const getWarehouseStats = () => {
-        // Ensure bins and shipments are arrays
-        const binsArray = Array.isArray(bins) ? bins : [];
-        const shipmentsArray = Array.isArray(shipments) ? shipments : [];
-        
-        const totalBins = binsArray.length;
-        const totalPackages = shipmentsArray.length;
-        
-        // Calculate bins in use based on actual packages assigned to them
-        const binsWithPackages = new Set(
-            shipmentsArray
-                .filter(s => s.bin !== null && ['manifested', 'putaway', 'picked'].includes(s.status))
-                .map(s => s.bin)
-        );
-        const binsInUse = binsWithPackages.size;
-        const availableBins = totalBins - binsInUse;
-        
-        const totalCapacity = binsArray.reduce((sum, bin) => sum + (bin.capacity || 0), 0);
-        const usedCapacity = shipmentsArray.filter(s => s.bin !== null && 
-            ['manifested', 'putaway', 'picked'].includes(s.status)).length;
-        const utilizationRate = totalCapacity > 0 ? ((usedCapacity / totalCapacity) * 100).toFixed(1) : 0;
-        
-        const statusCounts = shipmentsArray.reduce((acc, shipment) => {
-            acc[shipment.status] = (acc[shipment.status] || 0) + 1;
-            return acc;
-        }, {});
-        
-        return {
-            totalBins,
-            totalPackages,
-            binsInUse,
-            availableBins,
-            totalCapacity,
-            usedCapacity,
-            utilizationRate,
-            statusCounts
-        };
+    // First page of shipments matching the filters (tracking ID and bin/zone are prefix matches)
+    const loadShipments = async () => {
+        try {
+            const params = {};
+            if (searchQuery) params.search = searchQuery;
+            if (statusFilter !== 'all') params.status = statusFilter;
+            if (binFilter) params.zone = binFilter;
+
+            const shipmentsResponse = await inboundAPI.getShipments(params);
+            setShipments(Array.isArray(shipmentsResponse.data.results) ? shipmentsResponse.data.results : []);
+            setShipmentsNext(shipmentsResponse.data.next || null);
+        } catch (err) {
+            console.error('Error loading shipments:', err);
+            setError('Failed to load packages');
+            setShipments([]);
+            setShipmentsNext(null);
+        }
     };
 
-    // Get bin details with package counts
-    const getBinDetails = () => {
-        const binsArray = Array.isArray(bins) ? bins : [];
-        const shipmentsArray = Array.isArray(shipments) ? shipments : [];
-        
-        return binsArray.map(bin => {
-            const binPackages = shipmentsArray.filter(s => s.bin === bin.bin_id);
-            const packageCount = binPackages.length;
-            const utilizationPercent = (bin.capacity || 0) > 0 ? 
-                ((packageCount / bin.capacity) * 100).toFixed(0) : 0;
-            
-            return {
-                ...bin,
-                packageCount,
-                utilizationPercent,
-                packages: binPackages
-            };
-        });
+    // Append the next cursor page
+    const loadMoreShipments = async () => {
+        if (!shipmentsNext) return;
+        try {
+            const shipmentsResponse = await inboundAPI.getShipmentsPage(shipmentsNext);
+            const more = Array.isArray(shipmentsResponse.data.results) ? shipmentsResponse.data.results : [];
+            setShipments(previous => [...previous, ...more]);
+            setShipmentsNext(shipmentsResponse.data.next || null);
+        } catch (err) {
+            console.error('Error loading more shipments:', err);
+            setError('Failed to load more packages');
+        }
     };
 
-    // Filter shipments based on current filters
-    const getFilteredShipments = () => {
-        const shipmentsArray = Array.isArray(shipments) ? shipments : [];
-        const binsArray = Array.isArray(bins) ? bins : [];
+    const loadDashboardData = async () => {
+        setLoading(true);
+        setError(null);
         
-        return shipmentsArray.filter(shipment => {
-            const matchesStatus = statusFilter === 'all' || shipment.status === statusFilter;
-            const matchesBin = !binFilter || (shipment.bin && 
-                shipment.bin.toLowerCase().includes(binFilter.toLowerCase()));
-            const matchesSearch = !searchQuery || 
-                shipment.tracking_id.toLowerCase().includes(searchQuery.toLowerCase());
-            
-            return matchesStatus && matchesBin && matchesSearch;
-        });
+        try {
+            const summaryResponse = await inventoryAPI.getSummary();
+            setSummary(summaryResponse.data);
+            if (activeView === 'bins') {
+                await loadBins();
+            } else if (activeView === 'packages') {
+                await loadShipments();
+            }
+        } catch (err) {
+            console.error('Error loading dashboard data:', err);
+            setError('Failed to load dashboard data');
+            setSummary(null);
+        } finally {
+            setLoading(false);
+        }
     };
 
-    // Filter bins based on search
-    const getFilteredBins = () => {
-        return getBinDetails().filter(bin => {
-            const matchesSearch = !searchQuery || 
-                bin.bin_id.toLowerCase().includes(searchQuery.toLowerCase());
-            const matchesStatus = statusFilter === 'all' || bin.status === statusFilter;
-            
-            return matchesSearch && matchesStatus;
-        });
-    };
+    // Warehouse statistics come pre-aggregated from the summary endpoint
+    const getWarehouseStats = () => ({
+        totalBins: summary ? summary.total_bins : 0,
+        totalPackages: summary ? summary.total_packages : 0,
+        binsInUse: summary ? summary.bins_in_use : 0,
+        availableBins: summary ? summary.available_bins : 0,
+        totalCapacity: summary ? summary.total_capacity : 0,
+        usedCapacity: summary ? summary.used_capacity : 0,
+        utilizationRate: summary ? summary.utilization_rate : 0,
+        statusCounts: summary ? summary.status_counts : {}
+    });
 
     const handleBack = () => {
         navigate('/');
     };
 
     const stats = getWarehouseStats();
-    const filteredShipments = getFilteredShipments();
-    const filteredBins = getFilteredBins();
+    const filteredShipments = Array.isArray(shipments) ? shipments : [];
+    const filteredBins = Array.isArray(bins) ? bins : [];
 
     if (loading) {
         return (
@@ -200,13 +218,13 @@ const InventoryDashboard = () => {
                                 className={`tab-button ${activeView === 'bins' ? 'active' : ''}`}
                                 onClick={() => setActiveView('bins')}
                             >
-                                📦 Bins ({bins.length})
+                                📦 Bins ({stats.totalBins})
                             </button>
                             <button 
                                 className={`tab-button ${activeView === 'packages' ? 'active' : ''}`}
                                 onClick={() => setActiveView('packages')}
                             >
-                                📋 Packages ({shipments.length})
+                                📋 Packages ({stats.totalPackages})
                             </button>
                         </div>
 
@@ -318,7 +336,7 @@ const InventoryDashboard = () => {
                                         <option value="available">Available</option>
                                         <option value="occupied">Occupied</option>
                                     </select>
-                                    <button className="refresh-btn" onClick={loadDashboardData}>
+                                    <button className="refresh-btn" onClick={loadBins}>
                                         🔄 Refresh
                                     </button>
                                 </div>
@@ -338,7 +356,7 @@ const InventoryDashboard = () => {
                                         </thead>
                                         <tbody>
                                             {filteredBins.map(bin => (
-                                                <tr key={bin.id}>
+                                                <tr key={bin.bin_id}>
                                                     <td className="bin-id-cell">{bin.bin_id}</td>
                                                     <td>{bin.location}</td>
                                                     <td>
@@ -347,15 +365,15 @@ const InventoryDashboard = () => {
                                                         </span>
                                                     </td>
                                                     <td>{bin.capacity}</td>
-                                                    <td>{bin.packageCount}</td>
+                                                    <td>{bin.package_count}</td>
                                                     <td>
                                                         <div className="utilization-bar">
                                                             <div 
                                                                 className="utilization-fill"
-                                                                style={{ width: `${bin.utilizationPercent}%` }}
+                                                                style={{ width: `${bin.utilization_percent}%` }}
                                                             ></div>
                                                             <span className="utilization-text">
-                                                                {bin.utilizationPercent}%
+                                                                {bin.utilization_percent}%
                                                             </span>
                                                         </div>
                                                     </td>
@@ -397,11 +415,11 @@ const InventoryDashboard = () => {
                                     <input 
                                         type="text"
                                         className="search-input"
-                                        placeholder="Filter by Bin ID..."
+                                        placeholder="Filter by Bin ID / zone..."
                                         value={binFilter}
                                         onChange={(e) => setBinFilter(e.target.value)}
                                     />
-                                    <button className="refresh-btn" onClick={loadDashboardData}>
+                                    <button className="refresh-btn" onClick={loadShipments}>
                                         🔄 Refresh
                                     </button>
                                 </div>
@@ -421,13 +439,12 @@ const InventoryDashboard = () => {
                                         </thead>
                                         <tbody>
                                             {filteredShipments.map(shipment => {
-                                                const bin = bins.find(b => b.id === shipment.bin);
                                                 return (
-                                                    <tr key={shipment.id}>
+                                                    <tr key={shipment.tracking_id}>
                                                         <td className="tracking-id-cell">
                                                             {shipment.tracking_id}
                                                         </td>
-                                                        <td>{bin ? bin.bin_id : '-'}</td>
+                                                        <td>{shipment.bin_id || '-'}</td>
                                                         <td>
                                                             <span className={`status-badge ${shipment.status}`}>
                                                                 {shipment.status}
@@ -452,6 +469,11 @@ const InventoryDashboard = () => {
                                     {filteredShipments.length === 0 && (
                                         <div className="no-data">No packages found</div>
                                     )}
+                                    {shipmentsNext && (
+                                        <button className="refresh-btn" onClick={loadMoreShipments}>
+                                            Load more
+                                        </button>
+                                    )}
                                 </div>
                             </div>
                         )}
@@ -1,7 +1,16 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import './ManifestCreation.css';
-import api from '../services/api';
+import api, { jobsAPI } from '../services/api';
+
+// Files up to this size are processed in the request itself; bigger ones go
+// to a background job so the request doesn't time out
+const BACKGROUND_MIN_BYTES = 5 * 1024 * 1024;
+const JOB_POLL_INTERVAL_MS = 1000;
+// Give up when no worker has picked the job up after this long
+const JOB_QUEUED_TIMEOUT_MS = 30000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
 const ManifestCreation = () => {
     const navigate = useNavigate();
@@ -10,6 +19,7 @@ const ManifestCreation = () => {
     const [loading, setLoading] = useState(false);
     const [results, setResults] = useState(null);
     const [error, setError] = useState(null);
+    const [progress, setProgress] = useState(null);
 
     const handleFileSelect = (event) => {
         const file = event.target.files[0];
@@ -37,75 +47,50 @@ const ManifestCreation = () => {
         setResults(null);
 
         try {
-            const fileContent = await selectedFile.text();
-            let trackingIds = [];
-
-            if (fileType === 'csv') {
-                // Parse CSV
-                const lines = fileContent.split('\n').filter(line => line.trim());
-                
-                if (lines.length === 0) {
-                    setError('File is empty');
-                    setLoading(false);
-                    return;
-                }
-
-                // Find the header row
-                const headerLine = lines[0];
-                const headers = headerLine.split(',').map(h => h.trim().toLowerCase());
-                
-                // Find the "Tracking Id" column index
-                const trackingIdIndex = headers.findIndex(h => 
-                    h === 'tracking id' || h === 'tracking_id' || h === 'trackingid'
-                );
-
-                if (trackingIdIndex === -1) {
-                    // If no header found, assume first column is tracking ID
-                    trackingIds = lines.map(line => {
-                        const columns = line.split(',');
-                        return columns[0].trim();
-                    }).filter(id => id && id.toLowerCase() !== 'tracking id' && id.toLowerCase() !== 'tracking_id');
-                } else {
-                    // Extract tracking IDs from the identified column
-                    trackingIds = lines.slice(1).map(line => {
-                        const columns = line.split(',');
-                        return columns[trackingIdIndex] ? columns[trackingIdIndex].trim() : '';
-                    }).filter(id => id);
-                }
-            } else if (fileType === 'json') {
-                // Parse JSON
-                const jsonData = JSON.parse(fileContent);
-                // Support both array of strings and array of objects with tracking_id field
-                if (Array.isArray(jsonData)) {
-                    trackingIds = jsonData.map(item => {
-                        if (typeof item === 'string') {
-                            return item;
-                        } else if (item.tracking_id || item['Tracking Id']) {
-                            return item.tracking_id || item['Tracking Id'];
-                        }
-                        return null;
-                    }).filter(id => id);
-                } else if (jsonData.tracking_ids) {
-                    trackingIds = jsonData.tracking_ids;
-                }
+            const background = selectedFile.size > BACKGROUND_MIN_BYTES;
+            const formData = new FormData();
+            formData.append('file', selectedFile);
+            if (background) {
+                // Let a run_jobs worker stream-parse the large file
+                formData.append('background', 'true');
             }
 
-            if (trackingIds.length === 0) {
-                setError('No tracking IDs found in the file. Please ensure the file has a "Tracking Id" column.');
+            const response = await api.post('/inbound/upload_manifest/', formData, {
+                headers: { 'Content-Type': 'multipart/form-data' }
+            });
+
+            if (!background) {
+                setResults(response.data);
+                setProgress(null);
                 setLoading(false);
                 return;
             }
 
-            // Send to backend
-            const response = await api.post('/inbound/process_manifest/', {
-                tracking_ids: trackingIds
-            });
+            // Poll the job until the worker has finished with the file
+            let job = response.data.job;
+            const queuedSince = Date.now();
+            while (job.status === 'queued' || job.status === 'running') {
+                if (job.status === 'queued' && Date.now() - queuedSince > JOB_QUEUED_TIMEOUT_MS) {
+                    break;
+                }
+                setProgress(job.progress_done);
+                await sleep(JOB_POLL_INTERVAL_MS);
+                job = (await jobsAPI.getJob(job.id)).data;
+            }
 
-            setResults(response.data);
+            if (job.status === 'queued') {
+                setError('No background worker picked up the upload. Ask an administrator to start the job workers (manage.py run_jobs) and try again.');
+            } else if (job.status === 'failed') {
+                setError('Failed to process manifest file');
+            } else {
+                setResults(job.result);
+            }
+            setProgress(null);
             setLoading(false);
         } catch (err) {
             console.error('Upload error:', err);
             setError(err.response?.data?.errors || err.message || 'Failed to process manifest file');
+            setProgress(null);
             setLoading(false);
         }
     };
@@ -195,7 +180,9 @@ const ManifestCreation = () => {
                                     onClick={handleUpload}
                                     disabled={!selectedFile || loading}
                                 >
-                                    {loading ? '⏳ Processing...' : '🚀 Upload & Create Manifest'}
+                                    {loading
+                                        ? `⏳ Processing...${progress ? ` (${progress} IDs)` : ''}`
+                                        : '🚀 Upload & Create Manifest'}
                                 </button>
 
                                 {error && (
@@ -249,7 +236,7 @@ const ManifestCreation = () => {
 
                                 {results.created_ids && results.created_ids.length > 0 && (
                                     <div className="results-detail">
-                                        <h4>✨ Successfully Created ({results.created_ids.length})</h4>
+                                        <h4>✨ Successfully Created ({results.created_count})</h4>
                                         <div className="tracking-list">
                                             {results.created_ids.map((id, index) => (
                                                 <div key={index} className="tracking-item success-item">
@@ -262,7 +249,7 @@ const ManifestCreation = () => {
 
                                 {results.updated_ids && results.updated_ids.length > 0 && (
                                     <div className="results-detail">
-                                        <h4>✔️ Successfully Updated ({results.updated_ids.length})</h4>
+                                        <h4>✔️ Successfully Updated ({results.updated_count})</h4>
                                         <div className="tracking-list">
                                             {results.updated_ids.map((id, index) => (
                                                 <div key={index} className="tracking-item success-item">
@@ -275,7 +262,7 @@ const ManifestCreation = () => {
 
                                 {results.failed_ids && results.failed_ids.length > 0 && (
                                     <div className="results-detail">
-                                        <h4>❌ Failed ({results.failed_ids.length})</h4>
+                                        <h4>❌ Failed ({results.failed_count})</h4>
                                         <div className="tracking-list">
                                             {results.failed_ids.map((item, index) => (
                                                 <div key={index} className="tracking-item failed-item">
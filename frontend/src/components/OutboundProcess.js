@@ -61,8 +61,9 @@ const OutboundProcess = () => {
         setMessage(null);
 
         try {
-            const response = await api.post('/outbound/get_bin_packages/', {
-                bin_id: binId.trim().toUpperCase()
+            // GET so the browser can revalidate with the ETag and get a 304 when the bin is unchanged
+            const response = await api.get('/outbound/get_bin_packages/', {
+                params: { bin_id: binId.trim().toUpperCase() }
             });
 
             if (response.data.success) {
@@ -206,7 +207,8 @@ const OutboundProcess = () => {
                     ...pkg,
                     dispatched: false
                 })));
-                setFileMessage(`✓ Processed ${response.data.packages.length} packages from file`);
+                const waveCount = response.data.waves?.length || 0;
+                setFileMessage(`✓ Processed ${response.data.packages.length} packages from file, in pick-path order${waveCount > 1 ? ` (${waveCount} waves)` : ''}`);
                 setUploadedFile(file);
             }
         } catch (error) {
@@ -277,8 +279,8 @@ const OutboundProcess = () => {
         setMessage(null);
 
         try {
-            const response = await api.post('/outbound/get_bin_packages/', {
-                bin_id: scannedBinId
+            const response = await api.get('/outbound/get_bin_packages/', {
+                params: { bin_id: scannedBinId }
             });
 
             if (response.data.success) {
@@ -496,6 +498,7 @@ const OutboundProcess = () => {
                                         <thead>
                                             <tr>
                                                 <th>#</th>
+                                                <th>Wave</th>
                                                 <th>Tracking ID</th>
                                                 <th>Source</th>
                                                 <th>Status</th>
@@ -509,6 +512,7 @@ const OutboundProcess = () => {
                                                     className={pkg.status === 'picked' ? 'picked-row' : ''}
                                                 >
                                                     <td>{index + 1}</td>
+                                                    <td>{pkg.wave}</td>
                                                     <td className="tracking-cell">{pkg.tracking_id}</td>
                                                     <td>{pkg.manifested ? '📋 Manifest' : '🆕 New'}</td>
                                                     <td>
@@ -613,6 +617,7 @@ const OutboundProcess = () => {
                                         <thead>
                                             <tr>
                                                 <th>#</th>
+                                                <th>Wave</th>
                                                 <th>Tracking ID</th>
                                                 <th>Bin ID</th>
                                                 <th>Status</th>
@@ -626,6 +631,7 @@ const OutboundProcess = () => {
                                                     className={pkg.dispatched ? 'dispatched-row' : ''}
                                                 >
                                                     <td>{index + 1}</td>
+                                                    <td>{pkg.wave}</td>
                                                     <td className="tracking-cell">{pkg.tracking_id}</td>
                                                     <td>{pkg.bin_id || 'N/A'}</td>
                                                     <td>
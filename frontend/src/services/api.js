@@ -16,12 +16,19 @@ export const inboundAPI = {
     // Scan package
     scanPackage: (trackingId) => api.post('/inbound/scan_package/', { tracking_id: trackingId }),
     
+    // Recommend a bin with free slots ({zone, count, strategy, exclude})
+    suggestBin: (params = {}) => api.get('/inbound/suggest_bin/', { params }),
+    
     // Assign package to bin
     assignPackage: (binId, trackingId) => 
         api.post('/inbound/assign/', { bin_id: binId, tracking_id: trackingId }),
     
-    // Get all shipments
-    getShipments: () => api.get('/shipments/'),
+    // Get shipments, filtered server-side
+    // ({status, bin, zone, manifested, time_in_after, time_in_before, time_out_after, time_out_before, search})
+    getShipments: (params = {}) => api.get('/shipments/', { params }),
+    
+    // Follow a `next` link from a shipments page
+    getShipmentsPage: (url) => api.get(url),
     
     // Get all bins
     getBins: () => api.get('/bins/'),
@@ -31,8 +38,8 @@ export const inboundAPI = {
 };
 
 export const outboundAPI = {
-    // Get packages in a bin (for pickup)
-    getBinPackages: (binId) => api.post('/outbound/get_bin_packages/', { bin_id: binId }),
+    // Get packages in a bin (for pickup); GET lookups are revalidated with ETags
+    getBinPackages: (binId) => api.get('/outbound/get_bin_packages/', { params: { bin_id: binId } }),
     
     // Pickup a package (with verification)
     pickupPackage: (trackingId, expectedTrackingId) => 
@@ -49,4 +56,30 @@ export const outboundAPI = {
         }),
 };
 
+export const inventoryAPI = {
+    // Warehouse totals computed server-side (optionally for one zone prefix)
+    getSummary: (params = {}) => api.get('/inventory/summary/', { params }),
+    
+    // Paginated bins with package counts ({status, search, zone, ordering, page})
+    getBins: (params = {}) => api.get('/inventory/bins/', { params }),
+};
+
+export const jobsAPI = {
+    // Get background job status, progress and result
+    getJob: (jobId) => api.get(`/jobs/${jobId}/`),
+};
+
+export const eventsAPI = {
+    // Subscribe to live inventory changes ({bin, zone}); returns the EventSource (call .close())
+    subscribe: (params, onEvent, onResync) => {
+        const query = new URLSearchParams(
+            Object.entries(params || {}).filter(([, value]) => value)
+        ).toString();
+        const source = new EventSource(`${API_URL}/events/${query ? `?${query}` : ''}`);
+        source.onmessage = (message) => onEvent(JSON.parse(message.data));
+        source.addEventListener('resync', () => onResync && onResync());
+        return source;
+    },
+};
+
 export default api;
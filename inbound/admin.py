@@ -1,22 +1,45 @@
+from collections import Counter
+
 from django.contrib import admin
-from .models import Bin, Shipment, AuditLog
+from django.db import transaction
+from . import cache
+from .models import Bin, Shipment, AuditLog, Job
+from .services import adjust_bin_occupancy, move_shipment_occupancy
 
 
 @admin.register(Bin)
 class BinAdmin(admin.ModelAdmin):
-    list_display = ['bin_id', 'location', 'capacity', 'status', 'created_at', 'updated_at']
+    list_display = ['bin_id', 'location', 'capacity', 'occupied_count', 'status', 'created_at', 'updated_at']
     list_filter = ['status', 'created_at']
     search_fields = ['bin_id', 'location']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['occupied_count', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Bin Information', {
-            'fields': ('bin_id', 'location', 'capacity', 'status')
+            'fields': ('bin_id', 'location', 'capacity', 'occupied_count', 'status')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at')
         }),
     )
+    
+    # Admin edits bypass the API, so they stamp the change versions themselves
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        cache.invalidate(bins=[obj.bin_id])
+    
+    def delete_model(self, request, obj):
+        tracking_ids = list(obj.shipments.values_list('tracking_id', flat=True))
+        # delete() clears the primary key, which is the bin ID
+        bin_id = obj.bin_id
+        super().delete_model(request, obj)
+        cache.invalidate(shipments=tracking_ids, bins=[bin_id])
+    
+    def delete_queryset(self, request, queryset):
+        bin_ids = list(queryset.values_list('bin_id', flat=True))
+        tracking_ids = list(Shipment.objects.filter(bin__in=bin_ids).values_list('tracking_id', flat=True))
+        super().delete_queryset(request, queryset)
+        cache.invalidate(shipments=tracking_ids, bins=bin_ids)
 
 
 @admin.register(Shipment)
@@ -24,6 +47,7 @@ class ShipmentAdmin(admin.ModelAdmin):
     list_display = ['tracking_id', 'bin', 'status', 'manifested', 'time_in', 'time_out', 'created_at', 'updated_at']
     list_filter = ['status', 'manifested', 'created_at']
     search_fields = ['tracking_id', 'bin__bin_id']
+    list_select_related = ['bin']
     readonly_fields = ['created_at', 'updated_at', 'time_in']
     
     fieldsets = (
@@ -34,6 +58,29 @@ class ShipmentAdmin(admin.ModelAdmin):
             'fields': ('time_in', 'time_out', 'created_at', 'updated_at')
         }),
     )
+    
+    # Like the API's write hooks, admin edits keep the bins' occupancy counters in step
+    def save_model(self, request, obj, form, change):
+        previous_bin_id = form.initial.get('bin') if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            move_shipment_occupancy(previous_bin_id, obj.bin_id)
+            cache.invalidate(shipments=[obj.tracking_id], bins=[obj.bin_id, previous_bin_id])
+    
+    def delete_model(self, request, obj):
+        tracking_id, bin_id = obj.tracking_id, obj.bin_id
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            move_shipment_occupancy(bin_id, None)
+            cache.invalidate(shipments=[tracking_id], bins=[bin_id])
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = list(queryset.values_list('tracking_id', 'bin_id'))
+            super().delete_queryset(request, queryset)
+            for bin_id, count in Counter(row[1] for row in rows if row[1]).items():
+                adjust_bin_occupancy(bin_id, -count)
+            cache.invalidate(shipments=[row[0] for row in rows], bins={row[1] for row in rows})
 
 
 @admin.register(AuditLog)
@@ -41,6 +88,7 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_display = ['id', 'action', 'shipment', 'user', 'timestamp', 'details']
     list_filter = ['action', 'timestamp', 'user']
     search_fields = ['shipment__tracking_id', 'user', 'details']
+    list_select_related = ['shipment']
     readonly_fields = ['timestamp']
     
     fieldsets = (
@@ -51,3 +99,23 @@ class AuditLogAdmin(admin.ModelAdmin):
             'fields': ('timestamp',)
         }),
     )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress_done', 'progress_total', 'user', 'worker', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['user', 'worker']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'updated_at']
+    
+    fieldsets = (
+        ('Job Information', {
+            'fields': ('kind', 'status', 'payload', 'input_file', 'user', 'worker', 'attempts')
+        }),
+        ('Progress', {
+            'fields': ('progress_done', 'progress_total', 'result', 'error')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'started_at', 'finished_at', 'updated_at')
+        }),
+    )
@@ -0,0 +1,107 @@
+"""Cold storage for old audit rows.
+
+``manage.py archive_audit_logs`` moves audit rows past a cutoff into one
+gzip-compressed NDJSON file per month (``audit-YYYY-MM.ndjson.gz``) and deletes
+them from the hot table. Each chunk is appended as its own gzip member and
+synced to disk before its rows are deleted, so an interrupted run at worst
+leaves rows in both places; readers drop such duplicates by ``id``.
+"""
+import gzip
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog, Shipment
+
+
+ARCHIVE_FIELDS = ['id', 'action', 'shipment_id', 'user', 'timestamp', 'details']
+
+# Audit rows are stamped a moment apart from the shipment write they record,
+# possibly by another process's clock
+CLOCK_SLACK = timedelta(minutes=5)
+
+
+def get_archive_dir():
+    return Path(getattr(settings, 'INBOUND_AUDIT_ARCHIVE_DIR', settings.BASE_DIR / 'audit_archive'))
+
+
+def archive_path(month):
+    """File holding the archived rows of ``month`` (a ``YYYY-MM`` string)"""
+    return get_archive_dir() / f'audit-{month}.ndjson.gz'
+
+
+def archive_rows(rows):
+    """Append audit rows (dicts of ``ARCHIVE_FIELDS``) to their month files.
+
+    Returns the ids written; they are on disk when this returns.
+    """
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(row['timestamp'].strftime('%Y-%m'), []).append(row)
+
+    get_archive_dir().mkdir(parents=True, exist_ok=True)
+    written = []
+    for month, month_rows in by_month.items():
+        with open(archive_path(month), 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                for row in month_rows:
+                    record = dict(row, timestamp=row['timestamp'].isoformat())
+                    archive.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        written.extend(row['id'] for row in month_rows)
+    return written
+
+
+def iter_archived(tracking_id, since=None, until=None):
+    """Yield archived rows of one shipment, reading only the month files from ``since`` to ``until``"""
+    # Cheap substring test before parsing: most lines belong to other shipments
+    needle = json.dumps({'shipment_id': tracking_id}, separators=(',', ':'))[1:-1].encode()
+    first_month = since.strftime('%Y-%m') if since else ''
+    last_month = until.strftime('%Y-%m') if until else '9999-99'
+    for path in sorted(get_archive_dir().glob('audit-*.ndjson.gz')):
+        month = path.name[len('audit-'):len('audit-YYYY-MM')]
+        if month < first_month:
+            continue
+        if month > last_month:
+            break
+        with gzip.open(path, 'rb') as archive:
+            for line in archive:
+                if needle not in line:
+                    continue
+                record = json.loads(line)
+                if record['shipment_id'] == tracking_id:
+                    record['timestamp'] = parse_datetime(record['timestamp'])
+                    yield record
+
+
+def shipment_history(tracking_id):
+    """Full audit history of a shipment, newest first, from the hot table and the archives"""
+    hot = list(
+        AuditLog.objects.filter(shipment_id=tracking_id).values(*ARCHIVE_FIELDS)
+    )
+    seen = {row['id'] for row in hot}
+    for row in hot:
+        row['archived'] = False
+
+    # Audit rows are written between the shipment's arrival and its last
+    # change, so only the month files overlapping that span are read (all of
+    # them for a shipment that no longer exists)
+    since = until = None
+    shipment = Shipment.objects.filter(tracking_id=tracking_id).values(
+        'created_at', 'time_in', 'time_out', 'updated_at'
+    ).first()
+    if shipment:
+        since = min(shipment['created_at'], shipment['time_in']) - CLOCK_SLACK
+        until = max(filter(None, (shipment['time_out'], shipment['updated_at']))) + CLOCK_SLACK
+    archived = []
+    for row in iter_archived(tracking_id, since=since, until=until):
+        if row['id'] not in seen:
+            seen.add(row['id'])
+            archived.append(dict(row, archived=True))
+
+    return sorted(hot + archived, key=lambda row: (row['timestamp'], row['id']), reverse=True)
@@ -0,0 +1,118 @@
+"""Audit sink for the scan endpoints.
+
+In ``buffered`` mode (``INBOUND_AUDIT_MODE``) audit rows are queued when the
+request's transaction commits and written by a background flusher with one
+``bulk_create`` per batch, so a scan costs one write transaction instead of
+two. A batch is flushed once it reaches ``INBOUND_AUDIT_BATCH_SIZE`` rows or
+``INBOUND_AUDIT_FLUSH_INTERVAL`` seconds after the last flush, and whatever is
+left is flushed at interpreter exit. ``sync`` mode writes each row inline.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .models import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_audit_mode():
+    return getattr(settings, 'INBOUND_AUDIT_MODE', 'sync')
+
+
+class BufferedAuditSink:
+    """Thread-safe queue of unsaved AuditLog rows with a background flusher"""
+
+    def __init__(self, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or getattr(settings, 'INBOUND_AUDIT_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'INBOUND_AUDIT_FLUSH_INTERVAL', 0.5)
+        self.pending = []
+        self.lock = threading.Lock()
+        # Serializes writers so rows reach the table in the order they were queued
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    def add(self, entry):
+        with self.lock:
+            self.pending.append(entry)
+            full = len(self.pending) >= self.batch_size
+            if self.thread is None and not self.stopped:
+                self.thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                self.thread.start()
+        if full:
+            self.wakeup.set()
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+            try:
+                AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            except DatabaseError:
+                # e.g. a shipment deleted before its rows were flushed: save what still can be
+                logger.exception('Bulk audit flush failed, retrying %d rows one by one', len(batch))
+                return self._save_each(batch)
+            return len(batch)
+
+    def _save_each(self, batch):
+        written = 0
+        for entry in batch:
+            try:
+                with transaction.atomic():
+                    entry.save()
+                written += 1
+            except DatabaseError:
+                logger.exception('Dropped audit row: %s %s', entry.action, entry.shipment_id)
+        return written
+
+    def close(self):
+        """Stop the flusher and write out anything still queued"""
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_interval * 4)
+        self.flush()
+
+    def _run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit flush failed')
+            finally:
+                close_old_connections()
+
+
+sink = BufferedAuditSink()
+atexit.register(sink.close)
+
+
+def record(action, shipment, user, details):
+    """Record an audit entry for ``shipment`` (a Shipment or its tracking ID).
+
+    Buffered entries are only queued once the surrounding transaction
+    commits, so rolled-back work never shows up in the log.
+    """
+    entry = AuditLog(action=action, user=user, details=details)
+    if isinstance(shipment, str):
+        entry.shipment_id = shipment
+    else:
+        entry.shipment = shipment
+
+    if get_audit_mode() == 'buffered':
+        transaction.on_commit(lambda: sink.add(entry))
+    else:
+        entry.save()
+    return entry
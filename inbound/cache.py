@@ -0,0 +1,271 @@
+"""Read-through cache for the floor's hot lookups (search_package / search_bin /
+get_bin_packages), and the change versions behind it.
+
+Entries live in a per-process LRU with a TTL. Cross-process coherence comes
+from the ``ChangeVersion`` table: every write path calls :func:`invalidate`
+inside its transaction, which stamps the touched ``shipment:<id>`` /
+``bin:<id>`` keys with the next value of a global version counter. Before
+serving a lookup each process fetches the keys stamped since the last version
+it saw (an index range read that is normally empty) and evicts them, so a
+change committed by any worker is never served stale by another. The same
+stamps, plus one per table, give the ETags of conditional.py.
+
+Shipment stamps are pruned once older than ``INBOUND_CHANGE_VERSION_RETENTION``
+(by then every entry cached before the change has expired), so bulk imports
+don't grow the table for ever. The newest pruned version is kept under
+``SHIPMENTS_PRUNED_KEY`` and stands in for the deleted stamps, so a shipment's
+ETag never goes back to an older value.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Bin, ChangeVersion, Shipment
+
+
+# ChangeVersion row holding the global counter; other rows are per-key stamps
+COUNTER_KEY = '*'
+
+
+# Stamped whenever any shipment / bin changes
+SHIPMENTS_TABLE_KEY = 'table:shipments'
+BINS_TABLE_KEY = 'table:bins'
+
+# Highest version of the pruned shipment stamps
+SHIPMENTS_PRUNED_KEY = 'pruned:shipments'
+
+
+def shipment_key(tracking_id):
+    return f'shipment:{tracking_id}'
+
+
+def bin_key(bin_id):
+    return f'bin:{bin_id}'
+
+
+def cache_enabled():
+    return getattr(settings, 'INBOUND_CACHE_ENABLED', True)
+
+
+def get_version_retention():
+    return getattr(settings, 'INBOUND_CHANGE_VERSION_RETENTION', 300.0)
+
+
+# (time.monotonic(), counter version) of this process's last prune
+_last_prune = None
+
+
+def bump_versions(keys):
+    """Stamp ``keys`` with the next global version (in the caller's transaction)"""
+    keys = sorted(set(keys))
+    if not keys:
+        return None
+    # No savepoint: this only ever runs as part of the caller's write
+    with transaction.atomic(savepoint=False):
+        # The counter row is created by the migration; the fallback covers flushed tables
+        if not ChangeVersion.objects.filter(key=COUNTER_KEY).update(version=F('version') + 1):
+            ChangeVersion.objects.get_or_create(key=COUNTER_KEY, defaults={'version': 1})
+        version = ChangeVersion.objects.values_list('version', flat=True).get(key=COUNTER_KEY)
+        now = timezone.now()
+        ChangeVersion.objects.bulk_create(
+            [ChangeVersion(key=key, version=version, updated_at=now) for key in keys],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['version', 'updated_at'],
+            batch_size=500
+        )
+        prune_versions(version, now)
+    return version
+
+
+def prune_versions(version, now):
+    """Delete the shipment stamps written before the previous prune, at most once per retention period.
+
+    ``version`` is the counter's current value. A stamp older than the
+    previous prune is older than the retention period, so any lookup cached
+    before it has expired and no process needs it for eviction any more.
+    """
+    global _last_prune
+    started = time.monotonic()
+    if _last_prune is not None and version >= _last_prune[1]:
+        if started - _last_prune[0] < get_version_retention():
+            return
+        cutoff = _last_prune[1]
+        pruned = ChangeVersion.objects.filter(
+            key__startswith=shipment_key(''), version__lte=cutoff
+        ).delete()[0]
+        if pruned and not ChangeVersion.objects.filter(
+            key=SHIPMENTS_PRUNED_KEY
+        ).update(version=Greatest(F('version'), cutoff), updated_at=now):
+            ChangeVersion.objects.create(key=SHIPMENTS_PRUNED_KEY, version=cutoff, updated_at=now)
+    # First call, or the counter went backwards (restored or flushed database): start over
+    _last_prune = (started, version)
+
+
+class LookupCache:
+    """Thread-safe LRU/TTL cache kept coherent through ``ChangeVersion``"""
+
+    def __init__(self, max_size=None, ttl=None, sync_interval=None):
+        self.max_size = max_size or getattr(settings, 'INBOUND_CACHE_SIZE', 10000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'INBOUND_CACHE_TTL', 30.0)
+        self.sync_interval = sync_interval if sync_interval is not None else getattr(
+            settings, 'INBOUND_CACHE_SYNC_INTERVAL', 0.0
+        )
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.last_version = None
+            self.last_sync = 0.0
+            # Bumped on every eviction; a fill that raced one is not stored
+            self.generation = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key, loader, sync=True):
+        """Return the cached value for ``key``, loading (and caching) it on a miss.
+
+        ``sync=False`` skips the coherence check, for a lookup made right after
+        another one in the same request.
+        """
+        if sync:
+            self.sync()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+                self.evictions += 1
+            self.misses += 1
+            generation = self.generation
+
+        value = loader()
+
+        with self.lock:
+            if self.generation == generation:
+                self.entries[key] = (value, now + self.ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def evict(self, keys):
+        with self.lock:
+            self.generation += 1
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def sync(self):
+        """Evict keys other processes have changed since the last sync"""
+        now = time.monotonic()
+        if self.last_version is not None and now - self.last_sync < self.sync_interval:
+            return
+        if self.last_version is None:
+            changed = []
+            latest = ChangeVersion.objects.filter(key=COUNTER_KEY).values_list('version', flat=True).first() or 0
+        else:
+            changed = list(
+                ChangeVersion.objects.filter(version__gt=self.last_version)
+                .values_list('key', 'version')
+            )
+            latest = max((version for key, version in changed), default=self.last_version)
+        self.evict([key for key, version in changed if key != COUNTER_KEY])
+        with self.lock:
+            self.last_version = max(latest, self.last_version or 0)
+            self.last_sync = now
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+lookup_cache = LookupCache()
+
+
+def invalidate(shipments=(), bins=()):
+    """Record that these shipments/bins changed; call inside the write's transaction"""
+    keys = [shipment_key(tracking_id) for tracking_id in shipments if tracking_id]
+    bin_keys = [bin_key(bin_id) for bin_id in bins if bin_id]
+    if not keys and not bin_keys:
+        return
+    table_keys = ([SHIPMENTS_TABLE_KEY] if keys else []) + ([BINS_TABLE_KEY] if bin_keys else [])
+    keys += bin_keys
+    bump_versions(keys + table_keys)
+    lookup_cache.evict(keys)
+    # Evict again once committed, in case a lookup refilled from the old rows meanwhile
+    transaction.on_commit(lambda: lookup_cache.evict(keys))
+
+
+def _load_shipment(tracking_id):
+    return (
+        Shipment.objects.filter(tracking_id=tracking_id)
+        .values('tracking_id', 'status', 'time_in', 'bin_id')
+        .first()
+    )
+
+
+def _load_bin(bin_id):
+    # One LEFT JOIN instead of a bin query plus a shipments query
+    rows = (
+        Bin.objects.filter(bin_id=bin_id)
+        .order_by('-shipments__time_in', '-shipments__tracking_id')
+        .values_list(
+            'bin_id', 'location', 'status', 'capacity',
+            'shipments__tracking_id', 'shipments__status', 'shipments__manifested', 'shipments__time_in'
+        )
+    )
+    bin_info = None
+    for bin_pk, location, bin_status, capacity, tracking_id, shipment_status, manifested, time_in in rows:
+        if bin_info is None:
+            bin_info = {
+                'bin_id': bin_pk,
+                'location': location,
+                'status': bin_status,
+                'capacity': capacity,
+                'packages': []
+            }
+        if tracking_id is not None:
+            bin_info['packages'].append({
+                'tracking_id': tracking_id,
+                'status': shipment_status,
+                'manifested': manifested,
+                'time_in': time_in
+            })
+    return bin_info
+
+
+def get_shipment(tracking_id, sync=True):
+    """Shipment fields for search_package, or None. Treat the result as read-only."""
+    if not cache_enabled():
+        return _load_shipment(tracking_id)
+    return lookup_cache.get(shipment_key(tracking_id), lambda: _load_shipment(tracking_id), sync)
+
+
+def get_bin(bin_id, sync=True):
+    """Bin fields plus its packages (newest first), or None. Treat the result as read-only."""
+    if not cache_enabled():
+        return _load_bin(bin_id)
+    return lookup_cache.get(bin_key(bin_id), lambda: _load_bin(bin_id), sync)
@@ -0,0 +1,74 @@
+"""Conditional GET (``ETag`` / ``If-None-Match``) for the polled list and lookup endpoints.
+
+Validators come from the ``ChangeVersion`` stamps that every write already
+maintains (see cache.py): one aggregate query over a handful of keys, so an
+unchanged resource is answered ``304 Not Modified`` without running the list
+query or the serializer. The stamps are read before the response is built, so
+a response is never older than its ETag: a write racing the request at worst
+costs the client one extra full response.
+
+No ``Last-Modified`` is sent: with its one-second resolution, a write in the
+same second as a response would be answered 304 to ``If-Modified-Since``.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+
+from .cache import SHIPMENTS_PRUNED_KEY, shipment_key
+from .models import ChangeVersion
+
+
+def get_version(keys):
+    """Version of the newest change to any of ``keys`` (0 if none was recorded)"""
+    if any(key.startswith(shipment_key('')) for key in keys):
+        # Pruned shipment stamps count as changed at the newest pruned version
+        keys = [*keys, SHIPMENTS_PRUNED_KEY]
+    return ChangeVersion.objects.filter(key__in=keys).aggregate(version=Max('version'))['version'] or 0
+
+
+def make_etag(request, version):
+    """Strong ETag for this URL and output format at ``version``"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    variant = f'{request.get_full_path()}|{renderer.format if renderer else ""}'
+    return f'"{version}-{hashlib.blake2b(variant.encode(), digest_size=6).hexdigest()}"'
+
+
+def set_validators(response, etag):
+    response['ETag'] = etag
+    # Let browsers keep the body but always revalidate
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def conditional(keys):
+    """Decorate a GET view method with ETag handling.
+
+    ``keys(view, request, *args, **kwargs)`` returns the ``ChangeVersion`` keys
+    the response depends on, or nothing to skip validation (e.g. bad input).
+    A method that only learns its exact keys while building the response can
+    set ``response.conditional_keys``; if they differ from the ones validated,
+    the response goes out without validators.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(view, request, *args, **kwargs)
+            key_list = keys(view, request, *args, **kwargs)
+            if not key_list:
+                return method(view, request, *args, **kwargs)
+
+            etag = make_etag(request, get_version(key_list))
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return set_validators(not_modified, etag)
+
+            response = method(view, request, *args, **kwargs)
+            used_keys = getattr(response, 'conditional_keys', key_list)
+            if response.status_code == 200 and sorted(used_keys) == sorted(key_list):
+                set_validators(response, etag)
+            return response
+        return wrapper
+    return decorator
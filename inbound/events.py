@@ -0,0 +1,223 @@
+"""Live inventory change events for ``GET /api/events/`` (Server-Sent Events).
+
+Workflow actions call :func:`emit` inside their transaction, which appends a
+compact ``InventoryEvent`` row: rolled-back work never produces an event, and
+writes made by any process (API workers, ``run_jobs``) land in the same log.
+Each ASGI process runs one :class:`EventBroker` that reads new rows from the
+log and fans them out to its subscribers, filtered by bin or zone. Commits in
+the same process wake the broker at once; other processes' events are picked
+up within ``INBOUND_EVENTS_POLL_INTERVAL`` seconds.
+"""
+import asyncio
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .models import InventoryEvent
+
+
+EVENT_FIELDS = ['id', 'action', 'status', 'bin_id', 'previous_bin_id', 'tracking_ids', 'created_at']
+
+# Expired events are pruned each time the log crosses a multiple of this many rows
+PRUNE_EVERY = 1000
+
+
+def get_poll_interval():
+    return getattr(settings, 'INBOUND_EVENTS_POLL_INTERVAL', 1.0)
+
+
+def get_heartbeat():
+    return getattr(settings, 'INBOUND_EVENTS_HEARTBEAT', 15.0)
+
+
+def get_retention():
+    """Seconds events are kept for reconnecting clients (``Last-Event-ID``)"""
+    return getattr(settings, 'INBOUND_EVENTS_RETENTION', 3600)
+
+
+def get_queue_size():
+    return getattr(settings, 'INBOUND_EVENTS_QUEUE_SIZE', 1000)
+
+
+def event(action, tracking_ids=(), status='', bin_id=None, previous_bin_id=None):
+    """Build an unsaved event; pass it to :func:`emit`"""
+    return InventoryEvent(
+        action=action,
+        status=status,
+        bin_id=bin_id,
+        previous_bin_id=previous_bin_id if previous_bin_id != bin_id else None,
+        tracking_ids=list(tracking_ids)
+    )
+
+
+def emit(*events):
+    """Append events to the log; call inside the write's transaction"""
+    events = [item for item in events if item is not None]
+    if not events:
+        return
+    InventoryEvent.objects.bulk_create(events)
+    transaction.on_commit(broker.wake)
+
+    last_id = events[-1].pk
+    if last_id and last_id // PRUNE_EVERY != (last_id - len(events)) // PRUNE_EVERY:
+        prune()
+
+
+def prune():
+    cutoff = timezone.now() - timedelta(seconds=get_retention())
+    return InventoryEvent.objects.filter(created_at__lt=cutoff).delete()[0]
+
+
+def format_event(data):
+    """One SSE message; the event id lets a reconnecting client resume"""
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f'id: {data["id"]}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """One client's filter and pending events.
+
+    With no ``bins`` and no ``zones`` every event matches. Otherwise an event
+    matches when the bin it touched (or the one a package left) is listed or
+    starts with one of the zone prefixes.
+    """
+
+    def __init__(self, bins=(), zones=(), queue_size=None):
+        self.bins = set(bins)
+        self.zones = tuple(zones)
+        self.queue = asyncio.Queue(queue_size or get_queue_size())
+        # Set when the client fell too far behind; it has to reload and resubscribe
+        self.overflowed = False
+
+    def matches(self, data):
+        if not self.bins and not self.zones:
+            return True
+        for bin_id in (data['bin_id'], data['previous_bin_id']):
+            if bin_id and (bin_id in self.bins or bin_id.startswith(self.zones)):
+                return True
+        return False
+
+    def deliver(self, data):
+        if self.overflowed or not self.matches(data):
+            return
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """Per-process fan-out of the event log to async subscribers.
+
+    One poller task per event loop reads new rows and hands them to every
+    subscriber, so the database sees one query per poll, not one per client.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.last_id = 0
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+
+    async def subscribe(self, subscription, after_id=None):
+        """Register ``subscription``; returns the stored events after ``after_id`` it missed"""
+        self._bind()
+        if self.task is None:
+            latest_id = await sync_to_async(self._latest_id)()
+            # Another subscriber may have started the poller while we waited
+            if self.task is None:
+                self.last_id = latest_id
+                self.task = self.loop.create_task(self._run())
+        self.subscribers.add(subscription)
+
+        if after_id is None or after_id >= self.last_id:
+            return []
+        # Events up to last_id were already fanned out; newer ones reach the queue
+        backlog = await sync_to_async(self._fetch)(after_id, self.last_id)
+        if len(backlog) == get_queue_size():
+            # Too far behind to replay everything: send what we have, then ask for a reload
+            subscription.overflowed = True
+        return [data for data in backlog if subscription.matches(data)]
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+        if not self.subscribers and self.wakeup is not None:
+            self.wakeup.set()
+
+    def wake(self):
+        """Poll now instead of at the next interval; safe to call from any thread"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            # First subscriber, or the previous loop is gone (e.g. one loop per test)
+            self.loop = loop
+            self.wakeup = asyncio.Event()
+            self.subscribers = set()
+            self.task = None
+
+    async def _run(self):
+        try:
+            while self.subscribers:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), get_poll_interval())
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                if not self.subscribers:
+                    break
+                batch = await sync_to_async(self._fetch)(self.last_id)
+                for data in batch:
+                    self.last_id = data['id']
+                    for subscription in list(self.subscribers):
+                        subscription.deliver(data)
+                if len(batch) == get_queue_size():
+                    # More rows are waiting: poll again straight away
+                    self.wakeup.set()
+        finally:
+            self.task = None
+
+    def _latest_id(self):
+        return InventoryEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _fetch(self, after_id, up_to=None):
+        events = InventoryEvent.objects.filter(id__gt=after_id)
+        if up_to is not None:
+            events = events.filter(id__lte=up_to)
+        return list(events.order_by('id').values(*EVENT_FIELDS)[:get_queue_size()])
+
+
+broker = EventBroker()
+
+
+async def stream(subscription, after_id=None):
+    """SSE body for one client: missed events, then live ones, with keep-alives"""
+    backlog = await broker.subscribe(subscription, after_id)
+    try:
+        yield f'retry: {int(get_poll_interval() * 1000)}\n\n'
+        for data in backlog:
+            yield format_event(data)
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                yield 'event: resync\ndata: {}\n\n'
+                return
+            try:
+                data = await asyncio.wait_for(subscription.queue.get(), get_heartbeat())
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(data)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,127 @@
+"""Query-parameter filtering helpers shared by the list endpoints"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Bin, Shipment
+
+# Upper bound used to turn a prefix match into an index-friendly range scan.
+# (SQLite's LIKE with Django's ESCAPE clause can't use an index.)
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+SHIPMENT_STATUSES = {value for value, label in Shipment.STATUS_CHOICES}
+BIN_STATUSES = {value for value, label in Bin.STATUS_CHOICES}
+
+# Range parameters on shipment timestamps: ``<field>_after`` is inclusive,
+# ``<field>_before`` exclusive
+SHIPMENT_DATE_RANGES = {
+    'time_in_after': 'time_in__gte',
+    'time_in_before': 'time_in__lt',
+    'time_out_after': 'time_out__gte',
+    'time_out_before': 'time_out__lt',
+}
+
+
+def prefix_filter(field, prefix):
+    """Lookups matching values of ``field`` that start with ``prefix``"""
+    return {
+        f'{field}__gte': prefix,
+        f'{field}__lt': prefix + PREFIX_UPPER_BOUND,
+    }
+
+
+def multi_value_param(params, name):
+    """Values of a repeatable, comma-separable parameter (``?status=a&status=b`` or ``?status=a,b``)"""
+    return [
+        value.strip()
+        for raw in params.getlist(name)
+        for value in raw.split(',')
+        if value.strip() and value.strip() != 'all'
+    ]
+
+
+def datetime_param(name, value):
+    """Parse an ISO 8601 date or datetime (dates mean midnight, naive values the current timezone)"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ['Expected an ISO 8601 date or datetime']})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def boolean_param(name, value):
+    lowered = value.strip().lower()
+    if lowered in ('1', 'true', 'yes'):
+        return True
+    if lowered in ('0', 'false', 'no'):
+        return False
+    raise ValidationError({name: ['Expected true or false']})
+
+
+def status_param(params, known):
+    """Validated values of the multi-value ``status`` parameter"""
+    statuses = multi_value_param(params, 'status')
+    unknown = sorted(set(statuses) - known)
+    if unknown:
+        raise ValidationError({'status': [f'Unknown status: {", ".join(unknown)}']})
+    return statuses
+
+
+def filter_bins(queryset, params):
+    """Apply the bin list filters; every one maps onto an index.
+
+    ``status`` (multi-value) and ``zone`` / ``search`` (bin ID prefix).
+    """
+    statuses = status_param(params, BIN_STATUSES)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+
+    prefix = (params.get('zone') or params.get('search') or '').strip().upper()
+    if prefix:
+        queryset = queryset.filter(**prefix_filter('bin_id', prefix))
+
+    return queryset
+
+
+def filter_shipments(queryset, params):
+    """Apply the shipment list filters; every one maps onto an index.
+
+    ``status`` (multi-value), ``bin`` (exact bin ID), ``zone`` (bin ID prefix),
+    ``manifested``, ``time_in_after`` / ``time_in_before`` /
+    ``time_out_after`` / ``time_out_before`` and ``search`` (tracking ID prefix).
+    """
+    statuses = status_param(params, SHIPMENT_STATUSES)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+
+    bin_id = params.get('bin', '').strip().upper()
+    if bin_id:
+        queryset = queryset.filter(bin_id=bin_id)
+
+    zone = params.get('zone', '').strip().upper()
+    if zone:
+        queryset = queryset.filter(**prefix_filter('bin_id', zone))
+
+    manifested = params.get('manifested', '')
+    if manifested.strip():
+        queryset = queryset.filter(manifested=boolean_param('manifested', manifested))
+
+    for name, lookup in SHIPMENT_DATE_RANGES.items():
+        value = params.get(name, '').strip()
+        if value:
+            queryset = queryset.filter(**{lookup: datetime_param(name, value)})
+
+    search = params.get('search', '').strip().upper()
+    if search:
+        queryset = queryset.filter(**prefix_filter('tracking_id', search))
+
+    return queryset
@@ -0,0 +1,284 @@
+"""DB-backed background job queue.
+
+Jobs are rows in ``inbound_job``. ``manage.py run_jobs`` workers claim them
+with a conditional UPDATE (``status='queued'`` -> ``'running'``), so a job runs
+once no matter how many worker processes poll the table.
+"""
+import csv
+import logging
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Bin, Job, Shipment
+from .readers import read_picklist_tracking_ids
+from .services import ingest_manifest_file, create_picklist, dispatch_bin
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+EXPORT_FIELDS = ['tracking_id', 'bin_id', 'status', 'manifested', 'time_in', 'time_out']
+
+
+def handler(kind):
+    """Register the function that runs jobs of ``kind``"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def get_job_file_dir():
+    path = Path(getattr(settings, 'INBOUND_JOB_FILE_DIR', settings.BASE_DIR / 'job_files'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def submit(kind, user, payload=None, uploaded_file=None):
+    """Queue a job, spooling any uploaded file to disk for the worker to read"""
+    payload = dict(payload or {})
+    input_file = None
+    if uploaded_file is not None:
+        extension = uploaded_file.name.rsplit('.', 1)[-1].lower()
+        path = get_job_file_dir() / f'{uuid.uuid4().hex}.{extension}'
+        with open(path, 'wb') as destination:
+            for chunk in uploaded_file.chunks():
+                destination.write(chunk)
+        input_file = str(path)
+        payload.setdefault('filename', uploaded_file.name)
+    return Job.objects.create(kind=kind, user=user, payload=payload, input_file=input_file)
+
+
+class JobProgress:
+    """Progress callback handed to job handlers; writes are throttled"""
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else getattr(
+            settings, 'INBOUND_JOB_PROGRESS_INTERVAL', 1.0
+        )
+        self.done = 0
+        self.total = None
+        self.last_write = 0.0
+
+    def __call__(self, done, total=None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if now - self.last_write < self.interval:
+            return
+        self.last_write = now
+        Job.objects.filter(pk=self.job.pk).update(
+            progress_done=self.done,
+            progress_total=self.total,
+            updated_at=timezone.now()
+        )
+
+
+class Heartbeat:
+    """Keeps a running job's ``updated_at`` fresh from a background thread.
+
+    ``requeue_stale`` takes a job without a recent write for a dead worker, so
+    the beat must not depend on the handler reporting progress (a dispatch is
+    one long transaction, a CSV parse reports nothing until it is done).
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval if interval is not None else getattr(
+            settings, 'INBOUND_JOB_HEARTBEAT_INTERVAL', 30.0
+        )
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f'job-{job.pk}-heartbeat', daemon=True)
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, status='running').update(updated_at=timezone.now())
+                except DatabaseError:
+                    # E.g. SQLite busy behind the handler's own transaction; the next beat retries
+                    logger.warning('Heartbeat of job %s failed', self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def claim_next(worker):
+    """Atomically take the oldest queued job, or return None if there is none"""
+    while True:
+        job_id = (
+            Job.objects.filter(status='queued')
+            .order_by('created_at')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running',
+            worker=worker,
+            started_at=now,
+            updated_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+        # Another worker won the race; try the next one
+
+
+def run_job(job):
+    """Run a claimed job and store its outcome"""
+    progress = JobProgress(job)
+    try:
+        with Heartbeat(job):
+            result = HANDLERS[job.kind](job, progress)
+    except Exception:
+        job_status, result, error = 'failed', None, traceback.format_exc()
+    else:
+        job_status, error = 'succeeded', None
+
+    if job.input_file:
+        Path(job.input_file).unlink(missing_ok=True)
+
+    now = timezone.now()
+    Job.objects.filter(pk=job.pk).update(
+        status=job_status,
+        result=result,
+        error=error,
+        progress_done=progress.done,
+        progress_total=progress.total,
+        finished_at=now,
+        updated_at=now
+    )
+
+
+def requeue_stale(stale_after, max_attempts=None):
+    """Hand jobs whose worker stopped heart-beating back to the queue"""
+    max_attempts = max_attempts or getattr(settings, 'INBOUND_JOB_MAX_ATTEMPTS', 3)
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', updated_at__lt=now - timedelta(seconds=stale_after))
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status='queued', worker=None, updated_at=now
+    )
+    stale.update(
+        status='failed', error='Worker stopped responding', finished_at=now, updated_at=now
+    )
+    return requeued
+
+
+def get_stale_after():
+    return getattr(settings, 'INBOUND_JOB_STALE_AFTER', 300)
+
+
+def work(worker, poll_interval=1.0, should_stop=lambda: False, once=False, stale_after=None):
+    """Worker loop: claim and run jobs until stopped (or the queue drains with ``once``).
+
+    Every ``stale_after / 2`` seconds the loop also requeues the jobs of dead
+    workers, so a crash is recovered from without restarting the workers.
+    """
+    stale_after = stale_after or get_stale_after()
+    last_requeue = None
+    while not should_stop():
+        close_old_connections()
+        if last_requeue is None or time.monotonic() - last_requeue >= stale_after / 2:
+            last_requeue = time.monotonic()
+            requeued = requeue_stale(stale_after)
+            if requeued:
+                logger.warning('%s requeued %d stale jobs', worker, requeued)
+        job = claim_next(worker)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+
+
+def _open_input(job):
+    return File(open(job.input_file, 'rb'), name=job.input_file)
+
+
+@handler('manifest')
+def run_manifest(job, progress):
+    with _open_input(job) as uploaded_file:
+        result = ingest_manifest_file(uploaded_file, job.user, progress=progress)
+    if not result['total_processed']:
+        raise ValueError('No tracking IDs found in file')
+    return {
+        'success': True,
+        'message': f"Processed {result['total_processed']} tracking IDs",
+        **result
+    }
+
+
+@handler('picklist')
+def run_picklist(job, progress):
+    with _open_input(job) as uploaded_file:
+        tracking_ids = read_picklist_tracking_ids(uploaded_file)
+    if not tracking_ids:
+        raise ValueError('No tracking IDs found in file')
+    progress(0, len(tracking_ids))
+    return {
+        'success': True,
+        **create_picklist(tracking_ids, job.user, progress=progress, wave_size=job.payload.get('wave_size'))
+    }
+
+
+@handler('dispatch')
+def run_dispatch(job, progress):
+    bin_obj = Bin.objects.get(bin_id=job.payload['bin_id'])
+    dispatched_ids = dispatch_bin(bin_obj, job.user)
+    if not dispatched_ids:
+        raise ValueError('No picked packages found in this bin')
+    progress(len(dispatched_ids), len(dispatched_ids))
+    return {
+        'success': True,
+        'message': f'Successfully dispatched {len(dispatched_ids)} packages from bin {bin_obj.bin_id}',
+        'dispatched_count': len(dispatched_ids),
+        'dispatched_ids': dispatched_ids,
+        'bin_status': bin_obj.status
+    }
+
+
+@handler('export')
+def run_export(job, progress):
+    """Write shipments (optionally filtered by ``status``) to a CSV file"""
+    shipments = Shipment.objects.all()
+    if job.payload.get('status'):
+        shipments = shipments.filter(status=job.payload['status'])
+
+    path = get_job_file_dir() / f'shipments-{job.pk}.csv'
+    total = shipments.count()
+    progress(0, total)
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        writer = csv.writer(output)
+        writer.writerow(EXPORT_FIELDS)
+        for row in shipments.values_list(*EXPORT_FIELDS).iterator(chunk_size=2000):
+            writer.writerow(row)
+            rows += 1
+            if rows % 1000 == 0:
+                progress(rows, total)
+    progress(rows, total)
+    return {'success': True, 'file': path.name, 'rows': rows}
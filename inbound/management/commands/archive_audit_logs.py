@@ -0,0 +1,68 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from inbound.archive import ARCHIVE_FIELDS, archive_rows, get_archive_dir
+from inbound.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = 'Moves audit log rows older than a cutoff into gzip NDJSON files, one per month'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Archive rows older than this many days'
+        )
+        parser.add_argument(
+            '--before',
+            help='Archive rows before this date (YYYY-MM-DD) instead of using --days'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows read, written and deleted per chunk'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report how many rows would be archived without moving them'
+        )
+
+    def handle(self, *args, **options):
+        if options['before']:
+            day = parse_date(options['before'])
+            if day is None:
+                raise CommandError('--before must be a date like 2025-01-31')
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+
+        old_rows = AuditLog.objects.filter(timestamp__lt=cutoff)
+        if options['dry_run']:
+            self.stdout.write(f'{old_rows.count()} audit rows before {cutoff:%Y-%m-%d %H:%M} would be archived')
+            return
+
+        # Walk the (timestamp, id) index in chunks so memory stays bounded
+        archived = 0
+        position = None
+        while True:
+            chunk = old_rows.order_by('timestamp', 'id')
+            if position is not None:
+                chunk = chunk.filter(timestamp__gte=position[0]).exclude(
+                    timestamp=position[0], id__lte=position[1]
+                )
+            rows = list(chunk.values(*ARCHIVE_FIELDS)[:options['batch_size']])
+            if not rows:
+                break
+
+            ids = archive_rows(rows)
+            with transaction.atomic():
+                AuditLog.objects.filter(id__in=ids).delete()
+            archived += len(ids)
+            position = (rows[-1]['timestamp'], rows[-1]['id'])
+            self.stdout.write(f'Archived {archived} rows (up to {position[0]:%Y-%m-%d})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {archived} audit rows before {cutoff:%Y-%m-%d %H:%M} to {get_archive_dir()}'
+        ))
@@ -0,0 +1,493 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.utils import timezone
+from inbound import audit, cache
+from inbound.models import Bin, Shipment, AuditLog
+from inbound.pagination import AuditLogCursorPagination, ShipmentCursorPagination
+from rest_framework.pagination import PageNumberPagination
+from inbound.services import adjust_bin_occupancy, apply_manifest, create_picklist, dispatch_bin
+
+
+def legacy_manifest(tracking_ids, user):
+    """Per-row manifest loop as process_manifest ran it before the bulk path"""
+    created_ids = []
+    updated_ids = []
+    for tracking_id in tracking_ids:
+        shipment, created = Shipment.objects.get_or_create(
+            tracking_id=tracking_id,
+            defaults={
+                'status': 'manifested',
+                'manifested': True,
+                'time_in': timezone.now()
+            }
+        )
+        if created:
+            AuditLog.objects.create(
+                action='updated',
+                shipment=shipment,
+                user=user,
+                details='Shipment created with manifested status via manifest upload'
+            )
+            created_ids.append(tracking_id)
+        else:
+            shipment.status = 'manifested'
+            shipment.manifested = True
+            shipment.save()
+            AuditLog.objects.create(
+                action='updated',
+                shipment=shipment,
+                user=user,
+                details='Status updated to manifested via manifest upload'
+            )
+            updated_ids.append(tracking_id)
+    return created_ids, updated_ids, []
+
+
+def legacy_picklist(tracking_ids, user):
+    """Per-row picklist loop as process_picklist_file ran it before the bulk path"""
+    processed_packages = []
+    not_found = []
+    for tracking_id in tracking_ids:
+        try:
+            shipment = Shipment.objects.select_related('bin').get(tracking_id=tracking_id)
+            if shipment.status == 'putaway':
+                shipment.status = 'picklist-created'
+                shipment.save()
+                AuditLog.objects.create(
+                    action='updated',
+                    shipment=shipment,
+                    user=user,
+                    details=f'Package {tracking_id} added to picklist'
+                )
+                processed_packages.append({
+                    'tracking_id': shipment.tracking_id,
+                    'bin_id': shipment.bin.bin_id if shipment.bin else None,
+                    'status': shipment.status
+                })
+            else:
+                not_found.append(f'{tracking_id} (status: {shipment.status})')
+        except Shipment.DoesNotExist:
+            not_found.append(tracking_id)
+    return processed_packages, not_found
+
+
+def legacy_dispatch(bin_obj, user):
+    """Per-row dispatch loop as dispatch_packages ran it before the set-based path"""
+    dispatched_ids = []
+    for shipment in Shipment.objects.filter(bin=bin_obj, status='picked'):
+        shipment.status = 'dispatched'
+        shipment.time_out = timezone.now()
+        shipment.bin = None
+        shipment.save()
+        AuditLog.objects.create(
+            action='dispatched',
+            shipment=shipment,
+            user=user,
+            details=f'Package {shipment.tracking_id} dispatched from bin {bin_obj.bin_id}'
+        )
+        dispatched_ids.append(shipment.tracking_id)
+    adjust_bin_occupancy(bin_obj.pk, -len(dispatched_ids))
+    return dispatched_ids
+
+
+class Command(BaseCommand):
+    help = 'Runs performance benchmarks against a throwaway test database'
+
+    scenarios = ['manifest', 'picklist', 'dispatch', 'pagination', 'scan', 'lookup', 'concurrency', 'serialization']
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=self.scenarios)
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Number of rows to run the scenario with'
+        )
+        parser.add_argument(
+            '--skip-legacy', action='store_true',
+            help='Only time the current implementation'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Concurrent clients (concurrency scenario)'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10.0,
+            help='Seconds of sustained traffic per run (concurrency scenario)'
+        )
+
+    def handle(self, *args, **options):
+        # Never touch the real database: run everything in a fresh test DB
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            runner = getattr(self, f"bench_{options['scenario']}")
+            for size in options['sizes']:
+                runner(size, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def report(self, scenario, size, results):
+        line = f'{scenario:<12} size={size:<8}'
+        for label, seconds in results:
+            line += f' {label}={seconds:.3f}s ({size / seconds:,.0f} rows/s)'
+        if len(results) == 2:
+            line += f' speedup={results[0][1] / results[1][1]:.1f}x'
+        self.stdout.write(line)
+
+    def timed(self, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+    def bench_manifest(self, size, options):
+        """Half of the IDs already exist, so both the insert and update paths run"""
+        implementations = [('bulk', apply_manifest)]
+        if not options['skip_legacy']:
+            implementations.insert(0, ('legacy', legacy_manifest))
+
+        results = []
+        for label, func in implementations:
+            tracking_ids = [f'BM-{label}-{size}-{n:08d}' for n in range(size)]
+            Shipment.objects.bulk_create(
+                [Shipment(tracking_id=tid, status='putaway') for tid in tracking_ids[::2]],
+                batch_size=500
+            )
+            results.append((label, self.timed(func, tracking_ids, 'benchmark')))
+        self.report('manifest', size, results)
+
+    def bench_picklist(self, size, options):
+        """Picklist of ``size`` IDs: 90% putaway shipments, 10% unknown"""
+        implementations = [('bulk', create_picklist)]
+        if not options['skip_legacy']:
+            implementations.insert(0, ('legacy', legacy_picklist))
+
+        results = []
+        for label, func in implementations:
+            bin_obj = Bin.objects.create(bin_id=f'BM-{label}-{size}', capacity=size)
+            tracking_ids = [f'BM-{label}-{size}-{n:08d}' for n in range(size)]
+            Shipment.objects.bulk_create(
+                [
+                    Shipment(tracking_id=tid, bin=bin_obj, status='putaway')
+                    for n, tid in enumerate(tracking_ids) if n % 10
+                ],
+                batch_size=500
+            )
+            results.append((label, self.timed(func, tracking_ids, 'benchmark')))
+        self.report('picklist', size, results)
+
+    def bench_dispatch(self, size, options):
+        """Dispatch of one bin holding ``size`` picked parcels"""
+        implementations = [('bulk', dispatch_bin)]
+        if not options['skip_legacy']:
+            implementations.insert(0, ('legacy', legacy_dispatch))
+
+        results = []
+        for label, func in implementations:
+            bin_obj = Bin.objects.create(
+                bin_id=f'BM-{label}-{size}', capacity=size, occupied_count=size, status='occupied'
+            )
+            Shipment.objects.bulk_create(
+                [Shipment(tracking_id=f'BM-{label}-{size}-{n:08d}', bin=bin_obj, status='picked') for n in range(size)],
+                batch_size=500
+            )
+            results.append((label, self.timed(func, bin_obj, 'benchmark')))
+        self.report('dispatch', size, results)
+
+    def bench_pagination(self, size, options):
+        """Latency of /api/shipments/ pages at increasing depth, page numbers vs cursors"""
+        now = timezone.now()
+        Shipment.objects.all().delete()
+        for start in range(0, size, 5000):
+            Shipment.objects.bulk_create([
+                Shipment(tracking_id=f'BM-PAGE-{n:08d}', time_in=now - timedelta(seconds=n))
+                for n in range(start, min(start + 5000, size))
+            ])
+
+        client = Client(HTTP_HOST='localhost')
+        paginator = ShipmentCursorPagination()
+        paginator.model = Shipment
+        paginator.base_url = '/api/shipments/'
+        page_size = paginator.page_size
+        last_page = max(1, -(-size // page_size))
+
+        for page in sorted({1, last_page // 2 or 1, last_page}):
+            results = []
+            if not options['skip_legacy']:
+                results.append(('page_number', self.timed_request(client, f'/api/shipments/?page={page}')))
+            # Cursor for the page: the key of the last row on the page before it
+            url = '/api/shipments/'
+            if page > 1:
+                row = Shipment.objects.order_by(*paginator.ordering)[(page - 1) * page_size - 1]
+                url = paginator._link(paginator._key(row), reverse=False)
+            results.append(('cursor', self.timed_request(client, url)))
+            self.stdout.write(
+                f'pagination   size={size:<8} page={page:<7}'
+                + ''.join(f' {label}={seconds * 1000:.1f}ms' for label, seconds in results)
+            )
+
+    def timed_request(self, client, url, repeat=5):
+        """Best of ``repeat`` GETs, in seconds"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200, response.status_code
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def bench_scan(self, size, options):
+        """Per-request latency of ``size`` assign + pickup scans, inline vs buffered audit writes"""
+        modes = ['buffered']
+        if not options['skip_legacy']:
+            modes.insert(0, 'sync')
+
+        client = Client(HTTP_HOST='localhost')
+        for mode in modes:
+            bin_id = f'BM-{mode.upper()}-{size}'
+            Bin.objects.create(bin_id=bin_id, capacity=size)
+            tracking_ids = [f'{bin_id}-{n:08d}' for n in range(size)]
+            latencies = {'assign': [], 'pickup_package': []}
+
+            with override_settings(INBOUND_AUDIT_MODE=mode):
+                for tracking_id in tracking_ids:
+                    latencies['assign'].append(self.timed_post(
+                        client, '/api/inbound/assign/', {'bin_id': bin_id, 'tracking_id': tracking_id}
+                    ))
+                for tracking_id in tracking_ids:
+                    latencies['pickup_package'].append(self.timed_post(
+                        client, '/api/outbound/pickup_package/',
+                        {'tracking_id': tracking_id, 'expected_tracking_id': tracking_id}
+                    ))
+                drain = self.timed(audit.sink.flush)
+
+            line = f'scan         size={size:<8} mode={mode:<9}'
+            for action, samples in latencies.items():
+                samples.sort()
+                mean = sum(samples) / len(samples)
+                p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+                line += f' {action}: mean={mean * 1000:.2f}ms p95={p95 * 1000:.2f}ms'
+            if mode == 'buffered':
+                line += f' final_flush={drain * 1000:.1f}ms'
+            self.stdout.write(line)
+
+            logged = AuditLog.objects.filter(shipment_id__in=tracking_ids).count()
+            assert logged == 2 * size, f'{logged} audit rows for {2 * size} scans'
+
+    def timed_post(self, client, url, data):
+        start = time.perf_counter()
+        response = client.post(url, data, content_type='application/json')
+        elapsed = time.perf_counter() - start
+        assert response.status_code < 300, (url, response.status_code, response.content)
+        return elapsed
+
+    def bench_lookup(self, size, options):
+        """search_package / search_bin latency over ``size`` shipments, uncached vs cached"""
+        prefix = f'LK{size}-'
+        bin_count = max(1, size // 20)
+        Bin.objects.bulk_create(
+            [Bin(bin_id=f'{prefix}{n:06d}', capacity=20, occupied_count=20) for n in range(bin_count)],
+            batch_size=1000
+        )
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id=f'{prefix}P{n:09d}', status='putaway', bin_id=f'{prefix}{n % bin_count:06d}')
+            for n in range(size)
+        ], batch_size=1000)
+
+        # Pickers keep coming back to the same aisles: 2000 lookups over a hot set of 100 bins
+        rng = random.Random(size)
+        hot_bins = rng.sample(range(bin_count), min(bin_count, 100))
+        lookups = []
+        for _ in range(1000):
+            bin_n = rng.choice(hot_bins)
+            tracking_n = bin_n + bin_count * rng.randrange(max(1, (size - bin_n) // bin_count))
+            lookups.append(('/api/outbound/search_bin/', {'bin_id': f'{prefix}{bin_n:06d}'}))
+            lookups.append(('/api/outbound/search_package/', {'tracking_id': f'{prefix}P{tracking_n:09d}'}))
+
+        modes = [True]
+        if not options['skip_legacy']:
+            modes.insert(0, False)
+
+        client = Client(HTTP_HOST='localhost')
+        for enabled in modes:
+            cache.lookup_cache.clear()
+            with override_settings(INBOUND_CACHE_ENABLED=enabled):
+                samples = sorted(self.timed_post(client, url, data) for url, data in lookups)
+            mean = sum(samples) / len(samples)
+            p95 = samples[int(len(samples) * 0.95)]
+            line = (
+                f'lookup       size={size:<8} cache={"on" if enabled else "off":<4}'
+                f' mean={mean * 1000:.2f}ms p95={p95 * 1000:.2f}ms'
+            )
+            if enabled:
+                stats = cache.lookup_cache.stats()
+                line += f' hit_rate={stats["hit_rate"]}'
+            self.stdout.write(line)
+
+    def bench_serialization(self, size, options):
+        """Rows/s of ``size``-row list responses: serializers + JSONRenderer vs values() rows + orjson"""
+        prefix = f'SR{size}-'
+        bin_count = max(1, size // 10)
+        now = timezone.now()
+        bins = Bin.objects.bulk_create(
+            [Bin(bin_id=f'{prefix}{n:06d}', location='Benchmark', capacity=10) for n in range(size)],
+            batch_size=1000
+        )
+        shipments = Shipment.objects.bulk_create([
+            Shipment(
+                tracking_id=f'{prefix}P{n:09d}', status='putaway', bin=bins[n % bin_count],
+                time_in=now - timedelta(seconds=n)
+            )
+            for n in range(size)
+        ], batch_size=1000)
+        AuditLog.objects.bulk_create(
+            [AuditLog(action='assigned', shipment=s, user='benchmark', details='Benchmark row') for s in shipments],
+            batch_size=1000
+        )
+        endpoints = [
+            ('shipments', f'/api/shipments/?search={prefix}'),
+            ('bins', '/api/bins/?page=1'),
+            ('audit_logs', '/api/audit-logs/'),
+        ]
+        modes = [('values', True, False), ('values+orjson', True, True)]
+        if not options['skip_legacy']:
+            modes.insert(0, ('serializer', False, False))
+
+        client = Client(HTTP_HOST='localhost')
+        # One page holding every row
+        with mock.patch.object(ShipmentCursorPagination, 'page_size', size), \
+                mock.patch.object(AuditLogCursorPagination, 'page_size', size), \
+                mock.patch.object(PageNumberPagination, 'page_size', size):
+            for name, url in endpoints:
+                results = []
+                for label, fast_reads, use_orjson in modes:
+                    with override_settings(INBOUND_FAST_READS=fast_reads, INBOUND_ORJSON=use_orjson):
+                        results.append((label, self.timed_request(client, url, repeat=3)))
+                line = f'serialization size={size:<8} {name:<10}'
+                for label, seconds in results:
+                    line += f' {label}={seconds * 1000:.0f}ms ({size / seconds:,.0f} rows/s)'
+                if len(results) == 3:
+                    line += f' speedup={results[0][1] / results[-1][1]:.1f}x'
+                self.stdout.write(line)
+
+        AuditLog.objects.filter(user='benchmark').delete()
+        Shipment.objects.filter(tracking_id__startswith=prefix).delete()
+        Bin.objects.filter(bin_id__startswith=prefix).delete()
+
+    def bench_concurrency(self, size, options):
+        """Sustained mixed traffic over ``size`` bins, bare SQLite vs the tuned connection settings.
+
+        Half the workers scan (assign, pickup, dissociate: read-then-write
+        transactions), half poll like dashboards (bin list, bin lookup,
+        summary). Each worker is a thread with its own connection, which
+        contends for SQLite's locks the way separate gunicorn workers do.
+        """
+        prefix = f'CC{size}-'
+        # (IDs are upper case: the scan endpoints normalize what they look up)
+        Bin.objects.bulk_create(
+            [Bin(bin_id=f'{prefix}{n:06d}', capacity=10 ** 6) for n in range(size)],
+            batch_size=1000
+        )
+        bin_ids = [f'{prefix}{n:06d}' for n in range(size)]
+
+        tuned = connection.settings_dict['OPTIONS']
+        modes = [('tuned', tuned)]
+        if not options['skip_legacy']:
+            # Django's defaults: rollback journal, deferred transactions, 5s busy wait
+            modes.insert(0, ('bare', {}))
+
+        # Failed requests are counted below; don't print a traceback for each
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        for label, db_options in modes:
+            connections.close_all()
+            connection.settings_dict['OPTIONS'] = db_options
+            try:
+                if label == 'bare':
+                    # The journal mode is stored in the file: switch back once, before the workers start
+                    with connection.cursor() as cursor:
+                        cursor.execute('PRAGMA journal_mode=DELETE')
+                else:
+                    connection.ensure_connection()
+                latencies, errors, elapsed = self.run_mixed_traffic(f'{prefix}{label.upper()}', bin_ids, options)
+            finally:
+                connection.settings_dict['OPTIONS'] = tuned
+                connections.close_all()
+
+            line = f'concurrency  size={size:<8} sqlite={label:<6} workers={options["workers"]}'
+            for kind, samples in latencies.items():
+                samples.sort()
+                p95 = samples[int(len(samples) * 0.95)] if samples else 0
+                line += f' {kind}={len(samples) / elapsed:,.0f}/s (p95 {p95 * 1000:.1f}ms)'
+            line += f' errors={sum(errors.values())}'
+            self.stdout.write(line)
+            for message, count in errors.most_common():
+                self.stdout.write(f'    {count} x {message}')
+        request_logger.setLevel(log_level)
+
+    def run_mixed_traffic(self, tag, bin_ids, options):
+        latencies = {'writes': [], 'reads': []}
+        errors = Counter()
+        lock = threading.Lock()
+        deadline = []
+        start = threading.Barrier(
+            options['workers'], action=lambda: deadline.append(time.perf_counter() + options['duration'])
+        )
+
+        def call(client, kind, method, url, data=None):
+            began = time.perf_counter()
+            try:
+                if method == 'post':
+                    response = client.post(url, data, content_type='application/json')
+                else:
+                    response = client.get(url)
+                failure = None if response.status_code < 300 else f'HTTP {response.status_code} from {url.split("?")[0]}'
+            except Exception as exc:
+                failure = f'{type(exc).__name__}: {exc}'
+            elapsed = time.perf_counter() - began
+            with lock:
+                if failure:
+                    errors[failure] += 1
+                else:
+                    latencies[kind].append(elapsed)
+
+        def worker(index):
+            client = Client(HTTP_HOST='localhost')
+            rng = random.Random(index)
+            start.wait()
+            try:
+                n = 0
+                while time.perf_counter() < deadline[0]:
+                    bin_id = rng.choice(bin_ids)
+                    if index % 2:
+                        tracking_id = f'{tag}-{index:03d}-{n:07d}'
+                        call(client, 'writes', 'post', '/api/inbound/assign/',
+                             {'bin_id': bin_id, 'tracking_id': tracking_id})
+                        call(client, 'writes', 'post', '/api/outbound/pickup_package/',
+                             {'tracking_id': tracking_id, 'expected_tracking_id': tracking_id})
+                        call(client, 'writes', 'post', '/api/outbound/dissociate/',
+                             {'tracking_id': tracking_id, 'bin_id': bin_id})
+                    else:
+                        call(client, 'reads', 'get', '/api/bins/')
+                        call(client, 'reads', 'get', f'/api/outbound/search_bin/?bin_id={bin_id}')
+                        call(client, 'reads', 'get', '/api/inventory/summary/')
+                    n += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['workers'])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors, time.perf_counter() - began
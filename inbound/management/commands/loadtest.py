@@ -0,0 +1,349 @@
+"""Load simulation: concurrent operators driving the real inbound/outbound workflow.
+
+Each simulated operator owns one bin and repeats a warehouse cycle with it:
+upload a manifest, scan the bin and assign every package to it, send half of
+the packages through a picklist (dispatched one by one) and pick up the rest
+(dispatched with the bin). Requests go through Django's test client against a
+throwaway database, or over HTTP to a running server with ``--url``. The
+report (throughput and latency percentiles per endpoint) is JSON, so runs of
+different builds can be diffed.
+"""
+import json
+import math
+import multiprocessing
+import platform
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from inbound import audit
+
+
+class ClientTransport:
+    """In-process requests through Django's test client"""
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, data=None, files=None):
+        if method == 'get':
+            response = self.client.get(path)
+        elif files:
+            payload = dict(data or {})
+            for name, (filename, content) in files.items():
+                payload[name] = SimpleUploadedFile(filename, content)
+            response = self.client.post(path, payload)
+        else:
+            response = self.client.post(path, data or {}, content_type='application/json')
+        return response.status_code, response.content
+
+    def close(self):
+        connections.close_all()
+
+
+def encode_multipart(fields, files):
+    """``(body, content_type)`` of a multipart/form-data request"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts += [
+            f'--{boundary}'.encode(),
+            f'Content-Disposition: form-data; name="{name}"'.encode(),
+            b'',
+            str(value).encode()
+        ]
+    for name, (filename, content) in files.items():
+        parts += [
+            f'--{boundary}'.encode(),
+            f'Content-Disposition: form-data; name="{name}"; filename="{filename}"'.encode(),
+            b'Content-Type: application/octet-stream',
+            b'',
+            content
+        ]
+    parts += [f'--{boundary}--'.encode(), b'']
+    return b'\r\n'.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class HTTPTransport:
+    """Requests over one keep-alive connection to a running server"""
+
+    def __init__(self, base_url, timeout=30.0):
+        parts = urlsplit(base_url)
+        connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+
+    def request(self, method, path, data=None, files=None):
+        headers = {}
+        body = None
+        if files:
+            body, headers['Content-Type'] = encode_multipart(data or {}, files)
+        elif method != 'get':
+            body = json.dumps(data or {}).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method.upper(), self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (OSError, HTTPException):
+            # Reconnects on the next request
+            self.connection.close()
+            raise
+
+    def close(self):
+        self.connection.close()
+
+
+def make_transport(url):
+    return HTTPTransport(url) if url else ClientTransport()
+
+
+class Operator:
+    """One simulated floor operator and the timings of its requests"""
+
+    def __init__(self, transport, prefix, batch):
+        self.transport = transport
+        self.prefix = prefix
+        self.bin_id = f'{prefix}-BIN'
+        self.batch = batch
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.cycles = 0
+
+    def call(self, name, method, path, data=None, files=None, expect=200):
+        """Send one request; True when it answered ``expect``"""
+        began = time.perf_counter()
+        try:
+            status_code, _ = self.transport.request(method, path, data, files)
+        except Exception as exc:
+            self.errors[name][f'{type(exc).__name__}: {exc}'] += 1
+            return False
+        elapsed = time.perf_counter() - began
+        if status_code != expect:
+            self.errors[name][f'HTTP {status_code}'] += 1
+            return False
+        self.latencies[name].append(elapsed)
+        return True
+
+    def setup(self):
+        """Create the operator's bin (not timed)"""
+        status_code, content = self.transport.request('post', '/api/bins/', {
+            'bin_id': self.bin_id,
+            'location': 'Load test',
+            'capacity': self.batch
+        })
+        if status_code != 201:
+            raise CommandError(f'Could not create bin {self.bin_id}: HTTP {status_code} {content[:200]!r}')
+
+    def cycle(self):
+        tracking_ids = [f'{self.prefix}-{self.cycles:06d}-{n:03d}' for n in range(self.batch)]
+        csv_file = ('Tracking Id\n' + '\n'.join(tracking_ids) + '\n').encode()
+        picklist_ids, pickup_ids = tracking_ids[:self.batch // 2], tracking_ids[self.batch // 2:]
+
+        self.call('upload_manifest', 'post', '/api/inbound/upload_manifest/',
+                  files={'file': ('manifest.csv', csv_file)})
+        self.call('scan_bin', 'post', '/api/inbound/scan_bin/', {'bin_id': self.bin_id})
+        for tracking_id in tracking_ids:
+            self.call('assign', 'post', '/api/inbound/assign/',
+                      {'bin_id': self.bin_id, 'tracking_id': tracking_id}, expect=201)
+
+        if picklist_ids:
+            picklist = ('Tracking Id\n' + '\n'.join(picklist_ids) + '\n').encode()
+            self.call('process_picklist_file', 'post', '/api/outbound/process_picklist_file/',
+                      files={'file': ('picklist.csv', picklist)})
+            for tracking_id in picklist_ids:
+                self.call('dispatch_single_package', 'post', '/api/outbound/dispatch_single_package/',
+                          {'tracking_id': tracking_id})
+
+        for tracking_id in pickup_ids:
+            self.call('pickup_package', 'post', '/api/outbound/pickup_package/',
+                      {'tracking_id': tracking_id, 'expected_tracking_id': tracking_id})
+        if pickup_ids:
+            self.call('dispatch_packages', 'post', '/api/outbound/dispatch_packages/',
+                      {'bin_id': self.bin_id, 'expected_bin_id': self.bin_id})
+        self.cycles += 1
+
+    def run(self, deadline, cycles=None):
+        while (self.cycles < cycles) if cycles else (time.time() < deadline):
+            self.cycle()
+
+    def results(self):
+        return {
+            'cycles': self.cycles,
+            'latencies': dict(self.latencies),
+            'errors': {name: dict(counts) for name, counts in self.errors.items()}
+        }
+
+
+def run_operator(url, prefix, batch, deadline, cycles):
+    """Set up and run one operator; returns its results"""
+    transport = make_transport(url)
+    try:
+        operator = Operator(transport, prefix, batch)
+        operator.setup()
+        operator.run(deadline, cycles)
+        return operator.results()
+    finally:
+        transport.close()
+        if not url:
+            # Pool processes exit without running atexit handlers
+            audit.sink.flush()
+
+
+def reset_process_state():
+    """Fresh audit sink in a forked worker: the parent's flusher thread isn't copied"""
+    audit.sink = audit.BufferedAuditSink()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+def summarize(results, elapsed):
+    """Merge the operators' results into the report's totals and per-endpoint stats"""
+    latencies = defaultdict(list)
+    errors = defaultdict(Counter)
+    for result in results:
+        for name, samples in result['latencies'].items():
+            latencies[name].extend(samples)
+        for name, counts in result['errors'].items():
+            errors[name].update(counts)
+
+    endpoints = {}
+    for name in sorted(set(latencies) | set(errors)):
+        samples = sorted(latencies[name])
+        stats = {
+            'requests': len(samples),
+            'errors': sum(errors[name].values()),
+            'throughput_per_s': round(len(samples) / elapsed, 2),
+        }
+        if samples:
+            stats.update({
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+                'p50_ms': round(percentile(samples, 50) * 1000, 3),
+                'p95_ms': round(percentile(samples, 95) * 1000, 3),
+                'p99_ms': round(percentile(samples, 99) * 1000, 3),
+                'max_ms': round(samples[-1] * 1000, 3),
+            })
+        if errors[name]:
+            stats['error_messages'] = dict(errors[name].most_common())
+        endpoints[name] = stats
+
+    requests = sum(stats['requests'] for stats in endpoints.values())
+    return {
+        'cycles': sum(result['cycles'] for result in results),
+        'requests': requests,
+        'errors': sum(stats['errors'] for stats in endpoints.values()),
+        'requests_per_s': round(requests / elapsed, 2),
+        'scans_per_s': round(len(latencies['assign']) / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Simulates concurrent operators running the inbound/outbound workflow and reports latency as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server (e.g. http://localhost:8000); '
+                 'default: in-process test client against a throwaway test database'
+        )
+        parser.add_argument('--operators', type=int, default=8, help='Concurrent simulated operators')
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Run each operator in its own process instead of a thread'
+        )
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run for')
+        parser.add_argument(
+            '--cycles', type=int,
+            help='Run exactly this many cycles per operator instead of for --duration'
+        )
+        parser.add_argument('--batch', type=int, default=10, help='Packages per manifest / cycle')
+        parser.add_argument('--label', default='', help='Free-form build label copied into the report')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['operators'] < 1 or options['batch'] < 1:
+            raise CommandError('--operators and --batch must be at least 1')
+        url = options['url']
+        if url and urlsplit(url).scheme not in ('http', 'https'):
+            raise CommandError(f'--url must be an http(s) URL, got {url!r}')
+        if options['processes'] and 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('--processes needs the "fork" start method; use threads on this platform')
+
+        if url:
+            report = self.run_load(options)
+        else:
+            # Never touch the real database: run everything in a fresh test DB
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                # The test client's host name, whatever DEBUG is
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    report = self.run_load(options)
+            finally:
+                audit.sink.flush()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def run_load(self, options):
+        url = options['url']
+        run_id = uuid.uuid4().hex[:6].upper()
+        deadline = time.time() + options['duration']
+        args = [
+            (url, f'LT{run_id}-{index:03d}', options['batch'], deadline, options['cycles'])
+            for index in range(options['operators'])
+        ]
+
+        began = time.perf_counter()
+        if options['processes']:
+            # Forked workers open their own database connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(len(args), initializer=reset_process_state) as pool:
+                results = pool.starmap(run_operator, args)
+        else:
+            results = [None] * len(args)
+
+            def worker(index):
+                results[index] = run_operator(*args[index])
+
+            threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(args))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if None in results:
+                raise CommandError('An operator failed to start; see the traceback above')
+        elapsed = time.perf_counter() - began
+
+        return {
+            'label': options['label'],
+            'target': url or 'test-client',
+            'database': None if url else connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'operators': options['operators'],
+            'concurrency': 'processes' if options['processes'] else 'threads',
+            'batch': options['batch'],
+            'duration_s': round(elapsed, 3),
+            **summarize(results, elapsed),
+        }
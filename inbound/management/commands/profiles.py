@@ -0,0 +1,97 @@
+import os
+import pstats
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from inbound.profiling import get_profile_dir, stored_profiles
+
+
+# Sort key -> column of the per-function totals below
+SORT_COLUMNS = {'calls': 0, 'tottime': 1, 'cumtime': 2}
+
+
+def function_label(key):
+    filename, lineno, name = key
+    if filename == '~':
+        # Built-ins, e.g. "<method 'execute' of 'sqlite3.Cursor' objects>"; drop
+        # the object address some carry so they add up across processes
+        return re.sub(r' at 0x[0-9a-f]+', '', name)
+    if f'site-packages{os.sep}' in filename:
+        filename = filename.split(f'site-packages{os.sep}', 1)[1]
+    elif filename.startswith(f'{settings.BASE_DIR}{os.sep}'):
+        filename = os.path.relpath(filename, settings.BASE_DIR)
+    return f'{filename}:{lineno}({name})'
+
+
+class Command(BaseCommand):
+    help = 'Lists stored request profiles and the hottest functions across them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Profile directory (default: INBOUND_PROFILE_DIR)')
+        parser.add_argument(
+            '--route',
+            help='Only profiles of this URL name, e.g. inbound-process-process-manifest'
+        )
+        parser.add_argument('--last', type=int, help='Only the newest N profiles')
+        parser.add_argument('--top', type=int, default=20, help='Functions to show')
+        parser.add_argument(
+            '--sort', choices=sorted(SORT_COLUMNS), default='tottime',
+            help='tottime: time in the function itself; cumtime: including what it calls'
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir']) if options['dir'] else get_profile_dir()
+        if not directory.is_dir():
+            raise CommandError(f'No profile directory at {directory}')
+
+        profiles = stored_profiles(directory)
+        if options['route']:
+            profiles = [profile for profile in profiles if profile['route'] == options['route']]
+        if options['last']:
+            profiles = profiles[-options['last']:]
+        if not profiles:
+            self.stdout.write(f'No stored profiles in {directory}')
+            return
+
+        self.stdout.write(f'{len(profiles)} profiles in {directory}')
+        self.stdout.write(f'{"id":<60} {"status":>6} {"ms":>9} {"sql":>5} {"sql ms":>9} {"peak KiB":>9}')
+        for profile in profiles:
+            self.stdout.write(
+                f'{profile["id"]:<60} {profile["status"]:>6} {profile["duration_ms"]:>9.1f} '
+                f'{profile["sql"]["count"]:>5} {profile["sql"]["time_ms"]:>9.1f} '
+                f'{profile["memory"]["peak_kb"]:>9.1f}'
+            )
+
+        # [calls, tottime, cumtime, profiles containing it] per function
+        totals = defaultdict(lambda: [0, 0.0, 0.0, 0])
+        loaded = 0
+        for profile in profiles:
+            try:
+                stats = pstats.Stats(str(profile['stats_path']))
+            except (OSError, EOFError, ValueError, TypeError):
+                self.stderr.write(f'Skipping unreadable {profile["stats_path"]}')
+                continue
+            loaded += 1
+            seen = set()
+            for key, (primitive_calls, calls, tottime, cumtime, callers) in stats.stats.items():
+                if '_lsprof.Profiler' in key[2]:
+                    continue
+                label = function_label(key)
+                entry = totals[label]
+                entry[0] += calls
+                entry[1] += tottime
+                entry[2] += cumtime
+                if label not in seen:
+                    seen.add(label)
+                    entry[3] += 1
+
+        column = SORT_COLUMNS[options['sort']]
+        hottest = sorted(totals.items(), key=lambda item: item[1][column], reverse=True)
+        self.stdout.write('')
+        self.stdout.write(f'Top {options["top"]} functions by {options["sort"]} across {loaded} profiles')
+        self.stdout.write(f'{"calls":>10} {"tottime s":>10} {"cumtime s":>10} {"profiles":>8}  function')
+        for label, (calls, tottime, cumtime, profile_count) in hottest[:options['top']]:
+            self.stdout.write(f'{calls:>10} {tottime:>10.4f} {cumtime:>10.4f} {profile_count:>8}  {label}')
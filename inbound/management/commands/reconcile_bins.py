@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from inbound import cache, events
+from inbound.models import Bin, Shipment
+
+
+class Command(BaseCommand):
+    help = 'Recomputes bin occupancy counters from shipments and repairs any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted bins without changing them'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Bins updated per bulk statement'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # One grouped query for the true occupancy of every bin
+            actual_counts = dict(
+                Shipment.objects.filter(bin__isnull=False)
+                .order_by()
+                .values('bin')
+                .annotate(count=Count('pk'))
+                .values_list('bin', 'count')
+            )
+
+            drifted = []
+            for bin_obj in Bin.objects.only('bin_id', 'capacity', 'occupied_count', 'status').iterator():
+                actual = actual_counts.get(bin_obj.bin_id, 0)
+                expected_status = bin_obj.status
+                if bin_obj.status != 'maintenance':
+                    expected_status = 'occupied' if actual >= bin_obj.capacity else 'available'
+
+                if bin_obj.occupied_count == actual and bin_obj.status == expected_status:
+                    continue
+
+                self.stdout.write(self.style.WARNING(
+                    f'{bin_obj.bin_id}: occupied_count {bin_obj.occupied_count} -> {actual}, '
+                    f'status {bin_obj.status} -> {expected_status}'
+                ))
+                bin_obj.occupied_count = actual
+                bin_obj.status = expected_status
+                drifted.append(bin_obj)
+
+            if drifted and not options['dry_run']:
+                Bin.objects.bulk_update(
+                    drifted, ['occupied_count', 'status'], batch_size=options['batch_size']
+                )
+                cache.invalidate(bins=[bin_obj.bin_id for bin_obj in drifted])
+                events.emit(*(
+                    events.event('bin-updated', status=bin_obj.status, bin_id=bin_obj.bin_id)
+                    for bin_obj in drifted
+                ))
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All bin counters are consistent'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} bins have drifted (dry run, nothing changed)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} bins'))
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import signal
+import socket
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def worker_process(index, poll_interval, once, stale_after):
+    """Entry point of each worker process (safe under both fork and spawn)"""
+    django.setup()
+    from inbound.jobs import work
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    work(
+        f'{socket.gethostname()}:{os.getpid()}:{index}',
+        poll_interval=poll_interval,
+        should_stop=lambda: bool(stopping),
+        once=once,
+        stale_after=stale_after
+    )
+
+
+class Command(BaseCommand):
+    help = 'Runs background job workers for manifest, picklist, dispatch and export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker processes to run'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=None,
+            help='Requeue running jobs without a heartbeat for this many seconds '
+                 '(default INBOUND_JOB_STALE_AFTER); checked every half of it'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of polling forever'
+        )
+
+    def handle(self, *args, **options):
+        from inbound.jobs import get_stale_after, requeue_stale
+
+        stale_after = options['stale_after'] or get_stale_after()
+        requeued = requeue_stale(stale_after)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs'))
+
+        if options['workers'] <= 1:
+            self.stdout.write(self.style.SUCCESS('Starting 1 job worker'))
+            worker_process(0, options['poll_interval'], options['once'], stale_after)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=worker_process,
+                args=(index, options['poll_interval'], options['once'], stale_after)
+            )
+            for index in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {options['workers']} job workers"))
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
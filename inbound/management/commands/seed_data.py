@@ -1,37 +1,278 @@
-from django.core.management.base import BaseCommand
-from inbound.models import Bin
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from inbound import cache
+from inbound.models import AuditLog, Bin, Shipment
+
+
+SAMPLE_BINS = [
+    # L1R1B01 format (Level 1, Row 1, Bin 1)
+    {'bin_id': 'L1R1B01', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R1B02', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R1B03', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R2B01', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R2B02', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R2B03', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R3B01', 'location': 'Level 1 - Row 3', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L1R3B02', 'location': 'Level 1 - Row 3', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L2R1B01', 'location': 'Level 2 - Row 1', 'capacity': 10, 'status': 'available'},
+    {'bin_id': 'L2R1B02', 'location': 'Level 2 - Row 1', 'capacity': 10, 'status': 'available'},
+]
+
+# Shipments in these statuses sit in a bin; the others have none
+IN_BIN_STATUSES = {'putaway', 'picklist-created', 'picked'}
+# ...and these have left the warehouse (time_out set)
+OUT_STATUSES = {'dispatched', 'delivered'}
+
+SEED_USERS = ['operator1', 'operator2', 'operator3', 'operator4', 'supervisor', 'anonymous']
+
+# Longest a shipment spends between its first and last audit entry
+MAX_DWELL = timedelta(hours=72)
+
+# Options that switch from the sample bins to generated data
+GENERATOR_OPTIONS = ('levels', 'rows', 'bins', 'status')
+
+
+def parse_status_count(value):
+    status, _, count = value.partition('=')
+    if status not in dict(Shipment.STATUS_CHOICES):
+        raise CommandError(f'Unknown shipment status {status!r} in --status {value}')
+    try:
+        return status, int(count)
+    except ValueError:
+        raise CommandError(f'--status takes STATUS=COUNT, got {value!r}')
+
+
+def insert_rows(model, fields, rows):
+    """Plain multi-row INSERT (``executemany``) of ``rows``, tuples in ``fields`` order.
+
+    Several times faster than ``bulk_create`` for millions of rows: no model
+    instances, and no per-statement parameter cap.
+    """
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})',
+            rows
+        )
+
+
+def datetime_adapter():
+    """Database value for a naive UTC datetime.
+
+    SQLite (with ``USE_TZ``) stores ``str()`` of the naive UTC value; calling
+    that directly is several times cheaper than ``adapt_datetimefield_value``.
+    """
+    if connection.vendor == 'sqlite' and settings.USE_TZ:
+        return str
+    adapt = connection.ops.adapt_datetimefield_value
+    return lambda value: adapt(value.replace(tzinfo=dt_timezone.utc) if settings.USE_TZ else value)
 
 
 class Command(BaseCommand):
-    help = 'Seeds the database with sample bins'
-
-    def handle(self, *args, **kwargs):
-        # Create sample bins - L1R1B01 format (Level 1, Row 1, Bin 1)
-        bins_data = [
-            {'bin_id': 'L1R1B01', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R1B02', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R1B03', 'location': 'Level 1 - Row 1', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R2B01', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R2B02', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R2B03', 'location': 'Level 1 - Row 2', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R3B01', 'location': 'Level 1 - Row 3', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L1R3B02', 'location': 'Level 1 - Row 3', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L2R1B01', 'location': 'Level 2 - Row 1', 'capacity': 10, 'status': 'available'},
-            {'bin_id': 'L2R1B02', 'location': 'Level 2 - Row 1', 'capacity': 10, 'status': 'available'},
-        ]
-        
-        for bin_data in bins_data:
-            bin_obj, created = Bin.objects.get_or_create(
-                bin_id=bin_data['bin_id'],
-                defaults={
-                    'location': bin_data['location'],
-                    'capacity': bin_data['capacity'],
-                    'status': bin_data['status']
-                }
-            )
-            if created:
-                self.stdout.write(self.style.SUCCESS(f'Created bin: {bin_obj.bin_id}'))
+    help = 'Seeds the database with sample bins, or generates a large synthetic warehouse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--levels', type=int, help='Generate bins: warehouse levels (default 4)')
+        parser.add_argument('--rows', type=int, help='Rows per level (default 10)')
+        parser.add_argument('--bins', type=int, help='Bins per row (default 25)')
+        parser.add_argument('--capacity', type=int, default=50, help='Capacity of each generated bin')
+        parser.add_argument(
+            '--status', action='append', default=[], metavar='STATUS=COUNT',
+            help='Shipments to generate in a status, e.g. --status dispatched=4000000 (repeatable)'
+        )
+        parser.add_argument(
+            '--history', type=int, default=3,
+            help='Audit log rows per generated shipment'
+        )
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Spread shipment arrival times over this many days'
+        )
+        parser.add_argument(
+            '--end',
+            help='Last day of the spread (YYYY-MM-DD, default today); fix it for identical data across runs'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--prefix', default='SEED', help='Tracking ID prefix of generated shipments')
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Shipments (with their audit rows) written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if any(options[name] for name in GENERATOR_OPTIONS):
+            self.generate(options)
+        else:
+            self.seed_sample_bins()
+
+    def seed_sample_bins(self):
+        existing = set(
+            Bin.objects.filter(bin_id__in=[bin_data['bin_id'] for bin_data in SAMPLE_BINS])
+            .values_list('bin_id', flat=True)
+        )
+        new_bins = [Bin(**bin_data) for bin_data in SAMPLE_BINS if bin_data['bin_id'] not in existing]
+        with transaction.atomic():
+            Bin.objects.bulk_create(new_bins)
+            cache.invalidate(bins=[bin_obj.bin_id for bin_obj in new_bins])
+
+        for bin_data in SAMPLE_BINS:
+            if bin_data['bin_id'] in existing:
+                self.stdout.write(self.style.WARNING(f'Bin already exists: {bin_data["bin_id"]}'))
             else:
-                self.stdout.write(self.style.WARNING(f'Bin already exists: {bin_obj.bin_id}'))
-        
+                self.stdout.write(self.style.SUCCESS(f'Created bin: {bin_data["bin_id"]}'))
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
+
+    def generate(self, options):
+        levels = options['levels'] or 4
+        rows = options['rows'] or 10
+        bins_per_row = options['bins'] or 25
+        status_counts = dict(parse_status_count(value) for value in options['status'])
+        if min([levels, rows, bins_per_row, options['capacity'], options['batch_size']]) < 1:
+            raise CommandError('--levels, --rows, --bins, --capacity and --batch-size must be at least 1')
+        if options['history'] < 0 or options['days'] < 1:
+            raise CommandError('--history must be 0 or more and --days at least 1')
+
+        if options['end']:
+            end_day = parse_date(options['end'])
+            if end_day is None:
+                raise CommandError('--end must be a date like 2025-01-31')
+        else:
+            end_day = timezone.now().date()
+        # Naive UTC from here on (see datetime_adapter)
+        end = datetime.combine(end_day, datetime.min.time()) + timedelta(days=1)
+        start = end - timedelta(days=options['days'])
+
+        width = max(2, len(str(bins_per_row)))
+        layout = [
+            (level, row, f'L{level}R{row}B{number:0{width}d}')
+            for level in range(1, levels + 1)
+            for row in range(1, rows + 1)
+            for number in range(1, bins_per_row + 1)
+        ]
+        bin_ids = [bin_id for level, row, bin_id in layout]
+        in_bin = sum(count for status, count in status_counts.items() if status in IN_BIN_STATUSES)
+        if in_bin > len(bin_ids) * options['capacity']:
+            raise CommandError(
+                f'{in_bin} shipments in bins need more than {len(bin_ids)} bins x {options["capacity"]} capacity'
+            )
+
+        self.check_fresh(bin_ids, options['prefix'], sum(status_counts.values()))
+        rng = random.Random(options['seed'])
+        began = time.perf_counter()
+
+        # In-bin shipments are dealt round-robin, so occupancy is known up front
+        occupancy = [
+            in_bin // len(bin_ids) + (1 if index < in_bin % len(bin_ids) else 0)
+            for index in range(len(bin_ids))
+        ]
+        with transaction.atomic():
+            Bin.objects.bulk_create([
+                Bin(
+                    bin_id=bin_id,
+                    location=f'Level {level} - Row {row}',
+                    capacity=options['capacity'],
+                    occupied_count=count,
+                    status='occupied' if count >= options['capacity'] else 'available'
+                )
+                for (level, row, bin_id), count in zip(layout, occupancy)
+            ], batch_size=options['batch_size'])
+            cache.invalidate(bins=bin_ids)
+        self.stdout.write(f'Created {len(bin_ids)} bins ({levels} levels x {rows} rows x {bins_per_row})')
+
+        statuses = [status for status, count in status_counts.items() for _ in range(count)]
+        rng.shuffle(statuses)
+        audit_rows = self.generate_shipments(statuses, bin_ids, start, end, rng, options)
+
+        elapsed = time.perf_counter() - began
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(bin_ids)} bins, {len(statuses)} shipments and {audit_rows} audit rows '
+            f'in {elapsed:.1f}s'
+        ))
+
+    def check_fresh(self, bin_ids, prefix, shipment_count):
+        """Refuse to mix generated rows with existing ones (occupancy would be wrong)"""
+        for offset in range(0, len(bin_ids), 500):
+            chunk = bin_ids[offset:offset + 500]
+            taken = list(Bin.objects.filter(bin_id__in=chunk).values_list('bin_id', flat=True)[:3])
+            if taken:
+                raise CommandError(
+                    f'Bins {", ".join(taken)} ... already exist; generate into an empty database '
+                    f'(manage.py flush) or change the layout'
+                )
+        if shipment_count and Shipment.objects.filter(tracking_id=f'{prefix}{0:09d}').exists():
+            raise CommandError(f'Shipments with prefix {prefix} already exist; pass another --prefix')
+
+    def generate_shipments(self, statuses, bin_ids, start, end, rng, options):
+        adapt = datetime_adapter()
+        span = (end - start).total_seconds()
+        history = options['history']
+        batch_size = options['batch_size']
+        prefix = options['prefix']
+        shipment_fields = ['tracking_id', 'bin', 'status', 'manifested', 'time_in', 'time_out', 'created_at', 'updated_at']
+        audit_fields = ['action', 'shipment', 'user', 'timestamp', 'details']
+
+        audit_total = 0
+        in_bin_index = 0
+        reported_tenths = 0
+        for offset in range(0, len(statuses), batch_size):
+            shipment_rows = []
+            audit_rows = []
+            for number in range(offset, min(offset + batch_size, len(statuses))):
+                status = statuses[number]
+                tracking_id = f'{prefix}{number:09d}'
+                # One arrival per equal slice of the spread, in tracking ID order: still
+                # uniform, but the time-ordered indexes are filled at their end
+                time_in = start + timedelta(seconds=(number + rng.random()) * span / len(statuses))
+                time_out = None
+                bin_id = None
+                if status in IN_BIN_STATUSES:
+                    bin_id = bin_ids[in_bin_index % len(bin_ids)]
+                    in_bin_index += 1
+                last_seen = min(time_in + MAX_DWELL * rng.random(), end)
+                if status in OUT_STATUSES:
+                    time_out = last_seen
+                manifested = status == 'manifested' or (status != 'unregistered' and rng.random() < 0.8)
+                arrived = adapt(time_in)
+                shipment_rows.append((
+                    tracking_id, bin_id, status, manifested, arrived, time_out and adapt(time_out),
+                    arrived, adapt(last_seen)
+                ))
+
+                user = rng.choice(SEED_USERS)
+                step = (last_seen - time_in) / max(history - 1, 1)
+                for entry in range(history):
+                    if entry == 0:
+                        timestamp = arrived
+                    else:
+                        timestamp = adapt(last_seen if entry == history - 1 else time_in + step * entry)
+                    if entry == history - 1 and status in OUT_STATUSES:
+                        action = 'dispatched' if status == 'dispatched' else 'delivered'
+                    elif entry == 0 and status not in ('manifested', 'unregistered', 'registered'):
+                        action = 'assigned'
+                    else:
+                        action = 'updated'
+                    audit_rows.append((action, tracking_id, user, timestamp, f'Package {tracking_id} {action} (seed)'))
+
+            with transaction.atomic():
+                insert_rows(Shipment, shipment_fields, shipment_rows)
+                insert_rows(AuditLog, audit_fields, audit_rows)
+            audit_total += len(audit_rows)
+
+            done = offset + len(shipment_rows)
+            if done * 10 // len(statuses) > reported_tenths:
+                reported_tenths = done * 10 // len(statuses)
+                self.stdout.write(f'  {done}/{len(statuses)} shipments, {audit_total} audit rows')
+
+        if statuses:
+            # New shipments: nothing per key to evict, but list ETags must change
+            with transaction.atomic():
+                cache.bump_versions([cache.SHIPMENTS_TABLE_KEY])
+        return audit_total
@@ -0,0 +1,281 @@
+"""Per-route request metrics, exported in Prometheus text format at ``/api/metrics``.
+
+:class:`RequestMetricsMiddleware` times every request and records, per URL
+name and method: a latency histogram, a response size histogram, request and
+error counts, and the database queries, database time and rendering
+(serialization) time the request used. The same breakdown goes out on the
+response as a ``Server-Timing`` header, which browser dev tools display.
+
+Metrics are aggregated in process. With several worker processes (gunicorn,
+uvicorn workers) set ``INBOUND_METRICS_DIR``: each process then writes its
+totals to ``metrics-<pid>.json`` there at most every
+``INBOUND_METRICS_FLUSH_INTERVAL`` seconds (and at exit), and the export
+sums every file, so a scrape sees the whole server whichever worker answers
+it. Empty the directory when the server is redeployed.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'inbound_http_requests_total': (
+        'counter', 'Requests handled, by route, method and status code', None
+    ),
+    'inbound_http_request_errors_total': (
+        'counter', 'Requests answered with a 5xx status', None
+    ),
+    'inbound_http_request_duration_seconds': (
+        'histogram', 'Time to build the response', LATENCY_BUCKETS
+    ),
+    'inbound_http_response_size_bytes': (
+        'histogram', 'Response body size (streaming responses are not counted)', SIZE_BUCKETS
+    ),
+    'inbound_db_queries_total': (
+        'counter', 'Database queries run while handling requests', None
+    ),
+    'inbound_db_duration_seconds_total': (
+        'counter', 'Time spent in database queries', None
+    ),
+    'inbound_render_duration_seconds_total': (
+        'counter', 'Time spent rendering (serializing) response bodies', None
+    ),
+}
+
+
+def get_metrics_dir():
+    return getattr(settings, 'INBOUND_METRICS_DIR', None)
+
+
+def get_flush_interval():
+    return getattr(settings, 'INBOUND_METRICS_FLUSH_INTERVAL', 1.0)
+
+
+def server_timing_enabled():
+    return getattr(settings, 'INBOUND_METRICS_SERVER_TIMING', True)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by ``(metric, labels)``"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = defaultdict(float)
+            # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+            self.histograms = {}
+            self.last_save = 0.0
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self.lock:
+            state = self.histograms.get((name, labels))
+            if state is None:
+                state = self.histograms[name, labels] = [0] * (len(buckets) + 1) + [0.0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            state[index] += 1
+            state[-1] += value
+
+    def record_request(self, route, method, status_code, duration, size, timing):
+        labels = (('route', route), ('method', method))
+        with_status = labels + (('status', str(status_code)),)
+        self.inc('inbound_http_requests_total', with_status)
+        if status_code >= 500:
+            self.inc('inbound_http_request_errors_total', labels)
+        self.observe('inbound_http_request_duration_seconds', labels, duration)
+        if size is not None:
+            self.observe('inbound_http_response_size_bytes', labels, size)
+        self.inc('inbound_db_queries_total', labels, timing.queries)
+        self.inc('inbound_db_duration_seconds_total', labels, timing.db_time)
+        self.inc('inbound_render_duration_seconds_total', labels, timing.render_time)
+
+    def snapshot(self):
+        """JSON-friendly copy of the current totals"""
+        with self.lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, list(state)] for (name, labels), state in self.histograms.items()],
+            }
+
+    def save(self, directory):
+        """Write this process's totals to ``directory`` (atomically replacing the last save)"""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=path, prefix='.metrics-', suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as temp_file:
+            json.dump(self.snapshot(), temp_file)
+        os.replace(temp_name, path / f'metrics-{os.getpid()}.json')
+        self.last_save = time.monotonic()
+
+    def maybe_save(self):
+        directory = get_metrics_dir()
+        if directory and time.monotonic() - self.last_save >= get_flush_interval():
+            self.save(directory)
+
+
+registry = MetricsRegistry()
+
+
+def _save_at_exit():
+    if get_metrics_dir():
+        registry.save(get_metrics_dir())
+
+
+atexit.register(_save_at_exit)
+
+
+def merge(snapshots):
+    """Sum snapshots into ``(counters, histograms)`` dicts keyed by ``(name, labels)``"""
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, state in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], state)]
+            else:
+                histograms[key] = list(state)
+    return counters, histograms
+
+
+def collect():
+    """Totals for the export: this process, or every process with ``INBOUND_METRICS_DIR``"""
+    directory = get_metrics_dir()
+    if not directory:
+        return merge([registry.snapshot()])
+    registry.save(directory)
+    snapshots = []
+    for path in sorted(Path(directory).glob('metrics-*.json')):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # Removed or half-written by a process that is going away
+            continue
+    return merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render():
+    """Prometheus text exposition format (version 0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), state in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), state[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(float(bound))
+                lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(state[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTiming:
+    """Database and rendering time of one request; also the query execute wrapper"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - began
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'render;dur={self.render_time * 1000:.2f};desc="serialization"',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+class RequestMetricsMiddleware:
+    """Records per-route metrics for every request and sets ``Server-Timing``.
+
+    Goes first in ``MIDDLEWARE`` so the timings cover the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.metrics_timing = RequestTiming()
+        began = time.perf_counter()
+        with connection.execute_wrapper(timing):
+            response = self.get_response(request)
+        duration = time.perf_counter() - began
+
+        match = request.resolver_match
+        route = (match.url_name or match.route) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record_request(route, request.method, response.status_code, duration, size, timing)
+        registry.maybe_save()
+
+        if server_timing_enabled():
+            response['Server-Timing'] = timing.server_timing(duration)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns: time it with a post-render callback
+        timing = getattr(request, 'metrics_timing', None)
+        if timing is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timing.render_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-17 00:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_occupied_count(apps, schema_editor):
+    Bin = apps.get_model('inbound', 'Bin')
+    Shipment = apps.get_model('inbound', 'Shipment')
+    counts = (
+        Shipment.objects.filter(bin__isnull=False)
+        .order_by()
+        .values('bin')
+        .annotate(count=Count('pk'))
+    )
+    for row in counts:
+        Bin.objects.filter(pk=row['bin']).update(occupied_count=row['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbound', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bin',
+            name='occupied_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_occupied_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-17 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbound', '0011_shipment_auditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='auditlog',
+            options={'ordering': ['-timestamp', '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='shipment',
+            options={'ordering': ['-time_in', '-tracking_id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='auditlog_timestamp_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shipment',
+            name='shipment_time_in_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['-time_in', '-tracking_id'], name='shipment_time_in_key_idx'),
+        ),
+    ]
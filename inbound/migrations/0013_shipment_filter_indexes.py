@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbound', '0012_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['manifested', '-time_in'], name='shipment_manifested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['-time_out'], name='shipment_time_out_idx'),
+        ),
+    ]
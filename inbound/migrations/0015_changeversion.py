@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 00:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_counter(apps, schema_editor):
+    ChangeVersion = apps.get_model('inbound', 'ChangeVersion')
+    ChangeVersion.objects.get_or_create(key='*')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbound', '0014_auditlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('key', models.CharField(max_length=120, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
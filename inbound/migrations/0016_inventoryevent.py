@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 00:54
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inbound', '0015_changeversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=30)),
+                ('status', models.CharField(blank=True, default='', max_length=20)),
+                ('bin_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('previous_bin_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('tracking_ids', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -13,6 +13,9 @@ class Bin(models.Model):
     bin_id = models.CharField(max_length=100, unique=True, primary_key=True)
     location = models.CharField(max_length=255, blank=True, null=True)
     capacity = models.IntegerField(default=1)
+    # Shipments currently in the bin; maintained with F() updates on every move
+    # (see services.adjust_bin_occupancy) and repaired by `manage.py reconcile_bins`
+    occupied_count = models.IntegerField(default=0)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -48,7 +51,17 @@ class Shipment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
-        ordering = ['-time_in']
+        ordering = ['-time_in', '-tracking_id']
+        # Match the hot paths: shipments in a bin by status, status filters and
+        # list pages (all newest first; the last one is the keyset pagination key)
+        indexes = [
+            models.Index(fields=['bin', 'status', '-time_in'], name='shipment_bin_status_idx'),
+            models.Index(fields=['status', '-time_in'], name='shipment_status_time_in_idx'),
+            models.Index(fields=['-time_in', '-tracking_id'], name='shipment_time_in_key_idx'),
+            # Dashboard filters
+            models.Index(fields=['manifested', '-time_in'], name='shipment_manifested_idx'),
+            models.Index(fields=['-time_out'], name='shipment_time_out_idx'),
+        ]
     
     def __str__(self):
         return f"{self.tracking_id} - {self.status}"
@@ -67,11 +80,87 @@ class AuditLog(models.Model):
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='audit_logs')
     user = models.CharField(max_length=100, default='system')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the entry is made, not when a buffered sink writes it
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     details = models.TextField(blank=True, null=True)
     
     class Meta:
-        ordering = ['-timestamp']
+        ordering = ['-timestamp', '-id']
+        # A shipment's history and the newest-first log list (keyset pagination key)
+        indexes = [
+            models.Index(fields=['shipment', '-timestamp'], name='auditlog_shipment_ts_idx'),
+            models.Index(fields=['-timestamp', '-id'], name='auditlog_timestamp_key_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.action} - {self.shipment.tracking_id} at {self.timestamp}"
+        return f"{self.action} - {self.shipment_id} at {self.timestamp}"
+
+
+class Job(models.Model):
+    """Background job for long-running manifest, picklist, dispatch and export work"""
+    KIND_CHOICES = [
+        ('manifest', 'Manifest Upload'),
+        ('picklist', 'Picklist'),
+        ('dispatch', 'Bin Dispatch'),
+        ('export', 'Shipment Export'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    payload = models.JSONField(default=dict, blank=True)
+    input_file = models.CharField(max_length=255, blank=True, null=True)
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    user = models.CharField(max_length=100, default='system')
+    worker = models.CharField(max_length=100, blank=True, null=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} - {self.status}"
+
+
+class ChangeVersion(models.Model):
+    """Version stamp of a cached entity (``shipment:<id>`` / ``bin:<id>``), see cache.py"""
+    key = models.CharField(max_length=120, primary_key=True)
+    # Value of the global counter (row ``*``) when the entity last changed
+    version = models.BigIntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.key} @ {self.version}"
+
+
+class InventoryEvent(models.Model):
+    """Compact change record pushed to live subscribers by ``/api/events/``, see events.py"""
+    action = models.CharField(max_length=30)
+    status = models.CharField(max_length=20, blank=True, default='')
+    # Plain IDs rather than foreign keys: events outlive deleted bins
+    bin_id = models.CharField(max_length=100, blank=True, null=True)
+    previous_bin_id = models.CharField(max_length=100, blank=True, null=True)
+    tracking_ids = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.bin_id or self.previous_bin_id or ''}".rstrip()
@@ -0,0 +1,150 @@
+"""Keyset ("seek") pagination for the large, append-heavy tables.
+
+Page-number pagination runs a ``COUNT(*)`` and an ``OFFSET`` that grow with
+the table and with the page depth. Keyset pagination instead filters on the
+sort key of the last row it returned (``WHERE (time_in, tracking_id) <
+(...)``), so every page is one index seek and page 10,000 costs the same as
+page 1.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime, time
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique multi-column key.
+
+    ``ordering`` must end in a unique field so the key identifies one row.
+    Requests that pass ``?page=`` get page-number pagination (with a total
+    ``count``) for screens that need random access.
+    """
+    ordering = ()
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    fallback_class = PageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.fallback_class.page_query_param in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.model = queryset.model
+        self.base_url = request.build_absolute_uri()
+        key, reverse = self.decode_cursor(request)
+
+        # Walking backwards flips the sort, then the page is put back in order
+        ordering = [self._flip(field) if reverse else field for field in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self._after(ordering, key))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+        self.next_key = self._key(rows[-1]) if has_next and rows else None
+        self.previous_key = self._key(rows[0]) if has_previous and rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        return self._link(self.next_key, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_key is None:
+            return None
+        return self._link(self.previous_key, reverse=True)
+
+    def decode_cursor(self, request):
+        """Return ``(key, reverse)`` from the cursor parameter, ``(None, False)`` without one"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(token.encode('ascii')))
+            values = cursor['k']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            key = [
+                self._field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return key, bool(cursor.get('r'))
+
+    def _link(self, key, reverse):
+        cursor = {'k': [self._encode(value) for value in key]}
+        if reverse:
+            cursor['r'] = 1
+        token = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def _field(self, field):
+        return self.model._meta.get_field(field.lstrip('-'))
+
+    def _key(self, row):
+        # Model instances, or values() dicts that include the ordering columns
+        if isinstance(row, dict):
+            return [row[self._field(field).attname] for field in self.ordering]
+        return [getattr(row, self._field(field).attname) for field in self.ordering]
+
+    def _encode(self, value):
+        # Keep full precision: DjangoJSONEncoder truncates datetimes to milliseconds
+        if isinstance(value, (datetime, date, time)):
+            return value.isoformat()
+        return value
+
+    def _flip(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _after(self, ordering, key):
+        """Rows strictly after ``key`` in ``ordering``, as an index-friendly filter.
+
+        ``(a, b) < (x, y)`` is spelled ``a <= x AND (a < x OR (a = x AND b < y))``;
+        the leading bound lets the database seek straight to the page.
+        """
+        after = Q()
+        equal = {}
+        for field, value in zip(ordering, key):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            after |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+
+        lead = ordering[0]
+        bound = 'lte' if lead.startswith('-') else 'gte'
+        return Q(**{f'{lead.lstrip("-")}__{bound}': key[0]}) & after
+
+
+class ShipmentCursorPagination(KeysetPagination):
+    """Newest shipments first, keyed on ``(time_in, tracking_id)``"""
+    ordering = ('-time_in', '-tracking_id')
+
+
+class AuditLogCursorPagination(KeysetPagination):
+    """Newest audit entries first, keyed on ``(timestamp, id)``"""
+    ordering = ('-timestamp', '-id')
@@ -0,0 +1,94 @@
+"""Pick-path ordering for picklists.
+
+Bin IDs follow ``L<level>R<row>B<bin>`` (see seed_data). Instead of the
+picklist file's order, packages are grouped by bin and the bins visited along
+a serpentine walk: level by level, the rows of every other level in reverse
+(so a level starts at the end where the previous one finished), and the bins
+of every other row walked back the other way. Bins that don't follow the
+scheme (and packages without a bin) come last, by ID. The walk is then cut
+into waves of ``INBOUND_PICK_WAVE_SIZE`` packages, one picker trip each.
+"""
+import re
+from collections import defaultdict
+
+from django.conf import settings
+
+
+BIN_PATTERN = re.compile(r'L(\d+)R(\d+)B(\d+)$')
+
+
+def get_wave_size():
+    """Packages per wave (0 = one wave for the whole picklist)"""
+    return getattr(settings, 'INBOUND_PICK_WAVE_SIZE', 200)
+
+
+def walk_order(bin_ids):
+    """``bin_ids`` in serpentine walking order"""
+    located = []
+    others = []
+    match = BIN_PATTERN.match
+    for bin_id in bin_ids:
+        found = match(bin_id) if bin_id else None
+        if found is None:
+            others.append(bin_id)
+        else:
+            level, row, slot = found.groups()
+            located.append((int(level), int(row), int(slot), bin_id))
+    located.sort()
+
+    # Bin IDs per row, rows per level, in ascending order
+    levels = []
+    last_level = last_row = None
+    for level, row, slot, bin_id in located:
+        if level != last_level:
+            levels.append([])
+            last_level, last_row = level, None
+        if row != last_row:
+            levels[-1].append([])
+            last_row = row
+        levels[-1][-1].append(bin_id)
+
+    order = []
+    rows_walked = 0
+    for level_index, rows in enumerate(levels):
+        for row in (reversed(rows) if level_index % 2 else rows):
+            order.extend(reversed(row) if rows_walked % 2 else row)
+            rows_walked += 1
+    return order + sorted(others, key=lambda bin_id: (bin_id is None, bin_id or ''))
+
+
+def plan_route(packages, wave_size=None):
+    """Order picklist packages along the walk and split them into waves.
+
+    ``packages`` (dicts with ``tracking_id`` and ``bin_id``) come back grouped
+    by bin in walking order, keeping their relative order within a bin, each
+    tagged with its ``wave`` number. The waves list each trip's stops: the
+    bins in order with the tracking IDs to pick there. A bin whose packages
+    straddle a wave boundary is a stop in both waves.
+    """
+    wave_size = get_wave_size() if wave_size is None else wave_size
+    if wave_size < 0:
+        raise ValueError(f'wave_size must be 0 or more, got {wave_size}')
+    by_bin = defaultdict(list)
+    for package in packages:
+        by_bin[package['bin_id']].append(package)
+
+    ordered = []
+    waves = []
+    for bin_id in walk_order(by_bin):
+        bin_packages = by_bin[bin_id]
+        start = 0
+        while start < len(bin_packages):
+            if not waves or (wave_size and waves[-1]['package_count'] >= wave_size):
+                waves.append({'wave': len(waves) + 1, 'package_count': 0, 'stops': []})
+            wave = waves[-1]
+            # As much of the bin as still fits in this wave
+            end = min(len(bin_packages), start + wave_size - wave['package_count']) if wave_size else len(bin_packages)
+            stop = bin_packages[start:end]
+            wave['stops'].append({'bin_id': bin_id, 'tracking_ids': [package['tracking_id'] for package in stop]})
+            wave['package_count'] += len(stop)
+            for package in stop:
+                package['wave'] = wave['wave']
+            ordered.extend(stop)
+            start = end
+    return ordered, waves
@@ -0,0 +1,208 @@
+"""Opt-in per-request profiler for the slow bulk endpoints.
+
+A request is profiled when it carries an ``X-Profile`` header matching
+``INBOUND_PROFILE_TOKEN`` (any value while ``DEBUG`` is on and no token is
+set), or when it is drawn by ``INBOUND_PROFILE_SAMPLE_RATE``. For that request
+the middleware records a cProfile, the tracemalloc peak and the largest
+allocations, and every SQL statement with its time, and saves them under
+``INBOUND_PROFILE_DIR``:
+
+- ``<id>.prof``: cProfile stats (``pstats``, snakeviz, ...)
+- ``<id>.json``: request, status, timings, memory and SQL
+
+The response names the profile in an ``X-Profile-Id`` header, and
+``manage.py profiles`` summarizes the stored ones. Only one request is
+profiled at a time; memory figures are process-wide, so allocations made by
+concurrent requests in other threads show up too.
+"""
+import cProfile
+import hmac
+import json
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+
+
+PROFILE_HEADER = 'X-Profile'
+
+# SQL statements stored per profile (the count and total time cover all of them)
+MAX_STATEMENTS = 1000
+TOP_ALLOCATIONS = 15
+
+# cProfile allows one active profiler at a time (process-wide on Python 3.12+)
+_active = threading.Lock()
+
+
+def get_profile_dir():
+    return Path(getattr(settings, 'INBOUND_PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def get_sample_rate():
+    return getattr(settings, 'INBOUND_PROFILE_SAMPLE_RATE', 0.0)
+
+
+def get_token():
+    return getattr(settings, 'INBOUND_PROFILE_TOKEN', None)
+
+
+def get_keep():
+    """Newest profiles kept on disk (0 = all); older ones go as new ones are saved"""
+    return getattr(settings, 'INBOUND_PROFILE_KEEP', 200)
+
+
+def profile_trigger(request):
+    """``'header'``, ``'sample'`` or None"""
+    value = request.headers.get(PROFILE_HEADER)
+    if value:
+        token = get_token()
+        if token:
+            if hmac.compare_digest(value.encode(), str(token).encode()):
+                return 'header'
+        elif settings.DEBUG:
+            return 'header'
+    rate = get_sample_rate()
+    if rate and random.random() < rate:
+        return 'sample'
+    return None
+
+
+class SQLRecorder:
+    """Execute wrapper keeping each statement and its duration"""
+
+    def __init__(self):
+        self.statements = []
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - began
+            self.count += 1
+            self.time += elapsed
+            if len(self.statements) < MAX_STATEMENTS:
+                self.statements.append({'sql': sql, 'ms': round(elapsed * 1000, 3), 'many': many})
+
+
+def top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ])
+    return [
+        {
+            'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def save_profile(profiler, details):
+    """Write the ``.prof`` / ``.json`` pair; returns the profile id"""
+    directory = get_profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    route = re.sub(r'[^\w.-]+', '_', details['route'])
+    profile_id = f'{timezone.now():%Y%m%dT%H%M%S}-{route}-{uuid.uuid4().hex[:6]}'
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    with open(directory / f'{profile_id}.json', 'w') as details_file:
+        json.dump({'id': profile_id, **details}, details_file, indent=2, cls=DjangoJSONEncoder)
+    prune(directory)
+    return profile_id
+
+
+def prune(directory):
+    keep = get_keep()
+    if not keep:
+        return
+    # Ids start with the timestamp, so name order is age order
+    for path in sorted(directory.glob('*.json'))[:-keep]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def stored_profiles(directory=None):
+    """Saved profile details, oldest first (each with its ``.prof`` path)"""
+    profiles = []
+    for path in sorted((directory or get_profile_dir()).glob('*.json')):
+        try:
+            details = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        details['stats_path'] = path.with_suffix('.prof')
+        profiles.append(details)
+    return profiles
+
+
+class RequestProfilerMiddleware:
+    """Profiles the requests picked by :func:`profile_trigger`"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profile_trigger(request)
+        if trigger is None or not _active.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, trigger)
+        finally:
+            _active.release()
+
+    def profile(self, request, trigger):
+        profiler = cProfile.Profile()
+        recorder = SQLRecorder()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        began = time.perf_counter()
+        try:
+            with connection.execute_wrapper(recorder):
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            duration = time.perf_counter() - began
+            current, peak = tracemalloc.get_traced_memory()
+            allocations = top_allocations(tracemalloc.take_snapshot())
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        match = request.resolver_match
+        profile_id = save_profile(profiler, {
+            'created_at': timezone.now(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': (match.url_name or match.route) if match else 'unmatched',
+            'status': response.status_code,
+            'trigger': trigger,
+            'duration_ms': round(duration * 1000, 3),
+            'memory': {
+                'peak_kb': round((peak - baseline) / 1024, 1),
+                'retained_kb': round((current - baseline) / 1024, 1),
+                'top_allocations': allocations,
+            },
+            'sql': {
+                'count': recorder.count,
+                'time_ms': round(recorder.time * 1000, 3),
+                'statements': recorder.statements,
+            },
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,227 @@
+"""Streaming readers that pull tracking IDs out of uploaded manifest/picklist files.
+
+The manifest readers are generators over a text stream, so memory use stays
+bounded by the read size (plus the longest single row/value) whatever the file
+size.
+"""
+import csv
+import json
+import re
+from io import TextIOWrapper
+
+from django.conf import settings
+
+
+# Normalized header names that identify the tracking ID column
+TRACKING_ID_HEADERS = {'trackingid', 'trackingnumber'}
+
+# Keys accepted for the tracking ID when JSON items are objects
+TRACKING_ID_KEYS = ('tracking_id', 'Tracking Id', 'trackingId')
+
+# Only characters that could still belong to a number up to the end of the buffer
+NUMBER_TAIL = re.compile(r'[0-9+\-.eE]*\Z')
+
+
+def get_read_size():
+    return getattr(settings, 'INBOUND_UPLOAD_READ_SIZE', 64 * 1024)
+
+
+def open_text(uploaded_file):
+    """Wrap an uploaded file as a UTF-8 text stream (tolerating an Excel BOM)"""
+    uploaded_file.seek(0)
+    return TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+
+def file_format(uploaded_file):
+    return uploaded_file.name.rsplit('.', 1)[-1].lower()
+
+
+def iter_tracking_ids(uploaded_file):
+    """Yield stripped tracking IDs from a CSV or JSON upload"""
+    extension = file_format(uploaded_file)
+    stream = open_text(uploaded_file)
+    if extension == 'csv':
+        return iter_csv_tracking_ids(stream)
+    if extension == 'json':
+        return iter_json_tracking_ids(stream)
+    raise ValueError('Unsupported file format. Please upload CSV or JSON file')
+
+
+def _normalize_header(value):
+    return ''.join(ch for ch in value.lower() if ch.isalnum())
+
+
+def iter_csv_tracking_ids(stream):
+    """Yield tracking IDs from a CSV stream.
+
+    Understands the ``sample_manifest.csv`` layout ("Tracking Id", "Customer
+    Name", ...): the tracking ID column is located by header name. Files
+    without a recognised header are read from the first column, first row
+    included.
+    """
+    reader = csv.reader(stream)
+    first_row = next(reader, None)
+    if first_row is None:
+        return
+
+    headers = [_normalize_header(cell) for cell in first_row]
+    column = next((i for i, h in enumerate(headers) if h in TRACKING_ID_HEADERS), None)
+    if column is None:
+        column = 0
+        if first_row and first_row[0].strip():
+            yield first_row[0].strip()
+
+    for row in reader:
+        if len(row) > column:
+            value = row[column].strip()
+            if value:
+                yield value
+
+
+def _item_tracking_id(item):
+    if isinstance(item, dict):
+        item = next((item[key] for key in TRACKING_ID_KEYS if item.get(key)), None)
+    if item is None or isinstance(item, (dict, list)):
+        return None
+    value = str(item).strip()
+    return value or None
+
+
+def iter_json_tracking_ids(stream):
+    """Yield tracking IDs from a JSON stream without loading the whole document.
+
+    Accepts a top-level array (of strings or objects with a tracking ID key)
+    or an object with a ``tracking_ids`` array.
+    """
+    reader = _JSONStreamReader(stream, get_read_size())
+    first = reader.peek()
+
+    if first == '[':
+        items = reader.iter_array()
+    elif first == '{':
+        items = reader.iter_object_array('tracking_ids')
+    else:
+        raise ValueError('Invalid JSON format. Expected array or object with "tracking_ids" key')
+
+    for item in items:
+        tracking_id = _item_tracking_id(item)
+        if tracking_id:
+            yield tracking_id
+
+
+class _JSONStreamReader:
+    """Minimal incremental JSON reader: walks arrays/objects one value at a time"""
+
+    def __init__(self, stream, read_size):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        data = self.stream.read(self.read_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Invalid JSON: expected "{char}"')
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise ValueError('Invalid JSON: unexpected end of file')
+            # A number running up to the end of the buffer may continue in the
+            # next read: "-1." decodes as -1, "2.5e" as 2.5
+            if (
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                and NUMBER_TAIL.match(self.buffer, end) and self._fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError('Invalid JSON: expected "," or "]" in array')
+
+    def iter_object_array(self, key):
+        """Yield the items of the array stored under ``key`` in a top-level object"""
+        self.expect('{')
+        found = False
+        while self.peek() != '}':
+            name = self.value()
+            self.expect(':')
+            if name == key and self.peek() == '[':
+                found = True
+                yield from self.iter_array()
+            else:
+                self.value()
+            if self.peek() == ',':
+                self.pos += 1
+        if not found:
+            raise ValueError('Invalid JSON format. Expected array or object with "tracking_ids" key')
+
+
+def iter_picklist_tracking_ids(uploaded_file):
+    """Yield upper-cased tracking IDs from a picklist CSV (header row skipped) or JSON file.
+
+    JSON picklists take the same shapes as manifests (see ``iter_json_tracking_ids``).
+    """
+    extension = file_format(uploaded_file)
+    stream = open_text(uploaded_file)
+
+    if extension == 'csv':
+        csv_reader = csv.reader(stream)
+        # Skip header if present
+        next(csv_reader, None)
+        for row in csv_reader:
+            if row and row[0].strip():
+                yield row[0].strip().upper()
+        return
+
+    if extension == 'json':
+        for tracking_id in iter_json_tracking_ids(stream):
+            yield tracking_id.upper()
+        return
+
+    raise ValueError('Unsupported file format. Please upload CSV or JSON file')
+
+
+def read_picklist_tracking_ids(uploaded_file):
+    """List of upper-cased tracking IDs in a picklist file (see ``iter_picklist_tracking_ids``)"""
+    return list(iter_picklist_tracking_ids(uploaded_file))
@@ -0,0 +1,47 @@
+"""JSON rendering for the API.
+
+:class:`FastJSONRenderer` writes the same JSON as DRF's ``JSONRenderer``
+(compact UTF-8, datetimes in ISO 8601 with ``Z``, U+2028/U+2029 escaped) but
+encodes with orjson, which is several times faster on large list responses.
+orjson is optional: without it, with ``INBOUND_ORJSON = False``, or when a
+client asks for indented output, rendering falls back to DRF's encoder.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def orjson_enabled():
+    return orjson is not None and getattr(settings, 'INBOUND_ORJSON', True)
+
+
+# Types orjson doesn't know (lazy translations, Decimal, timedelta, ...) get
+# DRF's representation
+_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with orjson doing the encoding when it is installed"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None or not orjson_enabled() or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=_encoder.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            # E.g. integers beyond 64 bits, which the standard encoder handles
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict JavaScript subset, as JSONRenderer does
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
@@ -1,16 +1,35 @@
-from rest_framework import serializers
-from .models import Bin, Shipment, AuditLog
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .models import Bin, Shipment, AuditLog, Job
 
 
 class BinSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bin
-        fields = ['bin_id', 'location', 'capacity', 'status', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = ['bin_id', 'location', 'capacity', 'occupied_count', 'status', 'created_at', 'updated_at']
+        read_only_fields = ['occupied_count', 'created_at', 'updated_at']
+
+
+class BinOccupancySerializer(serializers.ModelSerializer):
+    package_count = serializers.IntegerField(source='occupied_count', read_only=True)
+    utilization_percent = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Bin
+        fields = ['bin_id', 'location', 'capacity', 'status', 'package_count', 'utilization_percent']
+    
+    def get_utilization_percent(self, obj):
+        if not obj.capacity:
+            return 0
+        return round(obj.occupied_count * 100 / obj.capacity)
 
 
 class ShipmentSerializer(serializers.ModelSerializer):
-    bin_id = serializers.CharField(source='bin.bin_id', read_only=True)
+    # Read the FK column directly; going through ``bin`` costs a query per row
+    bin_id = serializers.CharField(read_only=True)
     
     class Meta:
         model = Shipment
@@ -19,7 +38,7 @@ class ShipmentSerializer(serializers.ModelSerializer):
 
 
 class AuditLogSerializer(serializers.ModelSerializer):
-    tracking_id = serializers.CharField(source='shipment.tracking_id', read_only=True)
+    tracking_id = serializers.CharField(source='shipment_id', read_only=True)
     
     class Meta:
         model = AuditLog
@@ -27,6 +46,25 @@ class AuditLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['timestamp']
 
 
+class JobSerializer(serializers.ModelSerializer):
+    progress_percent = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'payload', 'progress_done', 'progress_total', 'progress_percent',
+            'result', 'error', 'user', 'attempts', 'created_at', 'started_at', 'finished_at', 'updated_at'
+        ]
+        read_only_fields = fields
+    
+    def get_progress_percent(self, obj):
+        if obj.status == 'succeeded':
+            return 100
+        if not obj.progress_total:
+            return None
+        return min(100, int(obj.progress_done * 100 / obj.progress_total))
+
+
 class ScanBinSerializer(serializers.Serializer):
     """Serializer for scanning bin"""
     bin_id = serializers.CharField(max_length=100)
@@ -36,6 +74,21 @@ class ScanBinSerializer(serializers.Serializer):
         return value
 
 
+class SuggestBinSerializer(serializers.Serializer):
+    """Query parameters of the putaway bin suggestion"""
+    zone = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    count = serializers.IntegerField(min_value=1, default=1)
+    strategy = serializers.ChoiceField(choices=['fill', 'spread'], default='fill')
+    exclude = serializers.CharField(required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=3)
+    
+    def validate_zone(self, value):
+        return value.upper()
+    
+    def validate_exclude(self, value):
+        return [bin_id.strip() for bin_id in value.split(',') if bin_id.strip()]
+
+
 class ScanPackageSerializer(serializers.Serializer):
     """Serializer for scanning package"""
     tracking_id = serializers.CharField(max_length=100)
@@ -58,8 +111,8 @@ class ManifestUploadSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("Tracking IDs list cannot be empty")
         
-        # Remove duplicates and empty strings
-        cleaned_ids = list(set([tid.strip() for tid in value if tid.strip()]))
+        # Remove duplicates (keeping file order) and empty strings
+        cleaned_ids = list(dict.fromkeys(tid.strip() for tid in value if tid.strip()))
         
         if not cleaned_ids:
             raise serializers.ValidationError("No valid tracking IDs provided")
@@ -67,6 +120,17 @@ class ManifestUploadSerializer(serializers.Serializer):
         return cleaned_ids
 
 
+class ManifestFileUploadSerializer(serializers.Serializer):
+    """Serializer for uploading a CSV/JSON manifest file"""
+    file = serializers.FileField()
+    
+    def validate_file(self, value):
+        extension = value.name.rsplit('.', 1)[-1].lower()
+        if extension not in ('csv', 'json'):
+            raise serializers.ValidationError("Unsupported file format. Please upload CSV or JSON file")
+        return value
+
+
 class SearchPackageSerializer(serializers.Serializer):
     """Serializer for searching package by tracking ID"""
     tracking_id = serializers.CharField(max_length=100)
@@ -105,3 +169,118 @@ class DissociatePackageSerializer(serializers.Serializer):
             )
         
         return data
+
+
+class PicklistPayloadSerializer(serializers.Serializer):
+    """Options of a picklist, uploaded directly or as a job payload"""
+    # Packages per pick wave (default INBOUND_PICK_WAVE_SIZE, 0 = a single wave)
+    wave_size = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+
+
+class DispatchPayloadSerializer(serializers.Serializer):
+    """Payload of a dispatch job"""
+    bin_id = serializers.CharField(max_length=100)
+    
+    def validate_bin_id(self, value):
+        return value.upper()
+
+
+class JobSubmitSerializer(serializers.Serializer):
+    """Serializer for queueing a background job"""
+    FILE_KINDS = ('manifest', 'picklist')
+    
+    kind = serializers.ChoiceField(choices=Job.KIND_CHOICES)
+    payload = serializers.JSONField(required=False, default=dict)
+    file = serializers.FileField(required=False)
+    
+    def validate(self, data):
+        kind = data['kind']
+        uploaded_file = data.get('file')
+        
+        if kind in self.FILE_KINDS:
+            if uploaded_file is None:
+                raise serializers.ValidationError({'file': f'A CSV or JSON file is required for {kind} jobs'})
+            extension = uploaded_file.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'json'):
+                raise serializers.ValidationError({'file': 'Unsupported file format. Please upload CSV or JSON file'})
+        
+        if not isinstance(data['payload'], dict):
+            raise serializers.ValidationError({'payload': 'Payload must be a JSON object'})
+        
+        payload_serializer = {
+            'dispatch': DispatchPayloadSerializer, 'picklist': PicklistPayloadSerializer,
+        }.get(kind)
+        if payload_serializer is not None:
+            options = payload_serializer(data=data['payload'])
+            if not options.is_valid():
+                raise serializers.ValidationError({'payload': options.errors})
+            data['payload'] = {**data['payload'], **options.validated_data}
+        
+        return data
+
+
+# Fields whose representation of a database value is the value itself
+# (datetimes are left to the JSON renderer, which writes them as DateTimeField does)
+PLAIN_FIELDS = (
+    serializers.CharField, serializers.ChoiceField, serializers.IntegerField, serializers.BooleanField,
+    serializers.DateTimeField, serializers.PrimaryKeyRelatedField,
+)
+
+
+class RowSerializer:
+    """Read-only stand-in for a ModelSerializer over ``values()`` rows
+    
+    Builds each response dict straight from the fetched columns instead of
+    model instances going through the serializer fields one by one. Get one
+    with :func:`row_serializer_for`.
+    """
+    
+    def __init__(self, fields, datetime_keys):
+        # [(response key, model column)] in the serializer's field order
+        self.fields = fields
+        self.columns = list(dict.fromkeys(column for key, column in fields))
+        self.datetime_keys = datetime_keys
+    
+    def to_representation(self, rows):
+        fields = self.fields
+        data = [{key: row[column] for key, column in fields} for row in rows]
+        if settings.USE_TZ and self.datetime_keys and timezone.get_current_timezone_name() != 'UTC':
+            # DateTimeField renders in the current time zone
+            for item in data:
+                for key in self.datetime_keys:
+                    if item[key] is not None:
+                        item[key] = timezone.localtime(item[key])
+        return data
+
+
+_row_serializers = {}
+
+
+def row_serializer_for(serializer_class):
+    """:class:`RowSerializer` matching ``serializer_class``'s output, or None when
+    one of its fields does more than pass a column through (method fields,
+    nested serializers, custom datetime formats, ...)"""
+    if serializer_class not in _row_serializers:
+        _row_serializers[serializer_class] = _build_row_serializer(serializer_class)
+    return _row_serializers[serializer_class]
+
+
+def _build_row_serializer(serializer_class):
+    model = serializer_class.Meta.model
+    fields = []
+    datetime_keys = []
+    for key, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if not isinstance(field, PLAIN_FIELDS) or '.' in field.source or field.source == '*':
+            return None
+        if isinstance(field, serializers.DateTimeField):
+            if getattr(field, 'format', api_settings.DATETIME_FORMAT) not in (ISO_8601, None):
+                return None
+            datetime_keys.append(key)
+        try:
+            column = model._meta.get_field(field.source).attname
+        except FieldDoesNotExist:
+            return None
+        fields.append((key, column))
+    return RowSerializer(fields, datetime_keys)
@@ -0,0 +1,319 @@
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from . import cache, events
+from .models import Bin, Shipment, AuditLog
+from .pickpath import plan_route
+from .readers import iter_tracking_ids
+
+
+def get_chunk_size():
+    """Number of rows handled per IN lookup / bulk statement"""
+    return getattr(settings, 'INBOUND_BULK_CHUNK_SIZE', 500)
+
+
+def chunked(items, size):
+    """Yield successive lists of at most ``size`` items from any iterable"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _occupancy_update(delta):
+    """UPDATE kwargs moving occupied_count by ``delta`` and flipping available/occupied from it"""
+    return {
+        'occupied_count': F('occupied_count') + delta,
+        # The CASE sees the pre-update count, hence ``capacity - delta``
+        'status': Case(
+            When(status='maintenance', then=Value('maintenance')),
+            When(occupied_count__gte=F('capacity') - delta, then=Value('occupied')),
+            default=Value('available')
+        ),
+        'updated_at': timezone.now(),
+    }
+
+
+def adjust_bin_occupancy(bin_id, delta):
+    """Move a bin's occupied_count by ``delta`` and flip available/occupied from it.
+
+    A single UPDATE with F() expressions, so it is safe under concurrent moves
+    as long as it runs in the same transaction as the shipment change.
+    Bins under maintenance keep their status.
+    """
+    if not delta:
+        return
+    Bin.objects.filter(pk=bin_id).update(**_occupancy_update(delta))
+
+
+def reserve_bin_slot(bin_id):
+    """Claim one free slot in a bin; returns False if the bin is full (or missing).
+
+    The capacity check and the increment are one conditional UPDATE, so
+    concurrent scanners can never push a bin past its capacity.
+    """
+    return bool(
+        Bin.objects.filter(pk=bin_id, occupied_count__lt=F('capacity'))
+        .update(**_occupancy_update(1))
+    )
+
+
+def move_shipment_occupancy(previous_bin_id, bin_id):
+    """Update occupancy counters for a shipment moving between bins (either may be None)"""
+    if previous_bin_id == bin_id:
+        return
+    if bin_id:
+        adjust_bin_occupancy(bin_id, 1)
+    if previous_bin_id:
+        adjust_bin_occupancy(previous_bin_id, -1)
+
+
+def apply_manifest(tracking_ids, user, chunk_size=None):
+    """Mark tracking IDs as manifested, creating shipments that don't exist yet.
+
+    Works set-based in one transaction: existing IDs are found with chunked
+    IN lookups, new shipments are bulk inserted, existing ones are flipped
+    with one UPDATE per chunk and audit rows are written in batches.
+
+    Returns ``(created_ids, updated_ids, failed_ids)``.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    created_ids = []
+    updated_ids = []
+    failed_ids = []
+
+    with transaction.atomic():
+        for chunk in chunked(tracking_ids, chunk_size):
+            try:
+                # Savepoint per chunk so one bad chunk doesn't sink the rest
+                with transaction.atomic():
+                    created, updated = _apply_manifest_chunk(chunk, user, chunk_size)
+            except DatabaseError as e:
+                failed_ids.extend({'tracking_id': tid, 'reason': str(e)} for tid in chunk)
+                continue
+            created_ids.extend(created)
+            updated_ids.extend(updated)
+
+    return created_ids, updated_ids, failed_ids
+
+
+def _apply_manifest_chunk(chunk, user, batch_size):
+    now = timezone.now()
+    chunk = list(dict.fromkeys(chunk))
+
+    existing = dict(
+        Shipment.objects.filter(tracking_id__in=chunk).values_list('tracking_id', 'bin_id')
+    )
+    created = [tid for tid in chunk if tid not in existing]
+    updated = [tid for tid in chunk if tid in existing]
+
+    if created:
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id=tid, status='manifested', manifested=True, time_in=now)
+            for tid in created
+        ], batch_size=batch_size)
+
+    if updated:
+        Shipment.objects.filter(tracking_id__in=updated).update(
+            status='manifested',
+            manifested=True,
+            updated_at=now
+        )
+
+    audit_logs = [
+        AuditLog(
+            action='updated',
+            shipment_id=tid,
+            user=user,
+            details='Shipment created with manifested status via manifest upload'
+        )
+        for tid in created
+    ]
+    audit_logs.extend(
+        AuditLog(
+            action='updated',
+            shipment_id=tid,
+            user=user,
+            details='Status updated to manifested via manifest upload'
+        )
+        for tid in updated
+    )
+    AuditLog.objects.bulk_create(audit_logs, batch_size=batch_size)
+    cache.invalidate(shipments=chunk, bins=set(existing.values()))
+    events.emit(*_events_by_bin('manifested', chunk, 'manifested', existing))
+
+    return created, updated
+
+
+def _events_by_bin(action, tracking_ids, status, bin_ids):
+    """One event per bin for a bulk change, so bin/zone subscribers get only theirs"""
+    by_bin = {}
+    for tracking_id in tracking_ids:
+        by_bin.setdefault(bin_ids.get(tracking_id), []).append(tracking_id)
+    return [events.event(action, ids, status, bin_id=bin_id) for bin_id, ids in by_bin.items()]
+
+
+def get_id_sample_size():
+    """Max IDs per created/updated list returned for streamed uploads"""
+    return getattr(settings, 'INBOUND_UPLOAD_ID_SAMPLE_SIZE', 1000)
+
+
+def ingest_manifest_file(uploaded_file, user, chunk_size=None, progress=None):
+    """Stream a CSV/JSON manifest file into the bulk manifest path.
+
+    IDs are parsed incrementally and applied in fixed-size chunks, each in its
+    own transaction, so memory and lock hold time stay bounded no matter how
+    large the file is. Only counts are kept for the whole file; the ID lists in
+    the result are capped at ``INBOUND_UPLOAD_ID_SAMPLE_SIZE``.
+
+    ``progress``, if given, is called with the running count after each chunk.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    sample_size = get_id_sample_size()
+    result = {
+        'total_processed': 0,
+        'created_count': 0,
+        'updated_count': 0,
+        'failed_count': 0,
+        'created_ids': [],
+        'updated_ids': [],
+        'failed_ids': [],
+    }
+
+    for chunk in chunked(iter_tracking_ids(uploaded_file), chunk_size):
+        created, updated, failed = apply_manifest(chunk, user, chunk_size)
+        result['total_processed'] += len(chunk)
+        for key, ids in (('created', created), ('updated', updated), ('failed', failed)):
+            result[f'{key}_count'] += len(ids)
+            room = sample_size - len(result[f'{key}_ids'])
+            if room > 0:
+                result[f'{key}_ids'].extend(ids[:room])
+        if progress:
+            progress(result['total_processed'])
+
+    result['ids_truncated'] = any(
+        result[f'{key}_count'] > len(result[f'{key}_ids'])
+        for key in ('created', 'updated', 'failed')
+    )
+    return result
+
+
+def create_picklist(tracking_ids, user, progress=None, chunk_size=None, wave_size=None):
+    """Move putaway shipments onto the picklist and report what wasn't found.
+
+    IDs are resolved with one IN lookup per chunk, matches are flipped with one
+    UPDATE per chunk and their audit rows bulk inserted. The packages are
+    reported along the pick path and split into waves of ``wave_size`` (see
+    pickpath.py); missing IDs in file order. An ID repeated after being picked
+    up reports the status it was just given, as it would have one row at a time.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    processed_packages = []
+    not_found = []
+    done = 0
+
+    for chunk in chunked(tracking_ids, chunk_size):
+        with transaction.atomic():
+            packages, missing = _create_picklist_chunk(chunk, user, chunk_size)
+        processed_packages.extend(packages)
+        not_found.extend(missing)
+
+        done += len(chunk)
+        if progress:
+            progress(done, len(tracking_ids))
+
+    packages, waves = plan_route(processed_packages, wave_size)
+    return {
+        'packages': packages,
+        'found_count': len(packages),
+        'not_found': not_found,
+        'not_found_count': len(not_found),
+        'waves': waves
+    }
+
+
+def _create_picklist_chunk(chunk, user, batch_size):
+    statuses = {}
+    bins = {}
+    for tracking_id, shipment_status, bin_id in Shipment.objects.filter(
+        tracking_id__in=set(chunk)
+    ).values_list('tracking_id', 'status', 'bin_id'):
+        statuses[tracking_id] = shipment_status
+        bins[tracking_id] = bin_id
+
+    packages = []
+    not_found = []
+    for tracking_id in chunk:
+        shipment_status = statuses.get(tracking_id)
+        if shipment_status is None:
+            not_found.append(tracking_id)
+        elif shipment_status != 'putaway':
+            not_found.append(f'{tracking_id} (status: {shipment_status})')
+        else:
+            # Only putaway shipments move to picklist-created
+            statuses[tracking_id] = 'picklist-created'
+            packages.append({
+                'tracking_id': tracking_id,
+                'bin_id': bins[tracking_id],
+                'status': 'picklist-created'
+            })
+
+    if packages:
+        picked_ids = [package['tracking_id'] for package in packages]
+        Shipment.objects.filter(tracking_id__in=picked_ids, status='putaway').update(
+            status='picklist-created',
+            updated_at=timezone.now()
+        )
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                action='updated',
+                shipment_id=tracking_id,
+                user=user,
+                details=f'Package {tracking_id} added to picklist'
+            )
+            for tracking_id in picked_ids
+        ], batch_size=batch_size)
+        cache.invalidate(shipments=picked_ids, bins={bins[tracking_id] for tracking_id in picked_ids})
+        events.emit(*_events_by_bin('picklist', picked_ids, 'picklist-created', bins))
+
+    return packages, not_found
+
+
+def dispatch_bin(bin_obj, user):
+    """Dispatch every picked shipment in a bin and return the dispatched IDs.
+
+    One transaction holding one UPDATE for the shipments, one bulk insert of
+    audit rows and one occupancy update for the bin, all stamped with the
+    same dispatch time.
+    """
+    with transaction.atomic():
+        picked = Shipment.objects.filter(bin=bin_obj, status='picked')
+        dispatched_ids = list(picked.order_by().values_list('tracking_id', flat=True))
+        if dispatched_ids:
+            now = timezone.now()
+            picked.update(
+                status='dispatched',
+                time_out=now,
+                bin=None,  # Remove bin association
+                updated_at=now
+            )
+            AuditLog.objects.bulk_create([
+                AuditLog(
+                    action='dispatched',
+                    shipment_id=tracking_id,
+                    user=user,
+                    details=f'Package {tracking_id} dispatched from bin {bin_obj.bin_id}'
+                )
+                for tracking_id in dispatched_ids
+            ], batch_size=get_chunk_size())
+            adjust_bin_occupancy(bin_obj.pk, -len(dispatched_ids))
+            cache.invalidate(shipments=dispatched_ids, bins=[bin_obj.pk])
+            events.emit(events.event('dispatched', dispatched_ids, 'dispatched', previous_bin_id=bin_obj.pk))
+
+    bin_obj.refresh_from_db(fields=['occupied_count', 'status'])
+    return dispatched_ids
@@ -0,0 +1,226 @@
+"""Putaway slotting: which bin the next package(s) should go to (``suggest_bin``).
+
+Each process keeps every bin's free slots (capacity minus occupied count) in
+memory as sorted ``(free slots, bin id)`` lists: one for the whole warehouse
+and one per zone prefix of the bin IDs (``L``, ``L1``, ``L1R``, ``L1R2``, ...
+for ``L1R2B07``), so a suggestion is a bisect instead of a scan of the bins
+table. Only available bins with a free slot are indexed, the ones scan_bin
+accepts.
+
+The index follows the ``bin:<id>`` ChangeVersion stamps that every write to a
+bin already records (assign, dispatch, pickup, bin CRUD, ... see cache.py):
+before answering it reloads the bins stamped since its last sync, so a slot
+taken through any worker process is never suggested again. It is built in the
+background when the server starts (backend/wsgi.py, backend/asgi.py), or on
+first use.
+"""
+import bisect
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+
+from .cache import COUNTER_KEY, bin_key
+from .filters import prefix_filter
+from .models import Bin, ChangeVersion
+from .services import chunked, get_chunk_size
+
+
+logger = logging.getLogger(__name__)
+
+# 'fill': the bin with the fewest free slots that still fit (packs partly used
+# bins first); 'spread': the bin with the most free slots
+STRATEGIES = ('fill', 'spread')
+
+# Level + row part of a bin ID ("L1R2" in "L1R2B07"); its prefixes are the indexed zones
+ZONE_PATTERN = re.compile(r'L\d+R\d+')
+
+
+def slotting_enabled():
+    return getattr(settings, 'INBOUND_SLOTTING_INDEX', True)
+
+
+def warm_on_startup():
+    return getattr(settings, 'INBOUND_SLOTTING_WARM_ON_STARTUP', True)
+
+
+def zones_of(bin_id):
+    """Indexed zones a bin belongs to: '' (everywhere) and each prefix of its level/row"""
+    match = ZONE_PATTERN.match(bin_id)
+    return [bin_id[:length] for length in range((match.end() if match else 0) + 1)]
+
+
+def most_free(entries, count):
+    """Entries with at least ``count`` free slots, most free first (ties by bin ID)"""
+    end = len(entries)
+    while end and entries[end - 1][0] >= count:
+        start = bisect.bisect_left(entries, (entries[end - 1][0],), 0, end)
+        for position in range(start, end):
+            yield entries[position]
+        end = start
+
+
+class SlottingIndex:
+    """Thread-safe free-capacity index kept coherent through ``ChangeVersion``"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            # bin_id -> (free slots, capacity, location) of every indexed bin
+            self.bins = {}
+            # zone -> [(free slots, bin_id)], ascending
+            self.zones = defaultdict(list)
+            self.last_version = None
+
+    def _remove(self, bin_id):
+        entry = self.bins.pop(bin_id, None)
+        if entry is None:
+            return
+        key = (entry[0], bin_id)
+        for zone in zones_of(bin_id):
+            entries = self.zones[zone]
+            del entries[bisect.bisect_left(entries, key)]
+
+    def _update(self, bin_id, location, bin_status, capacity, occupied_count):
+        self._remove(bin_id)
+        free = capacity - occupied_count
+        if bin_status != 'available' or free <= 0:
+            return
+        self.bins[bin_id] = (free, capacity, location)
+        for zone in zones_of(bin_id):
+            bisect.insort(self.zones[zone], (free, bin_id))
+
+    def rebuild(self):
+        # Read the counter first: a bin written while loading is reloaded by the next sync
+        version = ChangeVersion.objects.filter(key=COUNTER_KEY).values_list('version', flat=True).first() or 0
+        bins = {}
+        zones = defaultdict(list)
+        rows = Bin.objects.filter(status='available').filter(capacity__gt=F('occupied_count')).values_list(
+            'bin_id', 'location', 'capacity', 'occupied_count'
+        )
+        for bin_id, location, capacity, occupied_count in rows.iterator(chunk_size=get_chunk_size()):
+            free = capacity - occupied_count
+            bins[bin_id] = (free, capacity, location)
+            for zone in zones_of(bin_id):
+                zones[zone].append((free, bin_id))
+        for entries in zones.values():
+            entries.sort()
+        with self.lock:
+            self.bins, self.zones, self.last_version = bins, zones, version
+
+    def sync(self):
+        """Build the index, or reload the bins written since the last sync"""
+        with self.lock:
+            if self.last_version is None:
+                self.rebuild()
+                return
+            changed = dict(
+                ChangeVersion.objects.filter(
+                    Q(key=COUNTER_KEY) | Q(version__gt=self.last_version, key__startswith=bin_key(''))
+                ).values_list('key', 'version')
+            )
+            latest = changed.pop(COUNTER_KEY, 0)
+            if latest < self.last_version:
+                # The counter went backwards (restored or flushed database): start over
+                self.rebuild()
+                return
+            bin_ids = [key[len(bin_key('')):] for key in changed]
+            for chunk in chunked(bin_ids, get_chunk_size()):
+                rows = {
+                    row[0]: row
+                    for row in Bin.objects.filter(bin_id__in=chunk).values_list(
+                        'bin_id', 'location', 'status', 'capacity', 'occupied_count'
+                    )
+                }
+                for bin_id in chunk:
+                    if bin_id in rows:
+                        self._update(*rows[bin_id])
+                    else:
+                        self._remove(bin_id)
+            self.last_version = max(latest, self.last_version)
+
+    def entries(self, zone):
+        """Ascending ``(free slots, bin_id)`` entries of the bins in ``zone``"""
+        entries = self.zones.get(zone)
+        if entries is not None:
+            return entries
+        if zones_of(zone)[-1] == zone:
+            # An indexed zone without free bins
+            return []
+        # Not an indexed zone (e.g. "L1R2B0"): filter the warehouse-wide list
+        return [entry for entry in self.zones.get('', ()) if entry[1].startswith(zone)]
+
+    def suggest(self, zone='', count=1, strategy='fill', exclude=(), limit=3):
+        """Up to ``limit`` bins with room for ``count`` packages, best first"""
+        self.sync()
+        exclude = set(exclude)
+        with self.lock:
+            entries = self.entries(zone)
+            if strategy == 'fill':
+                first = bisect.bisect_left(entries, (count,))
+                ordered = (entries[position] for position in range(first, len(entries)))
+            else:
+                ordered = most_free(entries, count)
+            suggestions = []
+            for free, bin_id in ordered:
+                if bin_id in exclude:
+                    continue
+                free, capacity, location = self.bins[bin_id]
+                suggestions.append({'bin_id': bin_id, 'location': location, 'capacity': capacity, 'free_slots': free})
+                if len(suggestions) >= limit:
+                    break
+            return suggestions
+
+    def stats(self):
+        with self.lock:
+            return {
+                'bins': len(self.bins),
+                'zones': len(self.zones),
+                'free_slots': sum(entry[0] for entry in self.bins.values()),
+                'version': self.last_version,
+            }
+
+
+index = SlottingIndex()
+
+
+def query_suggestions(zone='', count=1, strategy='fill', exclude=(), limit=3):
+    """:meth:`SlottingIndex.suggest` straight from the database (index switched off)"""
+    bins = Bin.objects.filter(status='available').annotate(free_slots=F('capacity') - F('occupied_count'))
+    bins = bins.filter(free_slots__gte=max(count, 1))
+    if zone:
+        bins = bins.filter(**prefix_filter('bin_id', zone))
+    if exclude:
+        bins = bins.exclude(bin_id__in=list(exclude))
+    ordering = ('free_slots', 'bin_id') if strategy == 'fill' else ('-free_slots', 'bin_id')
+    return list(bins.order_by(*ordering).values('bin_id', 'location', 'capacity', 'free_slots')[:limit])
+
+
+def suggest_bins(zone='', count=1, strategy='fill', exclude=(), limit=3):
+    """Bins with room for ``count`` packages in ``zone`` (a bin ID prefix), best first"""
+    if not slotting_enabled():
+        return query_suggestions(zone, count, strategy, exclude, limit)
+    return index.suggest(zone, count, strategy, exclude, limit)
+
+
+def warm():
+    try:
+        index.sync()
+    except DatabaseError:
+        # E.g. not migrated yet; the first suggest_bin builds the index instead
+        logger.warning('Could not build the slotting index at startup', exc_info=True)
+    finally:
+        connection.close()
+
+
+def warm_in_background():
+    """Build the index in a daemon thread so the server starts answering meanwhile"""
+    if slotting_enabled() and warm_on_startup():
+        threading.Thread(target=warm, name='slotting-warm', daemon=True).start()
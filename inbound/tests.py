@@ -1,3 +1,1834 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import logging
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Count
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from . import archive, audit, cache, conditional, events, jobs, metrics, pickpath, readers, renderers, slotting
+from .management.commands import loadtest
+from .models import AuditLog, Bin, ChangeVersion, InventoryEvent, Job, Shipment
+from .serializers import (
+    AuditLogSerializer, BinOccupancySerializer, BinSerializer, JobSerializer, ShipmentSerializer, row_serializer_for
+)
+from .services import apply_manifest, create_picklist, dispatch_bin, ingest_manifest_file
+from .urls import router
+
+logger = logging.getLogger(__name__)
+
+
+@override_settings(INBOUND_AUDIT_MODE='sync')
+class ConcurrentAssignTests(TransactionTestCase):
+    """Many scanners assigning into one bin must never overfill it"""
+
+    THREADS = 16
+    ASSIGNS_PER_THREAD = 25
+    CAPACITY = 50
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs an on-disk test database (DATABASES TEST NAME) for parallel connections')
+
+    def test_capacity_never_exceeded_under_parallel_assigns(self):
+        Bin.objects.create(bin_id='L1R1B01', capacity=self.CAPACITY)
+        outcomes = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def scanner(index):
+            client = Client()
+            start.wait()
+            try:
+                for n in range(self.ASSIGNS_PER_THREAD):
+                    response = client.post(
+                        '/api/inbound/assign/',
+                        {'bin_id': 'L1R1B01', 'tracking_id': f'RACE-{index:02d}-{n:03d}'},
+                        content_type='application/json'
+                    )
+                    with lock:
+                        outcomes.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=scanner, args=(i,)) for i in range(self.THREADS)]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        bin_obj = Bin.objects.get(bin_id='L1R1B01')
+        in_bin = Shipment.objects.filter(bin=bin_obj).count()
+
+        self.assertEqual(len(outcomes), self.THREADS * self.ASSIGNS_PER_THREAD)
+        self.assertEqual(outcomes.count(201), self.CAPACITY)
+        self.assertEqual(outcomes.count(400), len(outcomes) - self.CAPACITY)
+        self.assertEqual(in_bin, self.CAPACITY)
+        self.assertEqual(bin_obj.occupied_count, self.CAPACITY)
+        self.assertEqual(bin_obj.status, 'occupied')
+        logger.debug(
+            '%d parallel assigns from %d scanners in %.2fs (%.0f assigns/s)',
+            len(outcomes), self.THREADS, elapsed, len(outcomes) / elapsed
+        )
+
+
+@override_settings(INBOUND_AUDIT_MODE='sync')
+class ConcurrentDispatchTests(TransactionTestCase):
+    """Scanning the same package on several devices at once takes it out once"""
+
+    THREADS = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs an on-disk test database (DATABASES TEST NAME) for parallel connections')
+        self.bin = Bin.objects.create(bin_id='L1R1B01', capacity=4, occupied_count=2, status='available')
+        Shipment.objects.create(tracking_id='PKG001', bin=self.bin, status='picklist-created')
+        Shipment.objects.create(tracking_id='PKG002', bin=self.bin, status='putaway')
+
+    def post_in_parallel(self, path, data):
+        outcomes = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.THREADS)
+
+        def scanner():
+            client = Client()
+            start.wait()
+            try:
+                response = client.post(path, data, content_type='application/json')
+                with lock:
+                    outcomes.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=scanner) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(outcomes)
+
+    def test_double_dispatch(self):
+        outcomes = self.post_in_parallel('/api/outbound/dispatch_single_package/', {'tracking_id': 'PKG001'})
+
+        self.assertEqual(outcomes, [200] + [400] * (self.THREADS - 1))
+        self.bin.refresh_from_db()
+        self.assertEqual(self.bin.occupied_count, 1)
+        self.assertEqual(AuditLog.objects.filter(action='dispatched').count(), 1)
+
+    def test_double_pickup(self):
+        outcomes = self.post_in_parallel(
+            '/api/outbound/pickup_package/', {'tracking_id': 'PKG002', 'expected_tracking_id': 'PKG002'}
+        )
+
+        self.assertEqual(outcomes, [200] + [400] * (self.THREADS - 1))
+        self.assertEqual(Shipment.objects.get(pk='PKG002').status, 'picked')
+        self.assertEqual(AuditLog.objects.filter(shipment_id='PKG002').count(), 1)
+
+    def test_double_dissociate(self):
+        outcomes = self.post_in_parallel('/api/outbound/dissociate/', {'tracking_id': 'PKG002', 'bin_id': 'L1R1B01'})
+
+        self.assertEqual(outcomes, [200] + [400] * (self.THREADS - 1))
+        self.bin.refresh_from_db()
+        self.assertEqual(self.bin.occupied_count, 1)
+        self.assertEqual(AuditLog.objects.filter(action='dissociated').count(), 1)
+
+    def test_dissociate_after_a_move(self):
+        # Validated against bin L1R1B01, but moved to L1R1B02 before the transaction
+        stale = Shipment.objects.get(pk='PKG002')
+        other = Bin.objects.create(bin_id='L1R1B02', capacity=4, occupied_count=1)
+        Shipment.objects.filter(pk='PKG002').update(bin=other)
+        with mock.patch.object(Shipment.objects, 'get', return_value=stale):
+            response = Client().post('/api/outbound/dissociate/', {'tracking_id': 'PKG002', 'bin_id': 'L1R1B01'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Shipment.objects.get(pk='PKG002').status, 'putaway')
+        self.assertEqual(
+            list(Bin.objects.order_by('bin_id').values_list('occupied_count', flat=True)), [2, 1]
+        )
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_stale_read(self):
+        # The status check before the transaction saw 'picklist-created', but
+        # another request dispatched the package in between
+        stale = Shipment.objects.get(pk='PKG001')
+        Shipment.objects.filter(pk='PKG001').update(status='dispatched', bin=None)
+        with mock.patch.object(Shipment.objects, 'get', return_value=stale):
+            response = Client().post('/api/outbound/dispatch_single_package/', {'tracking_id': 'PKG001'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dispatched', response.json()['error'])
+        self.bin.refresh_from_db()
+        self.assertEqual(self.bin.occupied_count, 2)
+        self.assertFalse(AuditLog.objects.exists())
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook that keeps every SELECT/UPDATE/DELETE a request issues"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@override_settings(INBOUND_CACHE_ENABLED=False)
+class QueryPlanTests(TestCase):
+    """Every query the viewsets issue must hit an index on the big tables"""
+
+    CHECKED_TABLES = ('inbound_shipment', 'inbound_auditlog')
+    # "SCAN inbound_shipment" with no "USING ... INDEX" is a full table scan
+    # (older SQLite versions print "SCAN TABLE ...")
+    FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+    @classmethod
+    def setUpTestData(cls):
+        Bin.objects.create(bin_id='L1R1B01', capacity=10, occupied_count=3, status='available')
+        Bin.objects.create(bin_id='L1R1B02', capacity=10, occupied_count=1, status='available')
+        Bin.objects.create(bin_id='L2R1B01', capacity=10)
+        for n, shipment_status in enumerate(['putaway', 'picked', 'picklist-created']):
+            shipment = Shipment.objects.create(
+                tracking_id=f'PKG{n:03d}', bin_id='L1R1B01', status=shipment_status, manifested=True
+            )
+            AuditLog.objects.create(action='assigned', shipment=shipment, details='seed')
+        Shipment.objects.create(tracking_id='PKG100', bin_id='L1R1B02', status='putaway')
+        Shipment.objects.create(tracking_id='PKG200', status='manifested', manifested=True)
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScans(self, method, url, data=None, **extra):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertLess(response.status_code, 500, url)
+        self.assertTrue(recorder.statements, f'{url} issued no queries')
+
+        for sql, params in recorder.statements:
+            for detail in self.explain(sql, params):
+                match = self.FULL_SCAN.match(detail)
+                if match and match.group(1) in self.CHECKED_TABLES:
+                    self.fail(f'{method.upper()} {url} does a full scan of {match.group(1)}:\n{sql}')
+
+    def test_read_endpoints(self):
+        for url in [
+            '/api/bins/', '/api/bins/L1R1B01/',
+            '/api/bins/?status=available&status=occupied', '/api/bins/?zone=L1R1', '/api/bins/?search=L1R1B0',
+            '/api/shipments/', '/api/shipments/PKG000/',
+            '/api/shipments/?status=putaway&status=picked', '/api/shipments/?bin=L1R1B01',
+            '/api/shipments/?zone=L1R1', '/api/shipments/?manifested=true',
+            '/api/shipments/?time_in_after=2020-01-01&time_in_before=2030-01-01',
+            '/api/shipments/?time_out_after=2020-01-01', '/api/shipments/?search=PKG1',
+            '/api/audit-logs/', f'/api/audit-logs/{AuditLog.objects.first().pk}/',
+            '/api/inventory/summary/', '/api/inventory/summary/?zone=L1',
+            '/api/inventory/bins/?status=available&zone=L1&ordering=-package_count',
+            '/api/jobs/',
+        ]:
+            with self.subTest(url=url):
+                self.assertNoFullScans('get', url)
+
+    def test_write_endpoints(self):
+        json_posts = [
+            ('/api/inbound/scan_bin/', {'bin_id': 'L2R1B01'}),
+            ('/api/inbound/assign/', {'bin_id': 'L2R1B01', 'tracking_id': 'PKG200'}),
+            ('/api/inbound/process_manifest/', {'tracking_ids': ['PKG300', 'PKG100']}),
+            ('/api/outbound/search_package/', {'tracking_id': 'PKG000'}),
+            ('/api/outbound/search_bin/', {'bin_id': 'L1R1B01'}),
+            ('/api/outbound/get_bin_packages/', {'bin_id': 'L1R1B01'}),
+            ('/api/outbound/pickup_package/', {'tracking_id': 'PKG000', 'expected_tracking_id': 'PKG000'}),
+            ('/api/outbound/dispatch_single_package/', {'tracking_id': 'PKG002'}),
+            ('/api/outbound/dispatch_packages/', {'bin_id': 'L1R1B01', 'expected_bin_id': 'L1R1B01'}),
+            ('/api/outbound/dissociate/', {'tracking_id': 'PKG100', 'bin_id': 'L1R1B02'}),
+        ]
+        for url, data in json_posts:
+            with self.subTest(url=url):
+                self.assertNoFullScans('post', url, data, content_type='application/json')
+
+        uploads = [
+            ('/api/inbound/upload_manifest/', 'manifest.csv', b'Tracking Id\nPKG400\nPKG000\n'),
+            ('/api/outbound/process_picklist_file/', 'picklist.csv', b'tracking_id\nPKG000\nPKG999\n'),
+        ]
+        for url, name, content in uploads:
+            with self.subTest(url=url):
+                self.assertNoFullScans('post', url, {'file': SimpleUploadedFile(name, content)})
+
+        with self.subTest(url='/api/shipments/PKG200/'):
+            self.assertNoFullScans(
+                'patch', '/api/shipments/PKG200/', {'bin': 'L1R1B02'}, content_type='application/json'
+            )
+        for url in ['/api/shipments/PKG001/', '/api/bins/L1R1B01/']:
+            with self.subTest(url=url):
+                self.assertNoFullScans('delete', url)
+
+
+def manifest_upload():
+    return {'file': SimpleUploadedFile('manifest.csv', b'Tracking Id\nNEW001\nPKG-PUT\n')}
+
+
+def picklist_upload():
+    return {'file': SimpleUploadedFile('picklist.csv', b'tracking_id\nPKG-PUT\nMISSING1\n')}
+
+
+@override_settings(INBOUND_CACHE_ENABLED=False, INBOUND_SLOTTING_INDEX=False)
+class QueryBudgetTests(TestCase):
+    """Every route has a query budget that must not grow with the table sizes"""
+
+    SIZES = (5, 40)
+
+    # (url name, method, url, request data, budget); ``{job}`` / ``{log}`` are
+    # filled in with seeded primary keys, callables build multipart uploads
+    ROUTES = [
+        ('api-root', 'get', '/api/', None, 0),
+        ('bin-list', 'get', '/api/bins/', None, 3),
+        ('bin-list', 'get', '/api/bins/?status=available,occupied&zone=Z', None, 3),
+        ('bin-list', 'post', '/api/bins/', {'bin_id': 'NEWBIN', 'capacity': 4}, 8),
+        ('bin-detail', 'get', '/api/bins/DOCK01/', None, 2),
+        ('bin-detail', 'patch', '/api/bins/DOCK01/', {'location': 'Dock'}, 8),
+        ('bin-detail', 'delete', '/api/bins/Z000/', None, 10),
+        ('shipment-list', 'get', '/api/shipments/', None, 2),
+        ('shipment-list', 'post', '/api/shipments/', {'tracking_id': 'NEW002', 'bin': 'DOCK01'}, 10),
+        ('shipment-detail', 'get', '/api/shipments/PKG-PUT/', None, 2),
+        ('shipment-detail', 'patch', '/api/shipments/PKG-PUT/', {'bin': 'Z001'}, 11),
+        ('shipment-detail', 'delete', '/api/shipments/S0002/', None, 10),
+        ('shipment-history', 'get', '/api/shipments/S0001/history/', None, 2),
+        ('auditlog-list', 'get', '/api/audit-logs/', None, 1),
+        ('auditlog-detail', 'get', '/api/audit-logs/{log}/', None, 1),
+        ('inventory-summary', 'get', '/api/inventory/summary/?zone=Z', None, 3),
+        ('inventory-bins', 'get', '/api/inventory/bins/?status=available&ordering=-package_count', None, 3),
+        ('inventory-cache', 'get', '/api/inventory/cache/', None, 0),
+        ('job-list', 'get', '/api/jobs/', None, 2),
+        ('job-list', 'post', '/api/jobs/', {'kind': 'export'}, 1),
+        ('job-detail', 'get', '/api/jobs/{job}/', None, 1),
+        ('job-result', 'get', '/api/jobs/{job}/result/', None, 1),
+        ('job-download', 'get', '/api/jobs/{job}/download/', None, 1),
+        ('inbound-process-scan-bin', 'post', '/api/inbound/scan_bin/', {'bin_id': 'Z003'}, 1),
+        ('inbound-process-scan-package', 'post', '/api/inbound/scan_package/', {'tracking_id': 'NEW003'}, 0),
+        ('inbound-process-suggest-bin', 'get', '/api/inbound/suggest_bin/?count=2&zone=Z', None, 1),
+        ('inbound-process-assign', 'post', '/api/inbound/assign/', {'bin_id': 'DOCK01', 'tracking_id': 'NEW004'}, 11),
+        ('inbound-process-process-manifest', 'post', '/api/inbound/process_manifest/',
+         {'tracking_ids': ['NEW005', 'PKG-PUT']}, 12),
+        ('inbound-process-upload-manifest', 'post', '/api/inbound/upload_manifest/', manifest_upload, 12),
+        ('outbound-process-search-package', 'post', '/api/outbound/search_package/', {'tracking_id': 'PKG-PUT'}, 2),
+        ('outbound-process-search-package', 'get', '/api/outbound/search_package/?tracking_id=PKG-PUT', None, 4),
+        ('outbound-process-search-bin', 'get', '/api/outbound/search_bin/?bin_id=DOCK01', None, 2),
+        ('outbound-process-search-bin', 'post', '/api/outbound/search_bin/', {'bin_id': 'DOCK01'}, 1),
+        ('outbound-process-get-bin-packages', 'post', '/api/outbound/get_bin_packages/', {'bin_id': 'DOCK01'}, 1),
+        ('outbound-process-dissociate', 'post', '/api/outbound/dissociate/',
+         {'tracking_id': 'PKG-PUT', 'bin_id': 'DOCK01'}, 12),
+        ('outbound-process-pickup-package', 'post', '/api/outbound/pickup_package/',
+         {'tracking_id': 'PKG-PUT', 'expected_tracking_id': 'PKG-PUT'}, 9),
+        ('outbound-process-dispatch-packages', 'post', '/api/outbound/dispatch_packages/',
+         {'bin_id': 'DOCK01', 'expected_bin_id': 'DOCK01'}, 13),
+        ('outbound-process-process-picklist-file', 'post', '/api/outbound/process_picklist_file/', picklist_upload, 9),
+        ('outbound-process-dispatch-single-package', 'post', '/api/outbound/dispatch_single_package/',
+         {'tracking_id': 'PKG-PLC'}, 10),
+    ]
+
+    def seed(self, size):
+        """Shipments the routes act on, plus ``size`` rows in every table (and picked in DOCK01)"""
+        dock = Bin.objects.create(bin_id='DOCK01', capacity=size + 10, occupied_count=size + 2)
+        Shipment.objects.bulk_create(
+            [Shipment(tracking_id=f'PKG-PICKED{n}', bin=dock, status='picked') for n in range(size)] + [
+                Shipment(tracking_id='PKG-PUT', bin=dock, status='putaway'),
+                Shipment(tracking_id='PKG-PLC', bin=dock, status='picklist-created'),
+            ]
+        )
+
+        bins = Bin.objects.bulk_create(
+            [Bin(bin_id=f'Z{n:03d}', capacity=5, occupied_count=1) for n in range(size)]
+        )
+        shipments = Shipment.objects.bulk_create(
+            [Shipment(tracking_id=f'S{n:04d}', bin=bins[n], status='putaway') for n in range(size)]
+        )
+        AuditLog.objects.bulk_create([AuditLog(action='assigned', shipment=s) for s in shipments])
+        Job.objects.bulk_create([Job(kind='export', status='queued') for n in range(size)])
+
+        job = Job.objects.create(kind='export', status='succeeded', result={'file': 'missing.csv'})
+        return {'job': job.pk, 'log': AuditLog.objects.values_list('pk', flat=True).first()}
+
+    def call(self, method, url, data):
+        if callable(data):
+            return getattr(self.client, method)(url, data())
+        return getattr(self.client, method)(url, data, content_type='application/json')
+
+    def measure(self, size):
+        """Query count of every route against freshly seeded data of ``size`` rows"""
+        counts = {}
+        with transaction.atomic():
+            keys = self.seed(size)
+            for name, method, route_url, data, budget in self.ROUTES:
+                url = route_url.format(**keys)
+                with transaction.atomic():
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.call(method, url, data)
+                    transaction.set_rollback(True)
+                self.assertLess(response.status_code, 500, f'{method.upper()} {url}')
+                counts[method, route_url] = len(queries)
+            transaction.set_rollback(True)
+        return counts
+
+    def test_every_route_has_a_budget(self):
+        routed = {url.name for url in router.urls}
+        budgeted = {name for name, *rest in self.ROUTES}
+        self.assertEqual(routed - budgeted, set())
+
+    def test_query_counts_within_budget_and_flat(self):
+        small, large = (self.measure(size) for size in self.SIZES)
+        for name, method, url, data, budget in self.ROUTES:
+            with self.subTest(route=name, method=method, url=url):
+                self.assertLessEqual(small[method, url], budget)
+                self.assertEqual(
+                    large[method, url], small[method, url],
+                    f'{method.upper()} {url} query count grows with row count'
+                )
+
+
+class JSONReaderTests(TestCase):
+    """The streaming JSON reader gives json.loads' answer whatever the read size"""
+
+    DOCUMENT = (
+        '[ "PKG001", {"tracking_id": "PKG\\"002\\""}, 123456789012, {"Tracking Id": " pkg003 "},'
+        ' "", {"other": 1}, "caf\\u00e9\\\\", -1.5e3 ]'
+    )
+    EXPECTED = ['PKG001', 'PKG"002"', '123456789012', 'pkg003', 'caf\u00e9\\', '-1500.0']
+
+    def read(self, text, read_size):
+        with override_settings(INBOUND_UPLOAD_READ_SIZE=read_size):
+            return list(readers.iter_json_tracking_ids(StringIO(text)))
+
+    def test_values_split_across_reads(self):
+        # Read sizes from 1 character up put every token and number across a boundary somewhere
+        for read_size in range(1, len(self.DOCUMENT) + 2):
+            with self.subTest(read_size=read_size):
+                self.assertEqual(self.read(self.DOCUMENT, read_size), self.EXPECTED)
+
+    def test_object_form(self):
+        document = '{"source": {"ids": [1, 2]}, "tracking_ids": ["PKG001", {"trackingId": "PKG002"}], "n": 3}'
+        for read_size in (1, 5, 64):
+            with self.subTest(read_size=read_size):
+                self.assertEqual(self.read(document, read_size), ['PKG001', 'PKG002'])
+        self.assertEqual(self.read('[]', 1), [])
+        self.assertEqual(self.read(' {"tracking_ids": []} ', 1), [])
+
+    def test_malformed(self):
+        for document in ['', '"PKG001"', '{"ids": ["PKG001"]}', '["PKG001" "PKG002"]', '["PKG001",', '[tru]',
+                         '{"tracking_ids" ["PKG001"]}']:
+            with self.subTest(document=document), self.assertRaises(ValueError):
+                self.read(document, 4)
+
+    def test_picklist_ids(self):
+        upload = SimpleUploadedFile('picklist.json', b'{"tracking_ids": ["pkg001", {"tracking_id": "pkg002"}]}')
+        self.assertEqual(readers.read_picklist_tracking_ids(upload), ['PKG001', 'PKG002'])
+
+    def test_malformed_upload_is_a_400(self):
+        for name, path in (('file', '/api/inbound/upload_manifest/'), ('file', '/api/outbound/process_picklist_file/')):
+            with self.subTest(path=path):
+                upload = SimpleUploadedFile('broken.json', b'["PKG001", "PKG0')
+                response = self.client.post(path, {name: upload})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('Invalid JSON', json.dumps(response.json()))
+        self.assertFalse(Shipment.objects.exists())
+
+
+class InventoryAggregateTests(TestCase):
+    """summary and bins give the counts the dashboard used to work out from every row"""
+
+    def setUp(self):
+        Bin.objects.bulk_create([
+            Bin(bin_id='L1R1B01', capacity=3),
+            Bin(bin_id='L1R1B02', capacity=2),
+            Bin(bin_id='L1R2B01', capacity=4),
+            Bin(bin_id='L2R1B01', capacity=5),
+            Bin(bin_id='L2R1B02', capacity=6),
+        ])
+        placements = {'L1R1B01': 3, 'L1R1B02': 1, 'L1R2B01': 2, 'L2R1B01': 2}
+        for bin_id, count in placements.items():
+            for n in range(count):
+                response = self.post('/api/inbound/assign/', {'bin_id': bin_id, 'tracking_id': f'{bin_id}-{n}'})
+                self.assertEqual(response.status_code, 201)
+        apply_manifest(['MAN001', 'MAN002', 'L1R1B01-0'], 'tester')
+        create_picklist(['L1R1B01-1', 'L1R2B01-0', 'L2R1B01-0'], 'tester')
+        self.post('/api/outbound/pickup_package/', {'tracking_id': 'L1R1B02-0', 'expected_tracking_id': 'L1R1B02-0'})
+        self.post('/api/outbound/dispatch_single_package/', {'tracking_id': 'L2R1B01-0'})
+        Bin.objects.filter(bin_id='L2R1B02').update(status='maintenance')
+
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def baseline(self, zone=''):
+        """The old client-side figures, counted from every bin and shipment row"""
+        bins = [row for row in Bin.objects.values('bin_id', 'capacity', 'status') if row['bin_id'].startswith(zone)]
+        shipments = [
+            row for row in Shipment.objects.values('bin_id', 'status')
+            if not zone or (row['bin_id'] or '').startswith(zone)
+        ]
+        per_bin = {}
+        for row in shipments:
+            if row['bin_id']:
+                per_bin[row['bin_id']] = per_bin.get(row['bin_id'], 0) + 1
+        status_counts = {}
+        for row in shipments:
+            status_counts[row['status']] = status_counts.get(row['status'], 0) + 1
+        return bins, per_bin, status_counts
+
+    def test_summary_matches_row_counts(self):
+        for zone in ('', 'L1', 'L1R1', 'L2'):
+            with self.subTest(zone=zone):
+                bins, per_bin, status_counts = self.baseline(zone)
+                summary = self.client.get('/api/inventory/summary/', {'zone': zone}).json()
+
+                total_capacity = sum(row['capacity'] for row in bins)
+                used_capacity = sum(per_bin.values())
+                self.assertEqual(summary['status_counts'], status_counts)
+                self.assertEqual(summary['total_packages'], sum(status_counts.values()))
+                self.assertEqual(summary['total_bins'], len(bins))
+                self.assertEqual(summary['bins_in_use'], len(per_bin))
+                self.assertEqual(summary['available_bins'], len(bins) - len(per_bin))
+                self.assertEqual(summary['maintenance_bins'], sum(row['status'] == 'maintenance' for row in bins))
+                self.assertEqual((summary['total_capacity'], summary['used_capacity']), (total_capacity, used_capacity))
+                self.assertEqual(summary['utilization_rate'], round(used_capacity * 100 / total_capacity, 1))
+
+        # Every status is represented in the fixture
+        self.assertEqual(
+            self.client.get('/api/inventory/summary/').json()['status_counts'],
+            {'putaway': 3, 'manifested': 3, 'picklist-created': 2, 'picked': 1, 'dispatched': 1}
+        )
+
+    def test_bins_match_row_counts(self):
+        bins, per_bin, status_counts = self.baseline()
+        listed = []
+        url = '/api/inventory/bins/?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            listed.extend(page['results'])
+            url = page['next']
+
+        self.assertEqual(
+            [(row['bin_id'], row['status'], row['package_count'], row['utilization_percent']) for row in listed],
+            [
+                (row['bin_id'], row['status'], per_bin.get(row['bin_id'], 0),
+                 round(per_bin.get(row['bin_id'], 0) * 100 / row['capacity']))
+                for row in sorted(bins, key=lambda row: row['bin_id'])
+            ]
+        )
+        by_count = self.client.get('/api/inventory/bins/', {'ordering': '-package_count', 'zone': 'L1'}).json()
+        self.assertEqual([row['package_count'] for row in by_count['results']], [3, 2, 1])
+
+
+class ManifestTests(TestCase):
+    """Bulk manifest chunks report, audit and fail independently"""
+
+    def setUp(self):
+        Bin.objects.create(bin_id='L1R1B01', capacity=5, occupied_count=1)
+        Shipment.objects.create(tracking_id='PKG001', bin_id='L1R1B01', status='putaway')
+
+    def audits(self):
+        return list(AuditLog.objects.order_by('shipment_id', 'pk').values_list('shipment_id', 'user', 'details'))
+
+    def test_created_updated_failed(self):
+        created, updated, failed = apply_manifest(['PKG002', 'PKG001', 'PKG003'], 'tester', chunk_size=2)
+
+        self.assertEqual((created, updated, failed), (['PKG002', 'PKG003'], ['PKG001'], []))
+        shipments = Shipment.objects.order_by('tracking_id')
+        self.assertEqual(
+            list(shipments.values_list('tracking_id', 'status', 'manifested', 'bin_id')),
+            [('PKG001', 'manifested', True, 'L1R1B01'), ('PKG002', 'manifested', True, None),
+             ('PKG003', 'manifested', True, None)]
+        )
+        self.assertEqual(self.audits(), [
+            ('PKG001', 'tester', 'Status updated to manifested via manifest upload'),
+            ('PKG002', 'tester', 'Shipment created with manifested status via manifest upload'),
+            ('PKG003', 'tester', 'Shipment created with manifested status via manifest upload'),
+        ])
+
+    def test_duplicate_ids(self):
+        # Within a chunk a repeat is applied once; in a later chunk it updates
+        created, updated, failed = apply_manifest(['PKG002', 'PKG002', 'PKG003', 'PKG002'], 'tester', chunk_size=3)
+
+        self.assertEqual((created, updated, failed), (['PKG002', 'PKG003'], ['PKG002'], []))
+        self.assertEqual(
+            [audit_row[:1] + audit_row[2:] for audit_row in self.audits()],
+            [('PKG002', 'Shipment created with manifested status via manifest upload'),
+             ('PKG002', 'Status updated to manifested via manifest upload'),
+             ('PKG003', 'Shipment created with manifested status via manifest upload')]
+        )
+
+    def test_failed_chunk_rolls_back_alone(self):
+        bulk_create = AuditLog.objects.bulk_create
+
+        def fail_second_chunk(rows, **kwargs):
+            if any(row.shipment_id == 'PKG004' for row in rows):
+                raise DatabaseError('disk full')
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=fail_second_chunk):
+            created, updated, failed = apply_manifest(
+                ['PKG002', 'PKG003', 'PKG004', 'PKG001', 'PKG005'], 'tester', chunk_size=2
+            )
+
+        self.assertEqual(created, ['PKG002', 'PKG003', 'PKG005'])
+        self.assertEqual(updated, [])
+        self.assertEqual(failed, [
+            {'tracking_id': 'PKG004', 'reason': 'disk full'}, {'tracking_id': 'PKG001', 'reason': 'disk full'}
+        ])
+        # The failed chunk's insert and update are undone, the others committed
+        self.assertFalse(Shipment.objects.filter(tracking_id='PKG004').exists())
+        self.assertEqual(Shipment.objects.get(tracking_id='PKG001').status, 'putaway')
+        self.assertEqual(
+            [audit_row[0] for audit_row in self.audits()], ['PKG002', 'PKG003', 'PKG005']
+        )
+
+    def test_ingest_file_result(self):
+        upload = SimpleUploadedFile('manifest.csv', b'Tracking Id\nPKG001\nPKG002\nPKG003\n')
+        with override_settings(INBOUND_UPLOAD_ID_SAMPLE_SIZE=1):
+            result = ingest_manifest_file(upload, 'tester', chunk_size=2)
+
+        self.assertEqual(result, {
+            'total_processed': 3,
+            'created_count': 2,
+            'updated_count': 1,
+            'failed_count': 0,
+            'created_ids': ['PKG002'],
+            'updated_ids': ['PKG001'],
+            'failed_ids': [],
+            'ids_truncated': True,
+        })
+
+
+class PicklistTests(TestCase):
+    """Bulk picklist creation reports the same as the old row-by-row loop"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Bin.objects.create(bin_id='L1R1B01', capacity=10, occupied_count=3)
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id='PKG001', bin_id='L1R1B01', status='putaway'),
+            Shipment(tracking_id='PKG002', bin_id='L1R1B01', status='putaway'),
+            Shipment(tracking_id='PKG003', bin_id='L1R1B01', status='picked'),
+        ])
+
+    EXPECTED = {
+        'packages': [
+            {'tracking_id': 'PKG001', 'bin_id': 'L1R1B01', 'status': 'picklist-created', 'wave': 1},
+            {'tracking_id': 'PKG002', 'bin_id': 'L1R1B01', 'status': 'picklist-created', 'wave': 1},
+        ],
+        'found_count': 2,
+        'not_found': ['MISSING', 'PKG003 (status: picked)', 'PKG001 (status: picklist-created)'],
+        'not_found_count': 3,
+        'waves': [
+            {'wave': 1, 'package_count': 2, 'stops': [{'bin_id': 'L1R1B01', 'tracking_ids': ['PKG001', 'PKG002']}]},
+        ],
+    }
+
+    def test_report_across_chunks(self):
+        result = create_picklist(['PKG001', 'MISSING', 'PKG003', 'PKG001', 'PKG002'], 'tester', chunk_size=2)
+        self.assertEqual(result, self.EXPECTED)
+        self.assertEqual(Shipment.objects.filter(status='picklist-created').count(), 2)
+        self.assertEqual(AuditLog.objects.filter(details__endswith='added to picklist').count(), 2)
+
+    def test_json_upload(self):
+        upload = SimpleUploadedFile(
+            'picklist.json', b'{"wave": 7, "tracking_ids": ["pkg001", "MISSING", "PKG003", "PKG001", " pkg002 "]}'
+        )
+        response = self.client.post('/api/outbound/process_picklist_file/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'success': True, **self.EXPECTED})
+
+
+class PickPathTests(TestCase):
+    """Picklists come back grouped by bin along a serpentine walk, in waves"""
+
+    def test_walk_order(self):
+        bin_ids = ['L2R1B01', 'DOCK', 'L1R2B01', 'L1R1B10', None, 'L2R2B03', 'L1R1B02', 'L1R2B02',
+                   'L2R2B01', 'L1R1B01']
+        self.assertEqual(pickpath.walk_order(bin_ids), [
+            'L1R1B01', 'L1R1B02', 'L1R1B10',
+            # Back along the next row, then level 2 starts at its far row
+            'L1R2B02', 'L1R2B01',
+            'L2R2B01', 'L2R2B03',
+            'L2R1B01',
+            'DOCK', None,
+        ])
+
+    def test_waves(self):
+        packages = [{'tracking_id': f'P{n}', 'bin_id': bin_id}
+                    for n, bin_id in enumerate(['L1R2B01', 'L1R1B01', 'L1R2B01', 'L1R1B01', 'L1R1B02'])]
+        ordered, waves = pickpath.plan_route(packages, wave_size=2)
+        self.assertEqual([(p['tracking_id'], p['wave']) for p in ordered],
+                         [('P1', 1), ('P3', 1), ('P4', 2), ('P0', 2), ('P2', 3)])
+        self.assertEqual(waves[1], {'wave': 2, 'package_count': 2, 'stops': [
+            {'bin_id': 'L1R1B02', 'tracking_ids': ['P4']},
+            {'bin_id': 'L1R2B01', 'tracking_ids': ['P0']},
+        ]})
+        self.assertEqual(waves[2]['stops'], [{'bin_id': 'L1R2B01', 'tracking_ids': ['P2']}])
+        self.assertEqual(len(pickpath.plan_route(packages, wave_size=0)[1]), 1)
+
+    def test_upload_wave_size(self):
+        Bin.objects.bulk_create([Bin(bin_id=f'L1R{row}B01', capacity=5, occupied_count=2) for row in (1, 2)])
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id=f'PKG{row}{n}', bin_id=f'L1R{row}B01', status='putaway')
+            for row in (1, 2) for n in range(2)
+        ])
+        upload = SimpleUploadedFile('picklist.csv', b'Tracking Id\nPKG20\nPKG10\nPKG21\nPKG11\n')
+        data = self.client.post('/api/outbound/process_picklist_file/', {'file': upload, 'wave_size': 3}).json()
+        self.assertEqual([p['tracking_id'] for p in data['packages']], ['PKG10', 'PKG11', 'PKG20', 'PKG21'])
+        self.assertEqual([wave['package_count'] for wave in data['waves']], [3, 1])
+
+        for wave_size in ('x', -5, '2.5'):
+            upload = SimpleUploadedFile('picklist.csv', b'Tracking Id\nPKG20\n')
+            response = self.client.post('/api/outbound/process_picklist_file/', {'file': upload, 'wave_size': wave_size})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('wave_size', response.json()['errors'])
+
+    def test_job_wave_size(self):
+        upload = SimpleUploadedFile('picklist.csv', b'Tracking Id\nPKG20\n')
+        response = self.client.post('/api/jobs/', {
+            'kind': 'picklist', 'file': upload, 'payload': json.dumps({'wave_size': -5})
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('wave_size', response.json()['errors']['payload'])
+
+        upload = SimpleUploadedFile('picklist.csv', b'Tracking Id\nPKG20\n')
+        response = self.client.post('/api/jobs/', {
+            'kind': 'picklist', 'file': upload, 'payload': json.dumps({'wave_size': '10'})
+        })
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().payload['wave_size'], 10)
+
+    def test_negative_wave_size(self):
+        with self.assertRaises(ValueError):
+            pickpath.plan_route([{'tracking_id': 'P1', 'bin_id': 'L1R1B01'}], wave_size=-5)
+
+
+class DispatchTests(TestCase):
+    """A bin is dispatched completely or not at all"""
+
+    def setUp(self):
+        self.bin = Bin.objects.create(bin_id='L1R1B01', capacity=4, occupied_count=4, status='occupied')
+        Shipment.objects.bulk_create(
+            [Shipment(tracking_id=f'PKG{n:03d}', bin=self.bin, status='picked') for n in range(3)]
+            + [Shipment(tracking_id='PKG999', bin=self.bin, status='putaway')]
+        )
+
+    def test_dispatches_picked_shipments(self):
+        dispatched_ids = dispatch_bin(self.bin, 'tester')
+
+        self.assertEqual(sorted(dispatched_ids), ['PKG000', 'PKG001', 'PKG002'])
+        dispatched = Shipment.objects.filter(status='dispatched')
+        self.assertEqual(dispatched.filter(bin__isnull=True).count(), 3)
+        self.assertEqual(len(set(dispatched.values_list('time_out', flat=True))), 1)
+        self.assertEqual(AuditLog.objects.filter(action='dispatched').count(), 3)
+        self.assertEqual((self.bin.occupied_count, self.bin.status), (1, 'available'))
+
+    def test_failure_leaves_bin_untouched(self):
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                dispatch_bin(self.bin, 'tester')
+
+        self.assertEqual(Shipment.objects.filter(bin=self.bin, status='picked').count(), 3)
+        self.bin.refresh_from_db()
+        self.assertEqual((self.bin.occupied_count, self.bin.status), (4, 'occupied'))
+
+    def test_nothing_to_dispatch(self):
+        Shipment.objects.filter(status='picked').update(status='putaway')
+        response = self.client.post('/api/outbound/dispatch_packages/',
+                                    {'bin_id': 'L1R1B01', 'expected_bin_id': 'L1R1B01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], {'bin_id': ['No picked packages found in this bin']})
+        self.assertFalse(AuditLog.objects.filter(action='dispatched').exists())
+        self.bin.refresh_from_db()
+        self.assertEqual((self.bin.occupied_count, self.bin.status), (4, 'occupied'))
+
+    def test_dispatch_job_payload(self):
+        for payload in ({}, {'bin_id': ' '}, {'bin_id': ['L1R1B01']}, {'bin_id': {'id': 'L1R1B01'}}):
+            response = self.client.post('/api/jobs/', {'kind': 'dispatch', 'payload': payload}, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertIn('bin_id', response.json()['errors']['payload'])
+
+        response = self.client.post('/api/jobs/', {'kind': 'dispatch', 'payload': {'bin_id': ' l1r1b01 '}},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get()
+        self.assertEqual(job.payload, {'bin_id': 'L1R1B01'})
+        result = jobs.HANDLERS['dispatch'](job, lambda done, total: None)
+        self.assertEqual(result['dispatched_count'], 3)
+
+
+class JobWorkerTests(TransactionTestCase):
+    """Jobs run once, stay alive while they run and are taken over from dead workers"""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs an on-disk test database (DATABASES TEST NAME) for parallel connections')
+
+    def test_submit_spools_the_upload(self):
+        with tempfile.TemporaryDirectory() as job_dir, override_settings(INBOUND_JOB_FILE_DIR=job_dir):
+            upload = SimpleUploadedFile('Manifest.CSV', b'Tracking Id\nPKG001\n')
+            job = jobs.submit('manifest', 'tester', payload={'note': 'x'}, uploaded_file=upload)
+
+            self.assertEqual((job.kind, job.user, job.status, job.attempts), ('manifest', 'tester', 'queued', 0))
+            self.assertEqual(job.payload, {'note': 'x', 'filename': 'Manifest.CSV'})
+            self.assertEqual(Path(job.input_file).parent, Path(job_dir))
+            self.assertTrue(job.input_file.endswith('.csv'))
+            self.assertEqual(Path(job.input_file).read_bytes(), b'Tracking Id\nPKG001\n')
+
+    def test_claim_next_takes_the_oldest_queued_job(self):
+        self.assertIsNone(jobs.claim_next('w1'))
+        first = Job.objects.create(kind='export')
+        second = Job.objects.create(kind='export')
+        Job.objects.create(kind='export', status='succeeded')
+
+        claimed = jobs.claim_next('w1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), ('running', 'w1', 1))
+        self.assertIsNotNone(claimed.started_at)
+        self.assertEqual(jobs.claim_next('w2').pk, second.pk)
+        self.assertIsNone(jobs.claim_next('w3'))
+
+    def test_parallel_claims_run_each_job_once(self):
+        Job.objects.bulk_create([Job(kind='export') for _ in range(20)])
+        claims = []
+        lock = threading.Lock()
+        start = threading.Barrier(4)
+
+        def worker(name):
+            start.wait()
+            try:
+                while (job := jobs.claim_next(name)) is not None:
+                    with lock:
+                        claims.append(job.pk)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(f'w{n}',)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claims), sorted(Job.objects.values_list('pk', flat=True)))
+        self.assertFalse(Job.objects.exclude(status='running').exists())
+        self.assertEqual(set(Job.objects.values_list('attempts', flat=True)), {1})
+
+    def test_run_job_stores_the_outcome(self):
+        def counts(job, progress):
+            progress(5, 10)
+            return {'success': True, 'rows': 10}
+
+        def fails(job, progress):
+            raise ValueError('No tracking IDs found in file')
+
+        with tempfile.NamedTemporaryFile(delete=False) as spooled:
+            pass
+        succeeded = Job.objects.create(kind='counts', status='running', input_file=spooled.name)
+        failed = Job.objects.create(kind='fails', status='running')
+        with mock.patch.dict(jobs.HANDLERS, {'counts': counts, 'fails': fails}):
+            jobs.run_job(succeeded)
+            jobs.run_job(failed)
+
+        succeeded.refresh_from_db()
+        self.assertEqual(succeeded.status, 'succeeded')
+        self.assertEqual(succeeded.result, {'success': True, 'rows': 10})
+        self.assertEqual((succeeded.progress_done, succeeded.progress_total), (5, 10))
+        self.assertIsNotNone(succeeded.finished_at)
+        self.assertFalse(Path(spooled.name).exists())
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'failed')
+        self.assertIsNone(failed.result)
+        self.assertIn('ValueError: No tracking IDs found in file', failed.error)
+
+    def test_requeue_stale_until_max_attempts(self):
+        long_ago = timezone.now() - timedelta(minutes=10)
+        retry = Job.objects.create(kind='export', status='running', worker='dead', attempts=2)
+        last_try = Job.objects.create(kind='export', status='running', worker='dead', attempts=3)
+        alive = Job.objects.create(kind='export', status='running', worker='w1', attempts=1)
+        Job.objects.filter(pk__in=[retry.pk, last_try.pk]).update(updated_at=long_ago)
+
+        self.assertEqual(jobs.requeue_stale(60, max_attempts=3), 1)
+
+        retry.refresh_from_db()
+        self.assertEqual((retry.status, retry.worker), ('queued', None))
+        last_try.refresh_from_db()
+        self.assertEqual((last_try.status, last_try.error), ('failed', 'Worker stopped responding'))
+        self.assertIsNotNone(last_try.finished_at)
+        self.assertEqual(Job.objects.get(pk=alive.pk).status, 'running')
+
+        # The retried job runs a third time, then is given up on for good
+        self.assertEqual(jobs.claim_next('w2').pk, retry.pk)
+        Job.objects.filter(pk=retry.pk).update(updated_at=long_ago)
+        self.assertEqual(jobs.requeue_stale(60, max_attempts=3), 0)
+        self.assertEqual(Job.objects.get(pk=retry.pk).status, 'failed')
+
+    def test_heartbeat_without_progress(self):
+        beats = []
+
+        def silent(job, progress):
+            # Never reports progress, like a dispatch holding one transaction
+            started = Job.objects.get(pk=job.pk).updated_at
+            time.sleep(0.3)
+            beats.append(Job.objects.get(pk=job.pk).updated_at > started)
+            return {'success': True}
+
+        job = Job.objects.create(kind='silent', status='running', worker='w1')
+        with mock.patch.dict(jobs.HANDLERS, {'silent': silent}), \
+                override_settings(INBOUND_JOB_HEARTBEAT_INTERVAL=0.05):
+            jobs.run_job(job)
+
+        self.assertEqual(beats, [True])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'succeeded')
+
+    def test_work_requeues_stale_jobs(self):
+        ran = []
+        stale = Job.objects.create(kind='noop', status='running', worker='dead', attempts=1)
+        Job.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(minutes=10))
+        with mock.patch.dict(jobs.HANDLERS, {'noop': lambda job, progress: ran.append(job.worker) or {}}), \
+                self.assertLogs('inbound.jobs', 'WARNING') as logs:
+            jobs.work('w1', once=True, stale_after=60)
+
+        stale.refresh_from_db()
+        self.assertEqual(logs.output, ['WARNING:inbound.jobs:w1 requeued 1 stale jobs'])
+        self.assertEqual(ran, ['w1'])
+        self.assertEqual((stale.status, stale.worker, stale.attempts), ('succeeded', 'w1', 2))
+
+    def test_work_requeues_on_an_interval(self):
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with mock.patch.object(jobs, 'requeue_stale', return_value=0) as requeue_stale, \
+                mock.patch.object(jobs.time, 'monotonic', side_effect=lambda: clock[0]), \
+                mock.patch.object(jobs.time, 'sleep', side_effect=sleep):
+            jobs.work('w1', poll_interval=20, should_stop=lambda: clock[0] >= 120, stale_after=60)
+
+        # Six idle polls 20s apart, requeueing every 30s: at 0, 40 and 80s
+        self.assertEqual(requeue_stale.call_count, 3)
+
+
+class ReconcileBinsTests(TestCase):
+    """reconcile_bins puts drifted occupancy counters and statuses back in line with the shipments"""
+
+    def setUp(self):
+        Bin.objects.bulk_create([
+            # Counts too low, too high and right, with statuses to match the wrong counts
+            Bin(bin_id='B1', capacity=2, occupied_count=0, status='available'),
+            Bin(bin_id='B2', capacity=3, occupied_count=3, status='occupied'),
+            Bin(bin_id='B3', capacity=4, occupied_count=1, status='available'),
+            Bin(bin_id='B4', capacity=2, occupied_count=5, status='maintenance'),
+        ])
+        Shipment.objects.bulk_create(
+            [Shipment(tracking_id=f'PKG1{n}', bin_id='B1', status='putaway') for n in range(2)]
+            + [Shipment(tracking_id='PKG20', bin_id='B2', status='putaway')]
+            + [Shipment(tracking_id='PKG30', bin_id='B3', status='picked')]
+            + [Shipment(tracking_id='PKG99', status='dispatched')]
+        )
+
+    def bins(self):
+        return list(Bin.objects.order_by('bin_id').values_list('bin_id', 'occupied_count', 'status'))
+
+    def reconcile(self, *args):
+        output = StringIO()
+        call_command('reconcile_bins', *args, stdout=output)
+        return output.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        before = self.bins()
+        output = self.reconcile('--dry-run')
+
+        self.assertIn('3 bins have drifted', output)
+        self.assertEqual(self.bins(), before)
+
+    def test_repairs_counts_and_statuses(self):
+        output = self.reconcile()
+
+        self.assertIn('B1: occupied_count 0 -> 2, status available -> occupied', output)
+        self.assertIn('Repaired 3 bins', output)
+        self.assertEqual(self.bins(), [
+            ('B1', 2, 'occupied'),
+            ('B2', 1, 'available'),
+            ('B3', 1, 'available'),
+            # Maintenance is kept, only the count is fixed
+            ('B4', 0, 'maintenance'),
+        ])
+        self.assertTrue(ChangeVersion.objects.filter(key=cache.bin_key('B1')).exists())
+        self.assertIn('All bin counters are consistent', self.reconcile())
+
+
+class AdminOccupancyTests(TestCase):
+    """Shipment edits in the admin keep the bin counters, like the API"""
+
+    def setUp(self):
+        Bin.objects.bulk_create([
+            Bin(bin_id='B1', capacity=2, occupied_count=2, status='occupied'),
+            Bin(bin_id='B2', capacity=2, occupied_count=0),
+        ])
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id='PKG001', bin_id='B1', status='putaway'),
+            Shipment(tracking_id='PKG002', bin_id='B1', status='putaway'),
+        ])
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(user)
+
+    def counters(self):
+        return list(Bin.objects.order_by('bin_id').values_list('bin_id', 'occupied_count', 'status'))
+
+    def change(self, tracking_id, bin_id):
+        return self.client.post(f'/admin/inbound/shipment/{tracking_id}/change/', {
+            'tracking_id': tracking_id, 'bin': bin_id, 'status': 'putaway', 'manifested': '',
+            'time_out_0': '', 'time_out_1': '',
+        })
+
+    def test_move_and_delete(self):
+        response = self.change('PKG001', 'B2')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counters(), [('B1', 1, 'available'), ('B2', 1, 'available')])
+
+        # Saving without moving changes nothing
+        self.change('PKG001', 'B2')
+        self.assertEqual(self.counters(), [('B1', 1, 'available'), ('B2', 1, 'available')])
+
+        self.client.post('/admin/inbound/shipment/PKG002/delete/', {'post': 'yes'})
+        self.assertEqual(self.counters(), [('B1', 0, 'available'), ('B2', 1, 'available')])
+
+    def test_bulk_delete(self):
+        self.change('PKG002', 'B2')
+        self.client.post('/admin/inbound/shipment/', {
+            'action': 'delete_selected', '_selected_action': ['PKG001', 'PKG002'], 'post': 'yes',
+        })
+        self.assertFalse(Shipment.objects.exists())
+        self.assertEqual(self.counters(), [('B1', 0, 'available'), ('B2', 0, 'available')])
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages cover every row once, in order, without COUNT or OFFSET"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Pairs of shipments share a time_in, so pages must break ties on tracking_id
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id=f'PKG{n:03d}', time_in=now - timedelta(seconds=n // 2))
+            for n in range(45)
+        ])
+
+    def walk(self, url, direction):
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            sql = ' '.join(query['sql'] for query in queries).upper()
+            self.assertNotIn('COUNT(', sql)
+            self.assertNotIn('OFFSET', sql)
+            pages.append([row['tracking_id'] for row in response.json()['results']])
+            url = response.json()[direction]
+        return pages
+
+    def test_pages_forward_and_back(self):
+        expected = list(Shipment.objects.order_by('-time_in', '-tracking_id').values_list('tracking_id', flat=True))
+
+        pages = self.walk('/api/shipments/', 'next')
+        self.assertEqual([len(page) for page in pages], [20, 20, 5])
+        self.assertEqual(sum(pages, []), expected)
+
+        last = self.client.get('/api/shipments/').json()['next']
+        last = self.client.get(last).json()['next']
+        previous = self.client.get(last).json()['previous']
+        self.assertEqual(self.walk(previous, 'previous'), pages[1::-1])
+
+    def test_page_number_fallback(self):
+        response = self.client.get('/api/shipments/?page=3')
+        self.assertEqual(response.json()['count'], 45)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/audit-logs/?cursor=not-a-cursor').status_code, 404)
+
+
+class ShipmentFilterTests(TestCase):
+    """Server-side shipment list filters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Bin.objects.create(bin_id='L1R1B01', capacity=5)
+        Bin.objects.create(bin_id='L2R1B01', capacity=5)
+        day = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        Shipment.objects.bulk_create([
+            Shipment(tracking_id='FK100', bin_id='L1R1B01', status='putaway', manifested=True, time_in=day),
+            Shipment(tracking_id='FK101', bin_id='L2R1B01', status='picked',
+                     time_in=day + timedelta(days=2)),
+            Shipment(tracking_id='FK200', status='dispatched', manifested=True,
+                     time_in=day + timedelta(days=1), time_out=day + timedelta(days=3)),
+        ])
+
+    def ids(self, query):
+        response = self.client.get(f'/api/shipments/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['tracking_id'] for row in response.json()['results'])
+
+    def test_filters(self):
+        self.assertEqual(self.ids('status=putaway,picked'), ['FK100', 'FK101'])
+        self.assertEqual(self.ids('status=putaway&status=dispatched'), ['FK100', 'FK200'])
+        self.assertEqual(self.ids('bin=l2r1b01'), ['FK101'])
+        self.assertEqual(self.ids('zone=L1'), ['FK100'])
+        self.assertEqual(self.ids('manifested=false'), ['FK101'])
+        self.assertEqual(self.ids('search=fk1'), ['FK100', 'FK101'])
+        self.assertEqual(self.ids('time_in_after=2026-03-03'), ['FK101'])
+        self.assertEqual(self.ids('time_in_after=2026-03-02&time_in_before=2026-03-02T12:00:00Z'), ['FK200'])
+        self.assertEqual(self.ids('time_out_after=2026-03-02'), ['FK200'])
+        self.assertEqual(self.ids('manifested=true&time_in_before=2026-03-02'), ['FK100'])
+
+    def test_invalid_values(self):
+        for query in ['status=lost', 'manifested=maybe', 'time_in_after=yesterday']:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/shipments/?{query}').status_code, 400)
+
+
+class BinFilterTests(TestCase):
+    """Server-side bin list filters, shared with the inventory bins listing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Bin.objects.bulk_create([
+            Bin(bin_id='L1R1B01', capacity=5),
+            Bin(bin_id='L1R1B02', capacity=1, occupied_count=1, status='occupied'),
+            Bin(bin_id='L1R2B01', capacity=5, status='maintenance'),
+            Bin(bin_id='L2R1B01', capacity=5),
+        ])
+
+    def ids(self, url, query):
+        response = self.client.get(f'{url}?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['bin_id'] for row in response.json()['results']]
+
+    def test_filters(self):
+        for url in ('/api/bins/', '/api/inventory/bins/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.ids(url, 'status=occupied,maintenance'), ['L1R1B02', 'L1R2B01'])
+                self.assertEqual(self.ids(url, 'status=available&status=occupied'), ['L1R1B01', 'L1R1B02', 'L2R1B01'])
+                self.assertEqual(self.ids(url, 'status=all'), ['L1R1B01', 'L1R1B02', 'L1R2B01', 'L2R1B01'])
+                self.assertEqual(self.ids(url, 'zone=l1r1'), ['L1R1B01', 'L1R1B02'])
+                self.assertEqual(self.ids(url, 'search=L1R2'), ['L1R2B01'])
+                self.assertEqual(self.ids(url, 'zone=L1&status=available'), ['L1R1B01'])
+                self.assertEqual(self.client.get(f'{url}?status=full').status_code, 400)
+
+
+@override_settings(INBOUND_AUDIT_MODE='buffered')
+class BufferedAuditTests(TestCase):
+    """Buffered audit rows are queued on commit and written in bulk"""
+
+    def setUp(self):
+        Shipment.objects.create(tracking_id='PKG001', status='putaway')
+        self.sink = audit.BufferedAuditSink(batch_size=50, flush_interval=60)
+        self.addCleanup(self.sink.close)
+        patcher = mock.patch.object(audit, 'sink', self.sink)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scan_queues_entry_until_flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/outbound/pickup_package/',
+                {'tracking_id': 'PKG001', 'expected_tracking_id': 'PKG001'},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AuditLog.objects.exists())
+        queued_at = self.sink.pending[0].timestamp
+
+        self.assertEqual(self.sink.flush(), 1)
+        entry = AuditLog.objects.get()
+        self.assertEqual((entry.shipment_id, entry.action), ('PKG001', 'updated'))
+        self.assertEqual(entry.timestamp, queued_at)
+
+    def test_rolled_back_work_is_not_audited(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.record('updated', 'PKG001', 'tester', 'never happened')
+                transaction.set_rollback(True)
+        self.assertEqual(self.sink.pending, [])
+
+
+class AuditArchiveTests(TestCase):
+    """Old audit rows move to monthly archives and stay readable per shipment"""
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = Path(archive_dir.name)
+        self.enterContext(override_settings(INBOUND_AUDIT_ARCHIVE_DIR=self.archive_dir))
+
+        Shipment.objects.create(tracking_id='PKG001', status='putaway')
+        Shipment.objects.create(tracking_id='PKG002', status='putaway')
+        Shipment.objects.filter(pk__in=['PKG001', 'PKG002']).update(
+            created_at=datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        for month in (1, 1, 2, 3):
+            for tracking_id in ('PKG001', 'PKG002'):
+                AuditLog.objects.create(
+                    action='updated', shipment_id=tracking_id, details=f'month {month}',
+                    timestamp=datetime(2026, month, 10, tzinfo=dt_timezone.utc)
+                )
+
+    def archive(self):
+        call_command('archive_audit_logs', before='2026-03-01', batch_size=3, stdout=StringIO())
+
+    def test_moves_old_rows_to_monthly_files(self):
+        self.archive()
+
+        self.assertEqual(
+            sorted(path.name for path in self.archive_dir.iterdir()),
+            ['audit-2026-01.ndjson.gz', 'audit-2026-02.ndjson.gz']
+        )
+        self.assertEqual(AuditLog.objects.count(), 2)
+        self.assertFalse(AuditLog.objects.filter(timestamp__lt=datetime(2026, 3, 1, tzinfo=dt_timezone.utc)).exists())
+
+    def test_history_spans_table_and_archives(self):
+        expected = list(AuditLog.objects.filter(shipment_id='PKG001').values_list('id', flat=True))
+        self.archive()
+        # A rerun after a crash between write and delete must not duplicate entries
+        archive.archive_rows(list(AuditLog.objects.filter(shipment_id='PKG001').values(*archive.ARCHIVE_FIELDS)))
+
+        response = self.client.get('/api/shipments/PKG001/history/')
+        history = response.json()['history']
+        self.assertEqual([entry['id'] for entry in history], expected)
+        self.assertEqual([entry['archived'] for entry in history], [False, True, True, True])
+        self.assertEqual(history[-1]['details'], 'month 1')
+        self.assertEqual(self.client.get('/api/shipments/NOPE/history/').status_code, 404)
+
+    def test_history_reads_only_the_shipments_months(self):
+        february = datetime(2026, 2, 5, tzinfo=dt_timezone.utc)
+        Shipment.objects.create(tracking_id='PKG003', status='dispatched')
+        Shipment.objects.filter(pk='PKG003').update(
+            created_at=february, time_in=february,
+            time_out=february + timedelta(days=20), updated_at=february + timedelta(days=20)
+        )
+        AuditLog.objects.create(action='dispatched', shipment_id='PKG003', details='february', timestamp=february)
+        self.archive()
+
+        with mock.patch.object(archive.gzip, 'open', wraps=gzip.open) as opened:
+            history = archive.shipment_history('PKG003')
+        self.assertEqual([row['details'] for row in history], ['february'])
+        self.assertEqual([Path(call.args[0]).name for call in opened.call_args_list], ['audit-2026-02.ndjson.gz'])
+
+        # Without the shipment row there are no bounds: every month is read
+        Shipment.objects.filter(pk='PKG003').delete()
+        with mock.patch.object(archive.gzip, 'open', wraps=gzip.open) as opened:
+            self.assertEqual([row['details'] for row in archive.shipment_history('PKG003')], ['february'])
+        self.assertEqual(opened.call_count, 2)
+
+
+@override_settings(INBOUND_CACHE_ENABLED=True, INBOUND_AUDIT_MODE='sync')
+class LookupCacheTests(TestCase):
+    """Cached lookups are served from memory and dropped when anyone writes"""
+
+    def setUp(self):
+        Bin.objects.create(bin_id='B1', capacity=5)
+        Bin.objects.create(bin_id='B2', capacity=5)
+        cache.lookup_cache.clear()
+        self.addCleanup(cache.lookup_cache.clear)
+
+    def post(self, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, data, content_type='application/json')
+
+    def search(self, tracking_id):
+        return self.post('/api/outbound/search_package/', {'tracking_id': tracking_id})
+
+    def test_repeat_lookup_is_a_hit(self):
+        self.post('/api/inbound/assign/', {'bin_id': 'B1', 'tracking_id': 'PKG001'})
+        self.search('PKG001')
+        # Only the coherence check reaches the database
+        with self.assertNumQueries(1):
+            response = self.search('PKG001')
+        self.assertEqual(response.json()['package']['bin']['bin_id'], 'B1')
+        stats = self.client.get('/api/inventory/cache/').json()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_writes_invalidate_lookups(self):
+        self.post('/api/inbound/assign/', {'bin_id': 'B1', 'tracking_id': 'PKG001'})
+        self.assertEqual(self.search('PKG001').json()['package']['status'], 'putaway')
+        self.assertEqual(self.post('/api/outbound/search_bin/', {'bin_id': 'B2'}).json()['package_count'], 0)
+
+        self.post('/api/inbound/assign/', {'bin_id': 'B2', 'tracking_id': 'PKG001'})
+        self.assertEqual(self.search('PKG001').json()['package']['bin']['bin_id'], 'B2')
+        self.assertEqual(self.post('/api/outbound/search_bin/', {'bin_id': 'B2'}).json()['package_count'], 1)
+
+        self.post('/api/outbound/pickup_package/', {'tracking_id': 'PKG001', 'expected_tracking_id': 'PKG001'})
+        packages = self.post('/api/outbound/get_bin_packages/', {'bin_id': 'B2'}).json()['packages']
+        self.assertEqual([package['status'] for package in packages], ['picked'])
+
+    def test_missing_bin_is_not_cached_past_creation(self):
+        self.assertEqual(self.post('/api/outbound/search_bin/', {'bin_id': 'B3'}).status_code, 404)
+        self.client.post('/api/bins/', {'bin_id': 'B3', 'capacity': 2}, content_type='application/json')
+        self.assertEqual(self.post('/api/outbound/search_bin/', {'bin_id': 'B3'}).status_code, 200)
+
+    def test_change_from_another_process_is_seen(self):
+        self.post('/api/inbound/assign/', {'bin_id': 'B1', 'tracking_id': 'PKG001'})
+        self.search('PKG001')
+        # Another worker's write: rows and version stamps change, this process's memory doesn't
+        Shipment.objects.filter(tracking_id='PKG001').update(status='picked')
+        cache.bump_versions([cache.shipment_key('PKG001')])
+
+        self.assertEqual(self.search('PKG001').json()['package']['status'], 'picked')
+
+    def test_old_shipment_stamps_are_pruned(self):
+        self.enterContext(mock.patch.object(cache, '_last_prune', None))
+        self.enterContext(override_settings(INBOUND_CHANGE_VERSION_RETENTION=60))
+        keys = lambda: set(ChangeVersion.objects.values_list('key', flat=True))
+        clock = self.enterContext(mock.patch.object(cache.time, 'monotonic', return_value=1000.0))
+
+        old = cache.bump_versions([cache.shipment_key(f'OLD{n}') for n in range(3)] + [cache.bin_key('B1')])
+        self.assertEqual(conditional.get_version([cache.shipment_key('OLD0')]), old)
+        clock.return_value = 1030.0
+        cache.bump_versions([cache.shipment_key('NEW1')])
+        self.assertTrue({cache.shipment_key('OLD0'), cache.shipment_key('NEW1')} <= keys())
+
+        # A retention period after the first stamps they go, the bin's stays
+        clock.return_value = 1061.0
+        new = cache.bump_versions([cache.shipment_key('NEW2')])
+        self.assertFalse({cache.shipment_key(f'OLD{n}') for n in range(3)} & keys())
+        self.assertTrue({cache.bin_key('B1'), cache.shipment_key('NEW1'), cache.shipment_key('NEW2')} <= keys())
+        # A pruned shipment's ETag version doesn't go back
+        self.assertEqual(conditional.get_version([cache.shipment_key('OLD0')]), old)
+        self.assertEqual(conditional.get_version([cache.shipment_key('NEW2')]), new)
+
+
+@override_settings(INBOUND_EVENTS_POLL_INTERVAL=0.05)
+class EventStreamTests(TestCase):
+    """Workflow actions publish compact events to bin/zone subscribers"""
+
+    def setUp(self):
+        Bin.objects.create(bin_id='L1R1B1', capacity=5)
+        Bin.objects.create(bin_id='L2R1B1', capacity=5)
+
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def test_actions_record_events(self):
+        self.post('/api/inbound/assign/', {'bin_id': 'L1R1B1', 'tracking_id': 'PKG001'})
+        self.post('/api/inbound/assign/', {'bin_id': 'L2R1B1', 'tracking_id': 'PKG001'})
+        self.post('/api/outbound/pickup_package/', {'tracking_id': 'PKG001', 'expected_tracking_id': 'PKG001'})
+
+        self.assertEqual(
+            list(InventoryEvent.objects.values_list('action', 'status', 'bin_id', 'previous_bin_id', 'tracking_ids')),
+            [
+                ('assigned', 'putaway', 'L1R1B1', None, ['PKG001']),
+                ('assigned', 'putaway', 'L2R1B1', 'L1R1B1', ['PKG001']),
+                ('picked', 'picked', 'L2R1B1', None, ['PKG001']),
+            ]
+        )
+
+    def test_subscription_filters(self):
+        moved = {'bin_id': 'L2R1B1', 'previous_bin_id': 'L1R1B1'}
+        self.assertTrue(events.Subscription().matches(moved))
+        self.assertTrue(events.Subscription(zones=['L1']).matches(moved))
+        self.assertTrue(events.Subscription(bins=['L2R1B1']).matches(moved))
+        self.assertFalse(events.Subscription(zones=['L3'], bins=['L1R1B2']).matches(moved))
+
+    def test_stream_needs_asgi(self):
+        self.assertEqual(self.client.get('/api/events/').status_code, 501)
+
+    async def test_stream_resumes_and_pushes_live_events(self):
+        await sync_to_async(self.post)('/api/inbound/assign/', {'bin_id': 'L1R1B1', 'tracking_id': 'PKG001'})
+        await sync_to_async(self.post)('/api/inbound/assign/', {'bin_id': 'L2R1B1', 'tracking_id': 'PKG002'})
+
+        response = await AsyncClient().get('/api/events/?zone=l2', headers={'Last-Event-ID': '0'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+            # Replayed from the log: only the zone's event
+            self.assertIn(b'"tracking_ids":["PKG002"]', await anext(chunks))
+
+            await sync_to_async(self.post)(
+                '/api/outbound/pickup_package/', {'tracking_id': 'PKG002', 'expected_tracking_id': 'PKG002'}
+            )
+            live = await asyncio.wait_for(anext(chunks), 5)
+            self.assertIn(b'"action":"picked"', live)
+        finally:
+            await chunks.aclose()
+
+    async def test_closed_stream_unsubscribes(self):
+        subscription = events.Subscription(bins=['L1R1B1'])
+        stream = events.stream(subscription)
+        await anext(stream)
+        self.assertIn(subscription, events.broker.subscribers)
+        await stream.aclose()
+        self.assertNotIn(subscription, events.broker.subscribers)
+
+
+@override_settings(INBOUND_CACHE_ENABLED=False)
+class ConditionalGetTests(TestCase):
+    """Polled reads revalidate against change versions and get 304 while nothing changed"""
+
+    def setUp(self):
+        Bin.objects.create(bin_id='B1', capacity=5)
+        Bin.objects.create(bin_id='B2', capacity=5)
+        self.post('/api/inbound/assign/', {'bin_id': 'B1', 'tracking_id': 'PKG001'})
+
+    def post(self, url, data):
+        return self.client.post(url, data, content_type='application/json')
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, headers={'If-None-Match': etag})
+
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get('/api/bins/')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Last-Modified', first)
+
+        # Only the version lookup runs: no list query, no serializer
+        with self.assertNumQueries(1):
+            response = self.revalidate('/api/bins/', first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # Same version, different representation
+        self.assertNotEqual(self.client.get('/api/bins/?status=available')['ETag'], first['ETag'])
+
+        self.post('/api/inbound/assign/', {'bin_id': 'B2', 'tracking_id': 'PKG002'})
+        changed = self.revalidate('/api/bins/', first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_write_in_the_same_second_is_not_hidden(self):
+        first = self.client.get('/api/bins/')
+        self.post('/api/inbound/assign/', {'bin_id': 'B2', 'tracking_id': 'PKG002'})
+
+        # A date-based revalidation can't tell the write apart from the first
+        # response, so it always gets the full body
+        since = datetime.now(dt_timezone.utc).strftime('%a, %d %b %Y %H:%M:%S GMT')
+        response = self.client.get('/api/bins/', headers={'If-Modified-Since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_bin_lookup_tracks_only_its_bin(self):
+        url = '/api/outbound/search_bin/?bin_id=B1'
+        etag = self.client.get(url)['ETag']
+
+        self.post('/api/inbound/assign/', {'bin_id': 'B2', 'tracking_id': 'PKG002'})
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        self.post('/api/outbound/pickup_package/', {'tracking_id': 'PKG001', 'expected_tracking_id': 'PKG001'})
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['packages'][0]['status'], 'picked')
+
+    def test_package_lookup_follows_its_bin(self):
+        url = '/api/outbound/search_package/?tracking_id=PKG001'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+        self.client.patch('/api/bins/B1/', {'status': 'maintenance'}, content_type='application/json')
+        response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['package']['bin']['status'], 'maintenance')
+
+    def test_post_lookups_are_not_conditional(self):
+        response = self.post('/api/outbound/search_bin/', {'bin_id': 'B1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite connection settings')
+class SQLiteSettingsTests(TestCase):
+    """Every connection comes up tuned for concurrent workers"""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+
+    def test_transactions_take_write_lock_up_front(self):
+        self.assertEqual(connection.settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+
+
+@override_settings(INBOUND_AUDIT_MODE='sync')
+class LoadTestCommandTests(TransactionTestCase):
+    """The load simulation drives the whole workflow without errors"""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Needs an on-disk test database (DATABASES TEST NAME) for parallel connections')
+
+    def test_operators_complete_cycles(self):
+        results = []
+
+        def operator(index):
+            results.append(loadtest.run_operator(None, f'LT-{index}', 4, 0, 2))
+
+        threads = [threading.Thread(target=operator, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report = loadtest.summarize(results, 1.0)
+
+        self.assertEqual(report['cycles'], 6)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['endpoints']['assign']['requests'], 24)
+        self.assertEqual(report['scans_per_s'], 24)
+        self.assertEqual(
+            set(report['endpoints']),
+            {'upload_manifest', 'scan_bin', 'assign', 'process_picklist_file',
+             'dispatch_single_package', 'pickup_package', 'dispatch_packages'}
+        )
+        # Every package went out and every operator's bin is empty again
+        self.assertEqual(Shipment.objects.filter(status='dispatched').count(), 24)
+        self.assertFalse(Bin.objects.filter(occupied_count__gt=0).exists())
+
+    def test_percentiles(self):
+        samples = [n / 1000 for n in range(1, 101)]
+        stats = loadtest.summarize([{'cycles': 1, 'latencies': {'assign': samples}, 'errors': {}}], 2.0)
+        assign = stats['endpoints']['assign']
+        self.assertEqual((assign['p50_ms'], assign['p95_ms'], assign['p99_ms']), (50.0, 95.0, 99.0))
+        self.assertEqual(assign['throughput_per_s'], 50.0)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.client = Client()
+
+    def scrape(self):
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_route_metrics_and_server_timing(self):
+        Bin.objects.create(bin_id='M1', capacity=5)
+        for _ in range(2):
+            response = self.client.get('/api/bins/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+;desc="serialization", total;dur=[\d.]+$'
+        )
+        self.client.get('/api/no-such-thing/')
+
+        text = self.scrape()
+        labels = 'route="bin-list",method="GET"'
+        self.assertIn(f'inbound_http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn('inbound_http_requests_total{route="unmatched",method="GET",status="404"} 1', text)
+        self.assertIn(f'inbound_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'inbound_http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'inbound_http_response_size_bytes_count{{{labels}}} 2', text)
+        queries = re.search(rf'^inbound_db_queries_total{{{labels}}} (\d+)$', text, re.M)
+        self.assertGreater(int(queries.group(1)), 0)
+
+    def test_server_errors_counted(self):
+        with mock.patch('inbound.views.BinViewSet.list', side_effect=RuntimeError('boom')):
+            with self.assertLogs('django.request', 'ERROR'):
+                client = Client(raise_request_exception=False)
+                self.assertEqual(client.get('/api/bins/').status_code, 500)
+        self.assertIn('inbound_http_request_errors_total{route="bin-list",method="GET"} 1', self.scrape())
+
+    def test_multi_process_export_sums_every_process(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(INBOUND_METRICS_DIR=directory):
+            # Another worker's totals, as it would have saved them
+            other = metrics.MetricsRegistry()
+            other.record_request('bin-list', 'GET', 200, 0.02, 100, metrics.RequestTiming())
+            Path(directory, 'metrics-999999.json').write_text(json.dumps(other.snapshot()))
+
+            self.client.get('/api/bins/')
+            text = self.scrape()
+            self.assertTrue(Path(directory, f'metrics-{os.getpid()}.json').exists())
+        self.assertIn('inbound_http_requests_total{route="bin-list",method="GET",status="200"} 2', text)
+        self.assertIn('inbound_http_request_duration_seconds_count{route="bin-list",method="GET"} 2', text)
+
+
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.directory = Path(temp_dir.name)
+        overrides = override_settings(INBOUND_PROFILE_DIR=self.directory, INBOUND_PROFILE_TOKEN='s3cret')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = Client()
+
+    def manifest(self, count=50, **headers):
+        return self.client.post(
+            '/api/inbound/process_manifest/',
+            {'tracking_ids': [f'PROF{n:04d}' for n in range(count)]},
+            content_type='application/json',
+            headers=headers
+        )
+
+    def test_header_profiles_request(self):
+        response = self.manifest(**{'X-Profile': 's3cret'})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+
+        details = json.loads((self.directory / f'{profile_id}.json').read_text())
+        self.assertEqual(details['route'], 'inbound-process-process-manifest')
+        self.assertEqual((details['status'], details['trigger']), (200, 'header'))
+        self.assertGreater(details['sql']['count'], 0)
+        self.assertEqual(len(details['sql']['statements']), details['sql']['count'])
+        self.assertIn('INSERT INTO "inbound_shipment"', ''.join(s['sql'] for s in details['sql']['statements']))
+        self.assertGreater(details['memory']['peak_kb'], 0)
+        self.assertTrue(details['memory']['top_allocations'])
+
+        stats = pstats.Stats(str(self.directory / f'{profile_id}.prof'))
+        self.assertIn('apply_manifest', {name for filename, line, name in stats.stats})
+
+    def test_not_profiled_without_matching_header(self):
+        self.assertNotIn('X-Profile-Id', self.manifest())
+        self.assertNotIn('X-Profile-Id', self.manifest(**{'X-Profile': 'guess'}))
+        self.assertFalse(list(self.directory.iterdir()))
+
+    @override_settings(INBOUND_PROFILE_SAMPLE_RATE=1.0, INBOUND_PROFILE_KEEP=2)
+    def test_sampling_keeps_newest_and_command_summarizes(self):
+        for _ in range(3):
+            self.assertIn('X-Profile-Id', self.manifest(count=5))
+        self.assertEqual(len(list(self.directory.glob('*.json'))), 2)
+        self.assertEqual(len(list(self.directory.glob('*.prof'))), 2)
+
+        out = StringIO()
+        call_command(
+            'profiles', dir=str(self.directory), route='inbound-process-process-manifest',
+            sort='cumtime', top=100, stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn('2 profiles in', output)
+        self.assertIn('across 2 profiles', output)
+        self.assertIn('apply_manifest', output)
+
+
+class SeedDataTests(TestCase):
+    OPTIONS = {
+        'levels': 1, 'rows': 2, 'bins': 3, 'capacity': 4, 'history': 3, 'days': 10,
+        'end': '2026-01-31', 'seed': 7, 'batch_size': 5,
+        'status': ['putaway=10', 'picked=2', 'dispatched=5', 'manifested=3'],
+    }
+
+    def seed(self, **options):
+        call_command('seed_data', stdout=StringIO(), **{**self.OPTIONS, **options})
+
+    def snapshot(self):
+        return list(
+            Shipment.objects.order_by('tracking_id')
+            .values_list('tracking_id', 'status', 'bin_id', 'manifested', 'time_in', 'time_out')
+        )
+
+    def test_sample_bins(self):
+        call_command('seed_data', stdout=StringIO())
+        out = StringIO()
+        call_command('seed_data', stdout=out)
+        self.assertEqual(Bin.objects.count(), 10)
+        self.assertEqual(out.getvalue().count('Bin already exists'), 10)
+
+    def test_generates_consistent_warehouse(self):
+        self.seed()
+        self.assertEqual(Bin.objects.count(), 6)
+        self.assertEqual(Shipment.objects.count(), 20)
+        self.assertEqual(AuditLog.objects.count(), 60)
+        self.assertEqual(
+            dict(Shipment.objects.values_list('status').annotate(n=Count('pk'))),
+            {'putaway': 10, 'picked': 2, 'dispatched': 5, 'manifested': 3}
+        )
+        # 12 shipments in bins, dealt evenly; counters match the rows
+        for bin_obj in Bin.objects.all():
+            self.assertEqual(bin_obj.occupied_count, 2)
+            self.assertEqual(bin_obj.shipments.count(), 2)
+        self.assertFalse(Shipment.objects.filter(status__in=['dispatched', 'manifested'], bin__isnull=False).exists())
+
+        start = datetime(2026, 1, 22, tzinfo=dt_timezone.utc)
+        end = datetime(2026, 2, 1, tzinfo=dt_timezone.utc)
+        for shipment in Shipment.objects.all():
+            self.assertTrue(start <= shipment.time_in < end)
+            history = list(shipment.audit_logs.order_by('timestamp', 'id'))
+            self.assertEqual(history[0].timestamp, shipment.time_in)
+            if shipment.status == 'dispatched':
+                self.assertEqual(history[-1].action, 'dispatched')
+                self.assertEqual(history[-1].timestamp, shipment.time_out)
+            else:
+                self.assertIsNone(shipment.time_out)
+
+    def test_deterministic_for_a_seed(self):
+        self.seed()
+        first = self.snapshot()
+        Shipment.objects.all().delete()
+        Bin.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+
+        Shipment.objects.all().delete()
+        Bin.objects.all().delete()
+        self.seed(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_refuses_to_mix_with_existing_rows(self):
+        self.seed()
+        with self.assertRaisesMessage(CommandError, 'already exist'):
+            self.seed()
+        with self.assertRaisesMessage(CommandError, 'need more than'):
+            self.seed(levels=2, status=['putaway=100'])
+
+
+@override_settings(INBOUND_SLOTTING_INDEX=True)
+class SlottingTests(TestCase):
+    """suggest_bin answers from the free-capacity index, in step with every write"""
+
+    def setUp(self):
+        Bin.objects.bulk_create([
+            Bin(bin_id='L1R1B01', capacity=4, occupied_count=3),
+            Bin(bin_id='L1R1B02', capacity=4, occupied_count=1),
+            Bin(bin_id='L1R2B01', capacity=6, occupied_count=0),
+            Bin(bin_id='L1R2B02', capacity=4, occupied_count=4, status='occupied'),
+            Bin(bin_id='L10R1B01', capacity=2, occupied_count=0),
+            Bin(bin_id='L2R1B01', capacity=9, occupied_count=0, status='maintenance'),
+            Bin(bin_id='DOCK', capacity=3, occupied_count=0),
+        ])
+        slotting.index.clear()
+        self.addCleanup(slotting.index.clear)
+
+    def suggest(self, **params):
+        return self.client.get('/api/inbound/suggest_bin/', params)
+
+    def best(self, **params):
+        return self.suggest(**params).json()['bin']['bin_id']
+
+    def test_strategies_and_zones(self):
+        self.assertEqual(self.best(), 'L1R1B01')
+        self.assertEqual(self.best(count=2), 'L10R1B01')
+        self.assertEqual(self.best(strategy='spread'), 'L1R2B01')
+        self.assertEqual(self.best(zone='l1r1', count=2), 'L1R1B02')
+        # Zones are bin ID prefixes, as in the inventory endpoints
+        self.assertEqual(self.best(zone='L1', count=2), 'L10R1B01')
+        self.assertEqual(self.best(zone='L1R1B0', strategy='spread'), 'L1R1B02')
+        self.assertEqual(self.best(exclude='L1R1B01,DOCK'), 'L10R1B01')
+        data = self.suggest(count=3, limit=5).json()
+        self.assertEqual([data['bin']['bin_id']] + [b['bin_id'] for b in data['alternatives']],
+                         ['DOCK', 'L1R1B02', 'L1R2B01'])
+        self.assertEqual(data['bin'], {'bin_id': 'DOCK', 'location': None, 'capacity': 3, 'free_slots': 3})
+
+    def test_matches_the_database_query(self):
+        cases = [
+            {}, {'count': 2}, {'count': 7}, {'zone': 'L1'}, {'zone': 'L2'}, {'zone': 'L1R2B'},
+            {'strategy': 'spread', 'limit': 10}, {'zone': 'L1', 'strategy': 'spread', 'exclude': ['L1R2B01']},
+        ]
+        for params in cases:
+            with self.subTest(**params):
+                self.assertEqual(slotting.index.suggest(**params), slotting.query_suggestions(**params))
+
+    def test_follows_assigns_and_bin_writes(self):
+        self.assertEqual(self.best(), 'L1R1B01')
+        # Warm: only the ChangeVersion check reaches the database
+        with self.assertNumQueries(1):
+            self.assertEqual(self.best(), 'L1R1B01')
+
+        self.client.post('/api/inbound/assign/', {'bin_id': 'L1R1B01', 'tracking_id': 'PKG1'},
+                         content_type='application/json')
+        self.assertEqual(self.best(), 'L10R1B01')
+        self.client.patch('/api/bins/L1R1B02/', {'status': 'maintenance'}, content_type='application/json')
+        self.client.delete('/api/bins/L10R1B01/')
+        self.assertEqual(self.best(), 'DOCK')
+
+        # A write committed by another process only shows up through its stamp
+        with transaction.atomic():
+            Bin.objects.filter(bin_id='L1R1B01').update(capacity=5, status='available')
+            cache.invalidate(bins=['L1R1B01'])
+        self.assertEqual(self.best(), 'L1R1B01')
+
+    def test_nothing_fits(self):
+        response = self.suggest(count=10)
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('bin_id', response.json()['errors'])
+        self.assertEqual(self.suggest(zone='L3').status_code, 404)
+        self.assertEqual(self.suggest(strategy='random').status_code, 400)
+
+
+@override_settings(INBOUND_CACHE_ENABLED=False)
+class FastReadTests(TestCase):
+    """The values() list path and the orjson renderer write exactly what DRF does"""
+
+    @classmethod
+    def setUpTestData(cls):
+        bins = Bin.objects.bulk_create([
+            Bin(bin_id=f'L1R1B{n:02d}', location=f'Aisle \u2028{n} – Ré', capacity=5, occupied_count=n % 3)
+            for n in range(30)
+        ])
+        base = timezone.now().replace(microsecond=123456)
+        shipments = Shipment.objects.bulk_create([
+            Shipment(
+                tracking_id=f'FAST{n:03d}', bin=bins[n % 30] if n % 4 else None, status='putaway',
+                manifested=bool(n % 2), time_in=base - timedelta(minutes=n),
+                time_out=base.replace(microsecond=0) if n % 5 == 0 else None,
+            )
+            for n in range(45)
+        ])
+        AuditLog.objects.bulk_create([
+            AuditLog(action='assigned', shipment=shipment, user='tester', details='Scan ✓')
+            for shipment in shipments
+        ])
+
+    def get_both(self, url):
+        fast = self.client.get(url)
+        with override_settings(INBOUND_FAST_READS=False, INBOUND_ORJSON=False):
+            plain = self.client.get(url)
+        return fast, plain
+
+    def test_lists_match_the_serializers(self):
+        self.assertIsNotNone(renderers.orjson)
+        for serializer_class in (BinSerializer, ShipmentSerializer, AuditLogSerializer):
+            self.assertIsNotNone(row_serializer_for(serializer_class))
+        # Method fields can't be mirrored; those keep the serializer
+        self.assertIsNone(row_serializer_for(BinOccupancySerializer))
+        self.assertIsNone(row_serializer_for(JobSerializer))
+
+        urls = ['/api/bins/', '/api/bins/?page=2', '/api/shipments/', '/api/shipments/?page=3',
+                '/api/shipments/?manifested=true', '/api/audit-logs/']
+        next_url = self.client.get('/api/shipments/').json()['next']
+        urls.append(next_url)
+        for url in urls:
+            with self.subTest(url=url):
+                fast, plain = self.get_both(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, plain.content)
+
+    def test_renderer_matches_json_renderer(self):
+        fast, plain = self.get_both('/api/outbound/search_bin/?bin_id=L1R1B01')
+        self.assertEqual(fast.content, plain.content)
+        self.assertIn(b'\\u2028', fast.content)
+
+        # Validation errors carry lazy translations; 10 ** 20 is beyond orjson's integers
+        serializer = BinSerializer(data={})
+        serializer.is_valid()
+        for data in ({'when': timezone.now(), 'errors': serializer.errors}, {'total': 10 ** 20}):
+            expected = renderers.JSONRenderer().render(data)
+            self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+            with mock.patch.object(renderers, 'orjson', None):
+                self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        indented = renderers.FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, renderers.JSONRenderer().render(data, 'application/json; indent=2'))
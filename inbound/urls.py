@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BinViewSet, ShipmentViewSet, AuditLogViewSet, InboundProcessViewSet, OutboundProcessViewSet
+from .views import (
+    BinViewSet, ShipmentViewSet, AuditLogViewSet, InboundProcessViewSet, OutboundProcessViewSet,
+    JobViewSet, InventoryViewSet, event_stream, metrics_export
+)
 
 router = DefaultRouter()
 router.register(r'bins', BinViewSet, basename='bin')
@@ -8,7 +11,11 @@ router.register(r'shipments', ShipmentViewSet, basename='shipment')
 router.register(r'audit-logs', AuditLogViewSet, basename='auditlog')
 router.register(r'inbound', InboundProcessViewSet, basename='inbound-process')
 router.register(r'outbound', OutboundProcessViewSet, basename='outbound-process')
+router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'inventory', InventoryViewSet, basename='inventory')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('events/', event_stream, name='event-stream'),
+    path('metrics', metrics_export, name='metrics'),
 ]
@@ -1,33 +1,332 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.utils import timezone
-from .models import Bin, Shipment, AuditLog
+from .models import Bin, Shipment, AuditLog, Job
 from .serializers import (
-    BinSerializer, ShipmentSerializer, AuditLogSerializer,
-    ScanBinSerializer, ScanPackageSerializer, AssignPackageSerializer,
-    ManifestUploadSerializer, SearchPackageSerializer, SearchBinSerializer,
-    DissociatePackageSerializer
+    BinSerializer, BinOccupancySerializer, ShipmentSerializer, AuditLogSerializer,
+    ScanBinSerializer, ScanPackageSerializer, SuggestBinSerializer, AssignPackageSerializer,
+    ManifestUploadSerializer, ManifestFileUploadSerializer, SearchPackageSerializer,
+    SearchBinSerializer, DissociatePackageSerializer, JobSerializer, JobSubmitSerializer,
+    PicklistPayloadSerializer, row_serializer_for
 )
+from . import audit, cache, events, jobs, metrics, slotting
+from .archive import shipment_history
+from .conditional import conditional
+from .filters import filter_bins, filter_shipments, prefix_filter
+from .pagination import AuditLogCursorPagination, ShipmentCursorPagination
+from .readers import read_picklist_tracking_ids
+from .services import (
+    adjust_bin_occupancy, move_shipment_occupancy, reserve_bin_slot, apply_manifest, ingest_manifest_file,
+    create_picklist, dispatch_bin
+)
+
+
+def fast_reads_enabled():
+    return getattr(settings, 'INBOUND_FAST_READS', True)
+
+
+class RowListMixin:
+    """``list()`` fetching ``values()`` rows and building the response dicts directly
+    
+    Skips model instances and the per-field serializer machinery, which cost
+    most of the time of a large page; the output is the same as the
+    serializer's (see ``RowSerializer``). Falls back to the serializer when
+    ``INBOUND_FAST_READS`` is off or the serializer can't be mirrored.
+    """
+    
+    def list(self, request, *args, **kwargs):
+        row_serializer = row_serializer_for(self.get_serializer_class()) if fast_reads_enabled() else None
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset()).values(*row_serializer.columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.to_representation(page))
+        return Response(row_serializer.to_representation(queryset))
 
 
-class BinViewSet(viewsets.ModelViewSet):
+class BinViewSet(RowListMixin, viewsets.ModelViewSet):
     """ViewSet for managing bins"""
     queryset = Bin.objects.all()
     serializer_class = BinSerializer
+    
+    # Unchanged reads are answered 304 from the change versions (see conditional.py)
+    @conditional(lambda view, request: [cache.BINS_TABLE_KEY])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @conditional(lambda view, request, pk=None: [cache.bin_key(pk)])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def filter_queryset(self, queryset):
+        """List filters: see ``filters.filter_bins``"""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = filter_bins(queryset, self.request.query_params)
+        return queryset
+    
+    # Direct edits invalidate the cached bin lookups (see cache.py)
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            bin_obj = serializer.save()
+            cache.invalidate(bins=[bin_obj.bin_id])
+            events.emit(events.event('bin-created', status=bin_obj.status, bin_id=bin_obj.bin_id))
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            bin_obj = serializer.save()
+            cache.invalidate(bins=[bin_obj.bin_id])
+            events.emit(events.event('bin-updated', status=bin_obj.status, bin_id=bin_obj.bin_id))
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Deleting the bin empties its shipments' bin, so they change too
+            tracking_ids = list(instance.shipments.values_list('tracking_id', flat=True))
+            # delete() clears the primary key, which is the bin ID
+            bin_id = instance.bin_id
+            instance.delete()
+            cache.invalidate(shipments=tracking_ids, bins=[bin_id])
+            events.emit(events.event('bin-deleted', tracking_ids, previous_bin_id=bin_id))
 
 
-class ShipmentViewSet(viewsets.ModelViewSet):
+class ShipmentViewSet(RowListMixin, viewsets.ModelViewSet):
     """ViewSet for managing shipments"""
     queryset = Shipment.objects.all()
     serializer_class = ShipmentSerializer
+    pagination_class = ShipmentCursorPagination
+    
+    @conditional(lambda view, request: [cache.SHIPMENTS_TABLE_KEY])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @conditional(lambda view, request, pk=None: [cache.shipment_key(pk)])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def filter_queryset(self, queryset):
+        """List filters: see ``filters.filter_shipments``"""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = filter_shipments(queryset, self.request.query_params)
+        return queryset
+    
+    # Keep the bins' occupancy counters in step with direct edits
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            shipment = serializer.save()
+            move_shipment_occupancy(None, shipment.bin_id)
+            cache.invalidate(shipments=[shipment.tracking_id], bins=[shipment.bin_id])
+            events.emit(events.event(
+                'shipment-created', [shipment.tracking_id], shipment.status, bin_id=shipment.bin_id
+            ))
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous_bin_id = serializer.instance.bin_id
+            shipment = serializer.save()
+            move_shipment_occupancy(previous_bin_id, shipment.bin_id)
+            cache.invalidate(shipments=[shipment.tracking_id], bins=[previous_bin_id, shipment.bin_id])
+            events.emit(events.event(
+                'shipment-updated', [shipment.tracking_id], shipment.status,
+                bin_id=shipment.bin_id, previous_bin_id=previous_bin_id
+            ))
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            previous_bin_id = instance.bin_id
+            tracking_id = instance.tracking_id
+            instance.delete()
+            move_shipment_occupancy(previous_bin_id, None)
+            cache.invalidate(shipments=[tracking_id], bins=[previous_bin_id])
+            events.emit(events.event('shipment-deleted', [tracking_id], previous_bin_id=previous_bin_id))
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Full audit history of a shipment, newest first, including archived entries"""
+        history = shipment_history(pk)
+        if not history and not Shipment.objects.filter(tracking_id=pk).exists():
+            raise Http404(f'Package {pk} not found in system')
+        
+        return Response({
+            'success': True,
+            'tracking_id': pk,
+            'history': history,
+            'count': len(history)
+        }, status=status.HTTP_200_OK)
 
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(RowListMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for viewing audit logs"""
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
+    pagination_class = AuditLogCursorPagination
+
+
+class InventoryViewSet(viewsets.GenericViewSet):
+    """Server-side inventory aggregates for the dashboard"""
+    queryset = Bin.objects.all()
+    serializer_class = BinOccupancySerializer
+    
+    BIN_ORDERINGS = {
+        'bin_id': 'bin_id',
+        '-bin_id': '-bin_id',
+        'package_count': 'occupied_count',
+        '-package_count': '-occupied_count',
+    }
+    
+    @action(detail=False, methods=['get'])
+    @conditional(lambda view, request: [cache.BINS_TABLE_KEY, cache.SHIPMENTS_TABLE_KEY])
+    def summary(self, request):
+        """Bin, capacity and status totals computed with aggregate queries
+        
+        ``?zone=<bin id prefix>`` (e.g. ``L1`` or ``L1R2``) restricts the numbers to one zone.
+        """
+        bins = Bin.objects.all()
+        shipments = Shipment.objects.all()
+        zone = request.query_params.get('zone', '').strip().upper()
+        if zone:
+            bins = bins.filter(**prefix_filter('bin_id', zone))
+            shipments = shipments.filter(**prefix_filter('bin_id', zone))
+        
+        # Occupancy comes from the maintained per-bin counters, not from counting shipments
+        bin_totals = bins.aggregate(
+            total_bins=Count('pk'),
+            total_capacity=Sum('capacity'),
+            used_capacity=Sum('occupied_count'),
+            bins_in_use=Count('pk', filter=Q(occupied_count__gt=0)),
+            maintenance_bins=Count('pk', filter=Q(status='maintenance'))
+        )
+        # order_by() drops the model's default ordering from the GROUP BY
+        status_counts = {
+            row['status']: row['count']
+            for row in shipments.order_by().values('status').annotate(count=Count('pk'))
+        }
+        
+        total_capacity = bin_totals['total_capacity'] or 0
+        used_capacity = bin_totals['used_capacity'] or 0
+        
+        return Response({
+            'success': True,
+            'zone': zone or None,
+            'total_bins': bin_totals['total_bins'],
+            'bins_in_use': bin_totals['bins_in_use'],
+            'available_bins': bin_totals['total_bins'] - bin_totals['bins_in_use'],
+            'maintenance_bins': bin_totals['maintenance_bins'],
+            'total_packages': sum(status_counts.values()),
+            'total_capacity': total_capacity,
+            'used_capacity': used_capacity,
+            'utilization_rate': round(used_capacity * 100 / total_capacity, 1) if total_capacity else 0,
+            'status_counts': status_counts
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    @conditional(lambda view, request: [cache.BINS_TABLE_KEY])
+    def bins(self, request):
+        """Paginated bins with package counts
+        
+        Filters: see ``filters.filter_bins``. ``ordering``:
+        ``bin_id`` or ``package_count`` (prefix with ``-`` for descending).
+        """
+        bins = filter_bins(Bin.objects.all(), request.query_params)
+        
+        ordering = request.query_params.get('ordering', 'bin_id')
+        bins = bins.order_by(self.BIN_ORDERINGS.get(ordering, 'bin_id'))
+        
+        page = self.paginate_queryset(bins)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(bins, many=True).data)
+    
+    @action(detail=False, methods=['get'])
+    def cache(self, request):
+        """Hit/miss counters of this process's lookup cache"""
+        return Response({
+            'success': True,
+            'enabled': cache.cache_enabled(),
+            **cache.lookup_cache.stats()
+        }, status=status.HTTP_200_OK)
+
+
+def wants_background(request):
+    """True when the client asked for the work to run as a background job"""
+    flag = request.query_params.get('background', request.data.get('background', ''))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def job_accepted(job):
+    return Response({
+        'success': True,
+        'message': f'{job.get_kind_display()} job {job.pk} queued',
+        'job': JobSerializer(job).data
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet for submitting background jobs and polling their status, progress and result"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
+    
+    def create(self, request):
+        """Queue a manifest, picklist, dispatch or export job"""
+        serializer = JobSubmitSerializer(data=request.data)
+        if serializer.is_valid():
+            job = jobs.submit(
+                serializer.validated_data['kind'],
+                request.user.username if request.user.is_authenticated else 'anonymous',
+                payload=serializer.validated_data['payload'],
+                uploaded_file=serializer.validated_data.get('file')
+            )
+            return job_accepted(job)
+        
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        """Return the job result once finished (202 while still queued/running)"""
+        job = self.get_object()
+        if job.status in ('queued', 'running'):
+            return Response({
+                'success': False,
+                'status': job.status,
+                'progress_done': job.progress_done,
+                'progress_total': job.progress_total
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        if job.status == 'failed':
+            return Response({
+                'success': False,
+                'status': job.status,
+                'error': job.error
+            }, status=status.HTTP_200_OK)
+        
+        return Response(job.result, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the CSV produced by a finished export job"""
+        job = self.get_object()
+        if job.kind != 'export' or job.status != 'succeeded':
+            raise Http404('No export file for this job')
+        
+        path = jobs.get_job_file_dir() / job.result['file']
+        if not path.exists():
+            raise Http404('Export file no longer exists')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
 
 
 class InboundProcessViewSet(viewsets.ViewSet):
@@ -59,6 +358,9 @@ class InboundProcessViewSet(viewsets.ViewSet):
             
             message = f'Bin {bin_id} is ready for assignment'
             if created:
+                # A lookup may have cached the bin as missing
+                cache.invalidate(bins=[bin_id])
+                events.emit(events.event('bin-created', status=bin_obj.status, bin_id=bin_id))
                 message = f'New bin {bin_id} created and ready for assignment'
             
             return Response({
@@ -87,6 +389,40 @@ class InboundProcessViewSet(viewsets.ViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'])
+    def suggest_bin(self, request):
+        """Recommend the bin(s) to put the next package(s) away in
+        
+        ``zone``: bin ID prefix (e.g. ``L1`` or ``L1R2``); ``count``: packages
+        that must fit; ``strategy``: ``fill`` (fewest free slots that fit, the
+        default) or ``spread`` (most free slots); ``exclude``: comma-separated
+        bin IDs to skip; ``limit``: bins returned (the best one plus alternatives).
+        """
+        serializer = SuggestBinSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        suggestions = slotting.suggest_bins(
+            params['zone'], params['count'], params['strategy'], params['exclude'], params['limit']
+        )
+        if not suggestions:
+            where = f' in zone {params["zone"]}' if params['zone'] else ''
+            return Response({
+                'success': False,
+                'errors': {'bin_id': [f'No available bin{where} has room for {params["count"]} package(s)']}
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'success': True,
+            'bin': suggestions[0],
+            'alternatives': suggestions[1:],
+            'strategy': params['strategy']
+        }, status=status.HTTP_200_OK)
+    
     @action(detail=False, methods=['post'])
     def assign(self, request):
         """Assign package to bin and create/update shipment record"""
@@ -95,56 +431,67 @@ class InboundProcessViewSet(viewsets.ViewSet):
             bin_id = serializer.validated_data['bin_id']
             tracking_id = serializer.validated_data['tracking_id']
             
-            # Get bin object
-            bin_obj = Bin.objects.get(bin_id=bin_id)
-            
-            # Check bin capacity
-            current_shipments_count = Shipment.objects.filter(bin=bin_obj, status='putaway').count()
-            if current_shipments_count >= bin_obj.capacity:
-                return Response({
-                    'success': False,
-                    'errors': {'bin_id': [f'Bin {bin_id} is at full capacity ({bin_obj.capacity}). Cannot assign more packages.']},
-                    'capacity_exceeded': True
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Check if shipment exists (from manifest)
-            try:
-                shipment = Shipment.objects.get(tracking_id=tracking_id)
-                # Existing shipment - update it
-                shipment.bin = bin_obj
-                shipment.status = 'putaway'
-                shipment.save()
+            with transaction.atomic():
+                # Capacity check and slot claim in one conditional UPDATE, so
+                # concurrent scanners can't both pass the check and overfill the bin
+                if not reserve_bin_slot(bin_id):
+                    try:
+                        bin_obj = Bin.objects.get(bin_id=bin_id)
+                    except Bin.DoesNotExist:
+                        return Response({
+                            'success': False,
+                            'errors': {'bin_id': [f'Bin {bin_id} not found in system']}
+                        }, status=status.HTTP_404_NOT_FOUND)
+                    return Response({
+                        'success': False,
+                        'errors': {'bin_id': [f'Bin {bin_id} is at full capacity ({bin_obj.capacity}). Cannot assign more packages.']},
+                        'capacity_exceeded': True
+                    }, status=status.HTTP_400_BAD_REQUEST)
                 
-                was_manifested = shipment.manifested
-            except Shipment.DoesNotExist:
-                # New shipment - not from manifest
-                shipment = Shipment.objects.create(
-                    tracking_id=tracking_id,
-                    bin=bin_obj,
-                    status='putaway',
-                    manifested=False,
-                    time_in=timezone.now()
+                # Check if shipment exists (from manifest)
+                try:
+                    shipment = Shipment.objects.get(tracking_id=tracking_id)
+                    previous_bin_id = shipment.bin_id
+                    # Existing shipment - update it
+                    shipment.bin_id = bin_id
+                    shipment.status = 'putaway'
+                    shipment.save()
+                    
+                    was_manifested = shipment.manifested
+                except Shipment.DoesNotExist:
+                    # New shipment - not from manifest
+                    previous_bin_id = None
+                    shipment = Shipment.objects.create(
+                        tracking_id=tracking_id,
+                        bin_id=bin_id,
+                        status='putaway',
+                        manifested=False,
+                        time_in=timezone.now()
+                    )
+                    was_manifested = False
+                
+                # The slot claimed above covers the move into this bin; give back the old one
+                if previous_bin_id:
+                    adjust_bin_occupancy(previous_bin_id, -1)
+                bin_obj = Bin.objects.get(bin_id=bin_id)
+                cache.invalidate(shipments=[tracking_id], bins=[bin_id, previous_bin_id])
+                events.emit(events.event(
+                    'assigned', [tracking_id], 'putaway', bin_id=bin_id, previous_bin_id=previous_bin_id
+                ))
+                
+                # Create audit log
+                audit.record(
+                    action='assigned',
+                    shipment=shipment,
+                    user=request.user.username if request.user.is_authenticated else 'anonymous',
+                    details=f'Package {tracking_id} assigned to bin {bin_id}'
                 )
-                was_manifested = False
-            
-            # Update bin status if needed
-            if current_shipments_count + 1 >= bin_obj.capacity:
-                bin_obj.status = 'occupied'
-                bin_obj.save()
-            
-            # Create audit log
-            AuditLog.objects.create(
-                action='assigned',
-                shipment=shipment,
-                user=request.user.username if request.user.is_authenticated else 'anonymous',
-                details=f'Package {tracking_id} assigned to bin {bin_id}'
-            )
             
             return Response({
                 'success': True,
                 'message': f'Package {tracking_id} successfully assigned to bin {bin_id}',
                 'shipment': ShipmentSerializer(shipment).data,
-                'bin_capacity_used': current_shipments_count + 1,
+                'bin_capacity_used': bin_obj.occupied_count,
                 'bin_capacity_total': bin_obj.capacity,
                 'was_manifested': was_manifested
             }, status=status.HTTP_201_CREATED)
@@ -161,51 +508,10 @@ class InboundProcessViewSet(viewsets.ViewSet):
         if serializer.is_valid():
             tracking_ids = serializer.validated_data['tracking_ids']
             
-            created_ids = []
-            updated_ids = []
-            failed_ids = []
+            user = request.user.username if request.user.is_authenticated else 'anonymous'
             
-            for tracking_id in tracking_ids:
-                try:
-                    # Get or create shipment by tracking ID
-                    shipment, created = Shipment.objects.get_or_create(
-                        tracking_id=tracking_id,
-                        defaults={
-                            'status': 'manifested',
-                            'manifested': True,
-                            'time_in': timezone.now()
-                        }
-                    )
-                    
-                    if created:
-                        # Create audit log for new shipment
-                        AuditLog.objects.create(
-                            action='updated',
-                            shipment=shipment,
-                            user=request.user.username if request.user.is_authenticated else 'anonymous',
-                            details=f'Shipment created with manifested status via manifest upload'
-                        )
-                        created_ids.append(tracking_id)
-                    else:
-                        # Update existing shipment
-                        shipment.status = 'manifested'
-                        shipment.manifested = True
-                        shipment.save()
-                        
-                        # Create audit log
-                        AuditLog.objects.create(
-                            action='updated',
-                            shipment=shipment,
-                            user=request.user.username if request.user.is_authenticated else 'anonymous',
-                            details=f'Status updated to manifested via manifest upload'
-                        )
-                        updated_ids.append(tracking_id)
-                    
-                except Exception as e:
-                    failed_ids.append({
-                        'tracking_id': tracking_id,
-                        'reason': str(e)
-                    })
+            # Set-based path: chunked IN lookups, bulk inserts, one UPDATE per chunk
+            created_ids, updated_ids, failed_ids = apply_manifest(tracking_ids, user)
             
             return Response({
                 'success': True,
@@ -223,87 +529,151 @@ class InboundProcessViewSet(viewsets.ViewSet):
             'success': False,
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def upload_manifest(self, request):
+        """Stream an uploaded CSV/JSON manifest file into shipment records"""
+        serializer = ManifestFileUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            user = request.user.username if request.user.is_authenticated else 'anonymous'
+            
+            if wants_background(request):
+                return job_accepted(jobs.submit('manifest', user, uploaded_file=serializer.validated_data['file']))
+            
+            try:
+                result = ingest_manifest_file(serializer.validated_data['file'], user)
+            except (ValueError, UnicodeDecodeError) as e:
+                return Response({
+                    'success': False,
+                    'errors': {'file': [str(e)]}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            if not result['total_processed']:
+                return Response({
+                    'success': False,
+                    'errors': {'file': ['No tracking IDs found in file']}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            return Response({
+                'success': True,
+                'message': f"Processed {result['total_processed']} tracking IDs",
+                **result
+            }, status=status.HTTP_200_OK)
+        
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def lookup_data(request):
+    """Lookup input: query params for a (cacheable) GET, the body for a POST"""
+    return request.query_params if request.method == 'GET' else request.data
+
+
+def package_keys(tracking_id, shipment):
+    """Change-version keys a search_package response depends on"""
+    keys = [cache.shipment_key(tracking_id)]
+    if shipment and shipment['bin_id']:
+        keys.append(cache.bin_key(shipment['bin_id']))
+    return keys
+
+
+def package_lookup_keys(request):
+    serializer = SearchPackageSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return None
+    tracking_id = serializer.validated_data['tracking_id']
+    return package_keys(tracking_id, cache.get_shipment(tracking_id))
+
+
+def bin_lookup_keys(request):
+    serializer = SearchBinSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return None
+    return [cache.bin_key(serializer.validated_data['bin_id'])]
 
 
 class OutboundProcessViewSet(viewsets.ViewSet):
     """ViewSet for handling outbound process operations"""
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['get', 'post'])
+    @conditional(lambda view, request: package_lookup_keys(request))
     def search_package(self, request):
-        """Search for package by tracking ID"""
-        serializer = SearchPackageSerializer(data=request.data)
+        """Search for package by tracking ID (GET with query params is conditional)"""
+        serializer = SearchPackageSerializer(data=lookup_data(request))
         if serializer.is_valid():
             tracking_id = serializer.validated_data['tracking_id']
             
-            try:
-                shipment = Shipment.objects.select_related('bin').get(tracking_id=tracking_id)
-                
-                # Get bin information
-                bin_info = None
-                if shipment.bin:
-                    bin_info = {
-                        'bin_id': shipment.bin.bin_id,
-                        'location': shipment.bin.location,
-                        'status': shipment.bin.status
-                    }
-                
-                return Response({
-                    'success': True,
-                    'package': {
-                        'tracking_id': shipment.tracking_id,
-                        'status': shipment.status,
-                        'bin': bin_info,
-                        'time_in': shipment.time_in
-                    }
-                }, status=status.HTTP_200_OK)
-                
-            except Shipment.DoesNotExist:
+            # Cached lookups; see cache.py for how writes invalidate them
+            shipment = cache.get_shipment(tracking_id)
+            if shipment is None:
                 return Response({
                     'success': False,
                     'errors': {'tracking_id': [f'Package {tracking_id} not found in system']}
                 }, status=status.HTTP_404_NOT_FOUND)
+            
+            # Get bin information
+            bin_info = None
+            bin_obj = cache.get_bin(shipment['bin_id'], sync=False) if shipment['bin_id'] else None
+            if bin_obj:
+                bin_info = {
+                    'bin_id': bin_obj['bin_id'],
+                    'location': bin_obj['location'],
+                    'status': bin_obj['status']
+                }
+            
+            response = Response({
+                'success': True,
+                'package': {
+                    'tracking_id': shipment['tracking_id'],
+                    'status': shipment['status'],
+                    'bin': bin_info,
+                    'time_in': shipment['time_in']
+                }
+            }, status=status.HTTP_200_OK)
+            # The package may have moved since its ETag keys were looked up
+            response.conditional_keys = package_keys(tracking_id, shipment)
+            return response
         
         return Response({
             'success': False,
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['get', 'post'])
+    @conditional(lambda view, request: bin_lookup_keys(request))
     def search_bin(self, request):
-        """Search for all packages in a bin"""
-        serializer = SearchBinSerializer(data=request.data)
+        """Search for all packages in a bin (GET with query params is conditional)"""
+        serializer = SearchBinSerializer(data=lookup_data(request))
         if serializer.is_valid():
             bin_id = serializer.validated_data['bin_id']
             
-            try:
-                bin_obj = Bin.objects.get(bin_id=bin_id)
-                
-                # Get all shipments in this bin
-                shipments = Shipment.objects.filter(bin=bin_obj)
-                
-                packages = [{
-                    'tracking_id': s.tracking_id,
-                    'status': s.status,
-                    'time_in': s.time_in
-                } for s in shipments]
-                
-                return Response({
-                    'success': True,
-                    'bin': {
-                        'bin_id': bin_obj.bin_id,
-                        'location': bin_obj.location,
-                        'status': bin_obj.status,
-                        'capacity': bin_obj.capacity
-                    },
-                    'packages': packages,
-                    'package_count': len(packages)
-                }, status=status.HTTP_200_OK)
-                
-            except Bin.DoesNotExist:
+            # Bin and all shipments in it, from the lookup cache
+            bin_obj = cache.get_bin(bin_id)
+            if bin_obj is None:
                 return Response({
                     'success': False,
                     'errors': {'bin_id': [f'Bin {bin_id} not found in system']}
                 }, status=status.HTTP_404_NOT_FOUND)
+            
+            packages = [{
+                'tracking_id': s['tracking_id'],
+                'status': s['status'],
+                'time_in': s['time_in']
+            } for s in bin_obj['packages']]
+            
+            return Response({
+                'success': True,
+                'bin': {
+                    'bin_id': bin_obj['bin_id'],
+                    'location': bin_obj['location'],
+                    'status': bin_obj['status'],
+                    'capacity': bin_obj['capacity']
+                },
+                'packages': packages,
+                'package_count': len(packages)
+            }, status=status.HTTP_200_OK)
         
         return Response({
             'success': False,
@@ -318,37 +688,43 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             tracking_id = serializer.validated_data['tracking_id']
             bin_id = serializer.validated_data['bin_id']
             
-            # Get shipment and bin
-            shipment = Shipment.objects.get(tracking_id=tracking_id)
-            bin_obj = shipment.bin
-            
-            # Clear bin association and update status
-            shipment.bin = None
-            shipment.status = 'picked-up'
-            shipment.time_out = timezone.now()
-            shipment.save()
-            
-            # Update bin status to available if no more packages
-            remaining_packages = Shipment.objects.filter(bin=bin_obj).count()
-            if remaining_packages == 0:
-                bin_obj.status = 'available'
-                bin_obj.save()
-            
-            # Create audit log
-            AuditLog.objects.create(
-                action='dissociated',
-                shipment=shipment,
-                user=request.user.username if request.user.is_authenticated else 'anonymous',
-                details=f'Package {tracking_id} picked up from bin {bin_id}'
-            )
+            with transaction.atomic():
+                # Clear bin association and update status, only if the package is
+                # still in that bin: the checks above ran before the transaction
+                now = timezone.now()
+                picked_up = Shipment.objects.filter(pk=tracking_id, bin_id=bin_id).exclude(
+                    status='picked-up'
+                ).update(bin=None, status='picked-up', time_out=now, updated_at=now)
+                if picked_up != 1:
+                    return Response({
+                        'success': False,
+                        'errors': {'non_field_errors': [
+                            f'Package {tracking_id} is no longer in bin {bin_id} or has already been picked up'
+                        ]}
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                # Update the occupancy counter (and bin status) in the same transaction
+                adjust_bin_occupancy(bin_id, -1)
+                cache.invalidate(shipments=[tracking_id], bins=[bin_id])
+                events.emit(events.event(
+                    'dissociated', [tracking_id], 'picked-up', previous_bin_id=bin_id
+                ))
+                
+                # Create audit log
+                audit.record(
+                    action='dissociated',
+                    shipment=tracking_id,
+                    user=request.user.username if request.user.is_authenticated else 'anonymous',
+                    details=f'Package {tracking_id} picked up from bin {bin_id}'
+                )
             
             return Response({
                 'success': True,
                 'message': f'Package {tracking_id} successfully picked up from bin {bin_id}',
                 'package': {
-                    'tracking_id': shipment.tracking_id,
-                    'status': shipment.status,
-                    'time_out': shipment.time_out
+                    'tracking_id': tracking_id,
+                    'status': 'picked-up',
+                    'time_out': now
                 }
             }, status=status.HTTP_200_OK)
         
@@ -357,43 +733,40 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['get', 'post'])
+    @conditional(lambda view, request: bin_lookup_keys(request))
     def get_bin_packages(self, request):
-        """Get all putaway packages in a bin for pickup"""
-        serializer = SearchBinSerializer(data=request.data)
+        """Get all putaway packages in a bin for pickup (GET with query params is conditional)"""
+        serializer = SearchBinSerializer(data=lookup_data(request))
         if serializer.is_valid():
             bin_id = serializer.validated_data['bin_id']
             
-            try:
-                bin_obj = Bin.objects.get(bin_id=bin_id)
-                
-                # Get all shipments in putaway status in this bin
-                shipments = Shipment.objects.filter(bin=bin_obj, status__in=['putaway', 'picked'])
-                
-                packages = [{
-                    'tracking_id': s.tracking_id,
-                    'status': s.status,
-                    'manifested': s.manifested,
-                    'time_in': s.time_in
-                } for s in shipments]
-                
-                return Response({
-                    'success': True,
-                    'bin': {
-                        'bin_id': bin_obj.bin_id,
-                        'location': bin_obj.location,
-                        'status': bin_obj.status,
-                        'capacity': bin_obj.capacity
-                    },
-                    'packages': packages,
-                    'package_count': len(packages)
-                }, status=status.HTTP_200_OK)
-                
-            except Bin.DoesNotExist:
+            bin_obj = cache.get_bin(bin_id)
+            if bin_obj is None:
                 return Response({
                     'success': False,
                     'errors': {'bin_id': [f'Bin {bin_id} not found in system']}
                 }, status=status.HTTP_404_NOT_FOUND)
+            
+            # Get all shipments in putaway status in this bin
+            packages = [{
+                'tracking_id': s['tracking_id'],
+                'status': s['status'],
+                'manifested': s['manifested'],
+                'time_in': s['time_in']
+            } for s in bin_obj['packages'] if s['status'] in ('putaway', 'picked')]
+            
+            return Response({
+                'success': True,
+                'bin': {
+                    'bin_id': bin_obj['bin_id'],
+                    'location': bin_obj['location'],
+                    'status': bin_obj['status'],
+                    'capacity': bin_obj['capacity']
+                },
+                'packages': packages,
+                'package_count': len(packages)
+            }, status=status.HTTP_200_OK)
         
         return Response({
             'success': False,
@@ -429,17 +802,31 @@ class OutboundProcessViewSet(viewsets.ViewSet):
                     'errors': {'tracking_id': [f'Package status is {shipment.status}, not available for pickup']}
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Update status to picked
-            shipment.status = 'picked'
-            shipment.save()
-            
-            # Create audit log
-            AuditLog.objects.create(
-                action='updated',
-                shipment=shipment,
-                user=request.user.username if request.user.is_authenticated else 'anonymous',
-                details=f'Package {shipment.tracking_id} marked as picked'
-            )
+            with transaction.atomic():
+                # Update status to picked, unless another request got there first
+                now = timezone.now()
+                picked = Shipment.objects.filter(pk=shipment.pk, status='putaway').update(
+                    status='picked',
+                    updated_at=now
+                )
+                if not picked:
+                    current = Shipment.objects.filter(pk=shipment.pk).values_list('status', flat=True).first()
+                    return Response({
+                        'success': False,
+                        'errors': {'tracking_id': [f'Package status is {current}, not available for pickup']}
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                shipment.status = 'picked'
+                shipment.updated_at = now
+                cache.invalidate(shipments=[shipment.tracking_id], bins=[shipment.bin_id])
+                events.emit(events.event('picked', [shipment.tracking_id], 'picked', bin_id=shipment.bin_id))
+                
+                # Create audit log
+                audit.record(
+                    action='updated',
+                    shipment=shipment,
+                    user=request.user.username if request.user.is_authenticated else 'anonymous',
+                    details=f'Package {shipment.tracking_id} marked as picked'
+                )
             
             return Response({
                 'success': True,
@@ -478,42 +865,16 @@ class OutboundProcessViewSet(viewsets.ViewSet):
         
         try:
             bin_obj = Bin.objects.get(bin_id=expected_bin_id.strip().upper())
+            user = request.user.username if request.user.is_authenticated else 'anonymous'
+            dispatched_ids = dispatch_bin(bin_obj, user)
+            dispatched_count = len(dispatched_ids)
             
-            # Get all picked packages in this bin
-            picked_shipments = Shipment.objects.filter(bin=bin_obj, status='picked')
-            
-            if not picked_shipments.exists():
+            if not dispatched_count:
                 return Response({
                     'success': False,
                     'errors': {'bin_id': ['No picked packages found in this bin']}
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            dispatched_count = 0
-            dispatched_ids = []
-            
-            for shipment in picked_shipments:
-                shipment.status = 'dispatched'
-                shipment.time_out = timezone.now()
-                shipment.bin = None  # Remove bin association
-                shipment.save()
-                
-                # Create audit log
-                AuditLog.objects.create(
-                    action='dispatched',
-                    shipment=shipment,
-                    user=request.user.username if request.user.is_authenticated else 'anonymous',
-                    details=f'Package {shipment.tracking_id} dispatched from bin {bin_obj.bin_id}'
-                )
-                
-                dispatched_count += 1
-                dispatched_ids.append(shipment.tracking_id)
-            
-            # Check if bin is now empty and update status
-            remaining_packages = Shipment.objects.filter(bin=bin_obj).count()
-            if remaining_packages == 0:
-                bin_obj.status = 'available'
-                bin_obj.save()
-            
             return Response({
                 'success': True,
                 'message': f'Successfully dispatched {dispatched_count} packages from bin {bin_obj.bin_id}',
@@ -526,14 +887,11 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             return Response({
                 'success': False,
                 'errors': {'bin_id': [f'Bin {expected_bin_id} not found in system']}
-            }, status=status.HTTP_404_NOT_FOUND)    
+            }, status=status.HTTP_404_NOT_FOUND)
+    
     @action(detail=False, methods=['post'])
     def process_picklist_file(self, request):
         """Process uploaded CSV/JSON file to create picklist"""
-        import csv
-        import json
-        from io import TextIOWrapper
-        
         if 'file' not in request.FILES:
             return Response({
                 'success': False,
@@ -541,43 +899,28 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         uploaded_file = request.FILES['file']
-        file_extension = uploaded_file.name.split('.')[-1].lower()
+        user = request.user.username if request.user.is_authenticated else 'anonymous'
         
-        tracking_ids = []
+        # The same checks as a picklist job's payload
+        options = PicklistPayloadSerializer(data={'wave_size': request.data.get('wave_size') or None})
+        if not options.is_valid():
+            return Response({
+                'success': False,
+                'errors': options.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        wave_size = options.validated_data.get('wave_size')
         
-        try:
-            if file_extension == 'csv':
-                # Parse CSV file
-                file_data = TextIOWrapper(uploaded_file.file, encoding='utf-8')
-                csv_reader = csv.reader(file_data)
-                
-                # Skip header if present
-                header = next(csv_reader, None)
-                
-                for row in csv_reader:
-                    if row and row[0].strip():
-                        tracking_ids.append(row[0].strip().upper())
-                        
-            elif file_extension == 'json':
-                # Parse JSON file
-                file_data = uploaded_file.read().decode('utf-8')
-                json_data = json.loads(file_data)
-                
-                # Handle both array and object with tracking_ids key
-                if isinstance(json_data, list):
-                    tracking_ids = [str(item).strip().upper() for item in json_data]
-                elif isinstance(json_data, dict) and 'tracking_ids' in json_data:
-                    tracking_ids = [str(item).strip().upper() for item in json_data['tracking_ids']]
-                else:
-                    return Response({
-                        'success': False,
-                        'error': 'Invalid JSON format. Expected array or object with "tracking_ids" key'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-            else:
+        if wants_background(request):
+            if uploaded_file.name.rsplit('.', 1)[-1].lower() not in ('csv', 'json'):
                 return Response({
                     'success': False,
                     'error': 'Unsupported file format. Please upload CSV or JSON file'
                 }, status=status.HTTP_400_BAD_REQUEST)
+            payload = {} if wave_size is None else {'wave_size': wave_size}
+            return job_accepted(jobs.submit('picklist', user, payload=payload, uploaded_file=uploaded_file))
+        
+        try:
+            tracking_ids = read_picklist_tracking_ids(uploaded_file)
             
             if not tracking_ids:
                 return Response({
@@ -585,45 +928,11 @@ class OutboundProcessViewSet(viewsets.ViewSet):
                     'error': 'No tracking IDs found in file'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Process tracking IDs
-            processed_packages = []
-            not_found = []
-            
-            for tracking_id in tracking_ids:
-                try:
-                    shipment = Shipment.objects.select_related('bin').get(tracking_id=tracking_id)
-                    
-                    # Only process if status is putaway
-                    if shipment.status == 'putaway':
-                        # Update status to picklist-created
-                        shipment.status = 'picklist-created'
-                        shipment.save()
-                        
-                        # Create audit log
-                        AuditLog.objects.create(
-                            action='updated',
-                            shipment=shipment,
-                            user=request.user.username if request.user.is_authenticated else 'anonymous',
-                            details=f'Package {tracking_id} added to picklist'
-                        )
-                        
-                        processed_packages.append({
-                            'tracking_id': shipment.tracking_id,
-                            'bin_id': shipment.bin.bin_id if shipment.bin else None,
-                            'status': shipment.status
-                        })
-                    else:
-                        not_found.append(f'{tracking_id} (status: {shipment.status})')
-                        
-                except Shipment.DoesNotExist:
-                    not_found.append(tracking_id)
+            result = create_picklist(tracking_ids, user, wave_size=wave_size)
             
             return Response({
                 'success': True,
-                'packages': processed_packages,
-                'found_count': len(processed_packages),
-                'not_found': not_found,
-                'not_found_count': len(not_found)
+                **result
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -644,7 +953,7 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            shipment = Shipment.objects.select_related('bin').get(tracking_id=tracking_id.strip().upper())
+            shipment = Shipment.objects.get(tracking_id=tracking_id.strip().upper())
             
             if shipment.status != 'picklist-created':
                 return Response({
@@ -653,29 +962,41 @@ class OutboundProcessViewSet(viewsets.ViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Store bin info before clearing
-            bin_id = shipment.bin.bin_id if shipment.bin else None
-            bin_obj = shipment.bin
+            bin_id = shipment.bin_id
             
-            # Update shipment status and clear bin
-            shipment.status = 'dispatched'
-            shipment.time_out = timezone.now()
-            shipment.bin = None
-            shipment.save()
-            
-            # Update bin status if empty
-            if bin_obj:
-                remaining_packages = Shipment.objects.filter(bin=bin_obj).count()
-                if remaining_packages == 0:
-                    bin_obj.status = 'available'
-                    bin_obj.save()
-            
-            # Create audit log
-            AuditLog.objects.create(
-                action='dispatched',
-                shipment=shipment,
-                user=request.user.username if request.user.is_authenticated else 'anonymous',
-                details=f'Package {tracking_id} dispatched from picklist (bin: {bin_id})'
-            )
+            with transaction.atomic():
+                # Update shipment status and clear bin; a conditional UPDATE so that
+                # of two concurrent dispatches of the same package only one wins
+                now = timezone.now()
+                dispatched = Shipment.objects.filter(
+                    pk=shipment.pk, status='picklist-created', bin_id=bin_id
+                ).update(status='dispatched', time_out=now, bin=None, updated_at=now)
+                if not dispatched:
+                    current = Shipment.objects.filter(pk=shipment.pk).values_list('status', flat=True).first()
+                    return Response({
+                        'success': False,
+                        'error': f'Package status is {current}, cannot dispatch'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                shipment.status = 'dispatched'
+                shipment.time_out = now
+                shipment.bin = None
+                shipment.updated_at = now
+                
+                # Update the occupancy counter (and bin status) in the same transaction
+                if bin_id:
+                    adjust_bin_occupancy(bin_id, -1)
+                cache.invalidate(shipments=[shipment.tracking_id], bins=[bin_id])
+                events.emit(events.event(
+                    'dispatched', [shipment.tracking_id], 'dispatched', previous_bin_id=bin_id
+                ))
+                
+                # Create audit log
+                audit.record(
+                    action='dispatched',
+                    shipment=shipment,
+                    user=request.user.username if request.user.is_authenticated else 'anonymous',
+                    details=f'Package {tracking_id} dispatched from picklist (bin: {bin_id})'
+                )
             
             return Response({
                 'success': True,
@@ -691,4 +1012,48 @@ class OutboundProcessViewSet(viewsets.ViewSet):
             return Response({
                 'success': False,
                 'error': f'Package {tracking_id} not found in system'
-            }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            }, status=status.HTTP_404_NOT_FOUND)
+
+
+async def event_stream(request):
+    """Server-Sent Events stream of inventory changes (see events.py)
+
+    ``?bin=<id>[,<id>...]`` and ``?zone=<bin id prefix>[,...]`` narrow the
+    stream to those bins; a reconnecting client resumes after its
+    ``Last-Event-ID`` header (or ``?last_event_id=``).
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would buffer the endless body and never answer
+        return JsonResponse({
+            'success': False,
+            'errors': {'non_field_errors': ['The event stream needs an ASGI server (backend.asgi)']}
+        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+    
+    def id_list(name):
+        values = request.GET.get(name, '').replace(',', ' ').upper().split()
+        return [value for value in values if value]
+    
+    after_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'errors': {'last_event_id': ['Must be an event id']}
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    subscription = events.Subscription(bins=id_list('bin'), zones=id_list('zone'))
+    response = StreamingHttpResponse(
+        events.stream(subscription, after_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop proxies (nginx) from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def metrics_export(request):
+    """Request metrics in Prometheus text format (see metrics.py)"""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)